@@ -0,0 +1,86 @@
+"""
+Benchmark: Connection Scan and RAPTOR journey planner query times.
+
+Builds the connection and RAPTOR timetables from an imported feed and
+times earliest-arrival, one-hour profile and Pareto (arrival x transfers)
+queries between random pairs of served stops at random daytime departure
+times.
+
+Run from the repository root against a database built by load_all_data.py:
+    python -m benchmarks.journey_benchmark [db_path] [queries]
+"""
+
+import os
+import random
+import sys
+import time
+from typing import Callable, List
+import numpy as np
+from database_connector import DatabaseConnector
+from utils.connection_scan import ConnectionTimetable
+from utils.raptor import RaptorTimetable
+
+
+PROFILE_WINDOW_SECONDS = 3600
+
+
+def time_queries(query: Callable[[int, int, int], object], pairs: List[tuple]) -> np.ndarray:
+    """Milliseconds taken by ``query`` for each (source, target, departure) triple."""
+    timings = []
+    for source, target, departure in pairs:
+        started = time.perf_counter()
+        query(source, target, departure)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.array(timings)
+
+
+def report(name: str, timings: np.ndarray) -> None:
+    print(
+        f"  {name:<18} median {np.median(timings):8.2f} ms"
+        f"   p99 {np.percentile(timings, 99):8.2f} ms"
+        f"   max {timings.max():8.2f} ms"
+    )
+
+
+def main() -> None:
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("TRANSIT_DB_PATH", "transit.duckdb")
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    db = DatabaseConnector(db_path)
+    started = time.perf_counter()
+    timetable = ConnectionTimetable.from_database(db)
+    build_secs = time.perf_counter() - started
+    started = time.perf_counter()
+    raptor = RaptorTimetable.from_database(db)
+    raptor_build_secs = time.perf_counter() - started
+
+    served = np.unique(timetable.connections.dep_stop).tolist()
+    rng = random.Random(42)
+    pairs = [
+        (*rng.sample(served, 2), rng.randrange(6 * 3600, 22 * 3600))
+        for _ in range(queries)
+    ]
+
+    print(f"Timetable: {len(timetable)} connections, {len(served)} served stops, built in {build_secs:.2f}s")
+    print(f"RAPTOR: {len(raptor)} patterns, built in {raptor_build_secs:.2f}s")
+    print(f"{queries} random queries")
+    report("earliest arrival", time_queries(
+        lambda source, target, departure: timetable.earliest_arrival([source], [target], departure),
+        pairs
+    ))
+    report("profile (1 hour)", time_queries(
+        lambda source, target, departure: timetable.profile([source], [target], departure, departure + PROFILE_WINDOW_SECONDS),
+        pairs
+    ))
+    report("raptor", time_queries(
+        lambda source, target, departure: raptor.query([source], [target], departure),
+        pairs
+    ))
+    report("range raptor (1h)", time_queries(
+        lambda source, target, departure: raptor.range_query([source], [target], departure, departure + PROFILE_WINDOW_SECONDS),
+        pairs
+    ))
+
+
+if __name__ == "__main__":
+    main()
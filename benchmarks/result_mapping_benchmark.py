@@ -0,0 +1,93 @@
+"""
+Benchmark: per-row cost of mapping query results to response models.
+
+Compares the DataFrame.iterrows() pattern handlers used to follow with the
+bulk mapping in utils.result_mapping, on a synthetic trips table.
+
+Run from the repository root:
+    python -m benchmarks.result_mapping_benchmark [rows]
+"""
+
+import sys
+import time
+from typing import Callable, List
+import pandas as pd
+from database_connector import DatabaseConnector
+from pydantic_models import Trip
+from utils.result_mapping import fetch_models
+
+
+QUERY = """
+    SELECT trip_id, route_id, service_id, trip_headsign, direction_id, shape_id
+    FROM trips
+    LIMIT ?
+"""
+
+
+def create_trips(db: DatabaseConnector, rows: int) -> None:
+    db.execute(f"""
+        CREATE TABLE trips AS
+        SELECT
+            'T' || i AS trip_id,
+            'R' || (i % 200) AS route_id,
+            'WKD' AS service_id,
+            'To stop ' || (i % 50) AS trip_headsign,
+            CASE WHEN i % 7 = 0 THEN NULL ELSE i % 2 END::INTEGER AS direction_id,
+            'SH' || (i % 400) AS shape_id
+        FROM range({rows}) t(i)
+    """)
+
+
+def iterrows_mapping(db: DatabaseConnector, limit: int) -> List[Trip]:
+    df = db.execute_df(QUERY, [limit])
+
+    trips = []
+    for _, row in df.iterrows():
+        direction_id = None
+        if pd.notna(row.get('direction_id')):
+            direction_id = int(row['direction_id'])
+
+        trips.append(Trip(
+            trip_id=row['trip_id'],
+            route_id=row['route_id'],
+            service_id=row['service_id'],
+            trip_headsign=row.get('trip_headsign'),
+            direction_id=direction_id,
+            shape_id=row.get('shape_id')
+        ))
+    return trips
+
+
+def bulk_mapping(db: DatabaseConnector, limit: int) -> List[Trip]:
+    return fetch_models(db, Trip, QUERY, [limit])
+
+
+def time_per_row(func: Callable[[DatabaseConnector, int], List[Trip]], db: DatabaseConnector, rows: int, repeats: int = 5) -> float:
+    """Best-of-``repeats`` microseconds per row."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func(db, rows)
+        best = min(best, time.perf_counter() - started)
+    assert len(result) == rows
+    return best / rows * 1e6
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    db = DatabaseConnector(":memory:")
+    create_trips(db, rows)
+    assert iterrows_mapping(db, rows) == bulk_mapping(db, rows)
+
+    before = time_per_row(iterrows_mapping, db, rows)
+    after = time_per_row(bulk_mapping, db, rows)
+
+    print(f"Mapping {rows} rows to Trip")
+    print(f"  iterrows + per-row model: {before:8.2f} us/row")
+    print(f"  bulk result mapping:      {after:8.2f} us/row")
+    print(f"  speedup:                  {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
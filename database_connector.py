@@ -1,8 +1,16 @@
 from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+import os
+import threading
 import duckdb
 import pandas as pd
 
 
+DB_PATH = os.getenv("TRANSIT_DB_PATH", "transit.duckdb")
+DEFAULT_POOL_SIZE = int(os.getenv("TRANSIT_DB_POOL_SIZE", "8"))
+DEFAULT_ACQUIRE_TIMEOUT = float(os.getenv("TRANSIT_DB_ACQUIRE_TIMEOUT", "30"))
+
 
 class DatabaseError(Exception):
     """Exception raised for database-related errors."""
@@ -12,15 +20,20 @@ class DatabaseError(Exception):
 class DatabaseConnector:
     """A class to connect to a DuckDB database and execute queries."""
 
-    def __init__(self, db_path=":memory:"):
+    def __init__(self, db_path=":memory:", connection: Optional[duckdb.DuckDBPyConnection] = None):
         """Initializes the DatabaseConnector.
 
         Args:
             db_path (str, optional): The path to the DuckDB database file.
                 Defaults to ":memory:", which creates an in-memory database.
+            connection (duckdb.DuckDBPyConnection, optional): An already open
+                connection or cursor to use instead of opening ``db_path``.
+                Borrowed connections are owned by the caller and are not
+                closed by ``close()``.
         """
         self.db_path = db_path
-        self.conn = None
+        self.conn = connection
+        self._owns_connection = connection is None
 
     def connect(self) -> duckdb.DuckDBPyConnection:
         """Connects to the DuckDB database.
@@ -34,7 +47,8 @@ class DatabaseConnector:
         if not self.conn:
             try:
                 self.conn = duckdb.connect(self.db_path)
-                
+                self._owns_connection = True
+
                 self._setup_spatial_extension()
             except Exception as e:
                 print(f"Failed to connect to database at '{self.db_path}': {e}")
@@ -43,15 +57,7 @@ class DatabaseConnector:
 
     def _setup_spatial_extension(self) -> None:
         """Install and load the DuckDB spatial extension for geospatial operations."""
-        try:
-            
-            self.conn.execute("INSTALL spatial;")
-            
-            self.conn.execute("LOAD spatial;")
-        except Exception as e:
-            
-            print(f"Spatial extension setup: {e}")
-            pass
+        setup_spatial_extension(self.conn)
 
     def execute(self, query, params=None) -> list:
         """Executes a SQL query and fetches all results.
@@ -103,17 +109,345 @@ class DatabaseConnector:
             print(f"Database query execution failed: {e}", )
             raise DatabaseError(f"Query execution failed: {e}") from e
 
+    def execute_records(self, query, params=None) -> List[Dict[str, Any]]:
+        """Executes a SQL query and returns each row as a dict keyed by column name.
+
+        Rows are built straight from the fetched tuples, without a DataFrame.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (list, optional): A list of parameters to substitute into the query.
+                Defaults to None.
+
+        Returns:
+            list: A list of dicts, one per result row.
+
+        Raises:
+            DatabaseError: If the query execution fails.
+        """
+        try:
+            conn = self.connect()
+            result = conn.execute(query, params) if params else conn.execute(query)
+            columns = [column[0] for column in result.description]
+            return [dict(zip(columns, row)) for row in result.fetchall()]
+        except Exception as e:
+            if isinstance(e, DatabaseError):
+                raise
+            print(f"Database query execution failed: {e}")
+            raise DatabaseError(f"Query execution failed: {e}") from e
+
+    def execute_numpy(self, query, params=None) -> Dict[str, Any]:
+        """Executes a SQL query and returns each result column as a NumPy array.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (list, optional): A list of parameters to substitute into the query.
+                Defaults to None.
+
+        Returns:
+            dict: Column name to NumPy array (masked arrays for columns with NULLs).
+
+        Raises:
+            DatabaseError: If the query execution fails.
+        """
+        try:
+            conn = self.connect()
+            if params:
+                return conn.execute(query, params).fetchnumpy()
+            return conn.execute(query).fetchnumpy()
+        except Exception as e:
+            if isinstance(e, DatabaseError):
+                raise
+            print(f"Database query execution failed: {e}")
+            raise DatabaseError(f"Query execution failed: {e}") from e
+
+    def execute_arrow(self, query, params=None):
+        """Executes a SQL query and returns the results as an Arrow table.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (list, optional): A list of parameters to substitute into the query.
+                Defaults to None.
+
+        Returns:
+            pyarrow.Table: The query results, without conversion to Python objects.
+
+        Raises:
+            DatabaseError: If the query execution fails.
+        """
+        try:
+            conn = self.connect()
+            if params:
+                return conn.execute(query, params).to_arrow_table()
+            return conn.execute(query).to_arrow_table()
+        except Exception as e:
+            if isinstance(e, DatabaseError):
+                raise
+            print(f"Database query execution failed: {e}")
+            raise DatabaseError(f"Query execution failed: {e}") from e
+
+    def execute_arrow_batches(self, query, params=None, batch_size: int = 100000):
+        """Executes a SQL query and streams the results as Arrow record batches.
+
+        Batches are produced as the reader is consumed, so the full result is
+        never held in memory. The reader must be consumed before the
+        connection runs another query.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (list, optional): A list of parameters to substitute into the query.
+                Defaults to None.
+            batch_size (int, optional): Rows per record batch. Defaults to 100000.
+
+        Returns:
+            pyarrow.RecordBatchReader: Reader yielding the result batches.
+
+        Raises:
+            DatabaseError: If the query execution fails.
+        """
+        try:
+            conn = self.connect()
+            result = conn.execute(query, params) if params else conn.execute(query)
+            return result.fetch_record_batch(batch_size)
+        except Exception as e:
+            if isinstance(e, DatabaseError):
+                raise
+            print(f"Database query execution failed: {e}")
+            raise DatabaseError(f"Query execution failed: {e}") from e
+
     def close(self) -> None:
-        """Closes the database connection."""
+        """Closes the database connection.
+
+        Borrowed connections are only detached; the lender closes them.
+        """
         if self.conn:
-            self.conn.close()
+            if self._owns_connection:
+                self.conn.close()
             self.conn = None
 
 
+def setup_spatial_extension(conn: duckdb.DuckDBPyConnection) -> None:
+    """Install and load the DuckDB spatial extension for geospatial operations."""
+    try:
+
+        conn.execute("INSTALL spatial;")
+
+        conn.execute("LOAD spatial;")
+    except Exception as e:
+
+        print(f"Spatial extension setup: {e}")
+        pass
+
+
+class ConnectionManager:
+    """
+    Process-wide owner of the shared DuckDB database handle.
+
+    The database file is opened once (read-only by default) and the spatial
+    extension is loaded once. Requests borrow cursors created with
+    ``cursor()`` from a bounded pool, so threadpool workers can run queries
+    concurrently against the same database instance without paying the
+    open/extension-load cost per request.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        read_only: bool = True,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT
+    ):
+        """
+        Args:
+            db_path: Path to the DuckDB database file
+            pool_size: Maximum number of cursors lent out at the same time
+            read_only: Open the database file in read-only mode
+            acquire_timeout: Seconds to wait for a free cursor before failing
+        """
+        if pool_size < 1:
+            raise ValueError(f"pool_size must be at least 1, got {pool_size}")
+
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.read_only = read_only
+        self.acquire_timeout = acquire_timeout
+
+        self._root: Optional[duckdb.DuckDBPyConnection] = None
+        self._idle: List[duckdb.DuckDBPyConnection] = []
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    @property
+    def is_open(self) -> bool:
+        return self._root is not None
+
+    def open(self) -> None:
+        """
+        Open the shared database handle if it is not open yet.
+
+        Raises:
+            DatabaseError: If the database cannot be opened
+        """
+        with self._lock:
+            if self._root is not None:
+                return
+            try:
+                self._root = duckdb.connect(self.db_path, read_only=self.read_only)
+            except Exception as e:
+                print(f"Failed to connect to database at '{self.db_path}': {e}")
+                raise DatabaseError(f"Database connection failed: {e}") from e
+            setup_spatial_extension(self._root)
+
+    def acquire(self) -> DatabaseConnector:
+        """
+        Borrow a cursor from the pool.
+
+        Returns:
+            DatabaseConnector wrapping a pooled cursor
+
+        Raises:
+            DatabaseError: If no cursor becomes free within ``acquire_timeout``
+        """
+        if self._root is None:
+            self.open()
+
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise DatabaseError(
+                f"Timed out after {self.acquire_timeout}s waiting for a database connection"
+            )
+
+        try:
+            with self._lock:
+                if self._root is None:
+                    raise DatabaseError("Connection manager is closed")
+                cursor = self._idle.pop() if self._idle else self._root.cursor()
+                self._in_use += 1
+        except Exception as e:
+            self._slots.release()
+            if isinstance(e, DatabaseError):
+                raise
+            raise DatabaseError(f"Failed to create database cursor: {e}") from e
+
+        return DatabaseConnector(self.db_path, connection=cursor)
+
+    def release(self, db: DatabaseConnector) -> None:
+        """
+        Return a borrowed cursor to the pool.
+
+        Args:
+            db: DatabaseConnector previously returned by ``acquire()``
+        """
+        cursor = db.conn
+        db.conn = None
+
+        with self._lock:
+            self._in_use -= 1
+            if cursor is not None:
+                if self._root is not None:
+                    self._idle.append(cursor)
+                else:
+                    cursor.close()
+
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Generator[DatabaseConnector, None, None]:
+        """Context manager that borrows a cursor and always returns it."""
+        db = self.acquire()
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def health_check(self) -> Dict[str, Any]:
+        """
+        Verify the shared handle and idle cursors, replacing broken cursors.
+
+        Returns:
+            Dictionary with pool status information
+        """
+        status = {
+            "status": "healthy",
+            "db_path": self.db_path,
+            "read_only": self.read_only,
+            "pool_size": self.pool_size,
+            "in_use": 0,
+            "idle": 0,
+            "replaced_cursors": 0
+        }
+
+        with self._lock:
+            if self._root is None:
+                status["status"] = "closed"
+                return status
+
+            try:
+                self._root.execute("SELECT 1").fetchone()
+            except Exception as e:
+                status["status"] = "unhealthy"
+                status["error"] = str(e)
+                return status
+
+            healthy = []
+            for cursor in self._idle:
+                try:
+                    cursor.execute("SELECT 1").fetchone()
+                    healthy.append(cursor)
+                except Exception:
+                    status["replaced_cursors"] += 1
+                    try:
+                        cursor.close()
+                    except Exception:
+                        pass
+                    healthy.append(self._root.cursor())
+            self._idle = healthy
+
+            status["in_use"] = self._in_use
+            status["idle"] = len(self._idle)
+
+        return status
+
+    def close(self) -> None:
+        """
+        Close idle cursors and the shared handle.
+
+        Cursors still lent out are closed when they are released.
+        """
+        with self._lock:
+            for cursor in self._idle:
+                try:
+                    cursor.close()
+                except Exception as e:
+                    print(f"Failed to close database cursor: {e}")
+            self._idle = []
+
+            if self._root is not None:
+                try:
+                    self._root.close()
+                except Exception as e:
+                    print(f"Failed to close database connection: {e}")
+                self._root = None
+
+
+_connection_manager: Optional[ConnectionManager] = None
+_connection_manager_lock = threading.Lock()
+
+
+def get_connection_manager() -> ConnectionManager:
+    """Get the process-wide connection manager, creating it on first use."""
+    global _connection_manager
+    if _connection_manager is None:
+        with _connection_manager_lock:
+            if _connection_manager is None:
+                _connection_manager = ConnectionManager()
+    return _connection_manager
+
+
 def get_db() -> Generator[DatabaseConnector, None, None]:
-    db = DatabaseConnector("transit.duckdb")
+    manager = get_connection_manager()
+    db = manager.acquire()
     try:
-        db.connect()
         yield db
     finally:
-        db.close()
+        manager.release(db)
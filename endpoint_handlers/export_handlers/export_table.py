@@ -0,0 +1,30 @@
+from typing import Any, Dict, Iterator
+from utils.streaming_export import EXPORT_FORMATS, EXPORT_TABLES, stream_export
+
+
+def export_table(table: str, format: str, filters: Dict[str, Any], limit: int, offset: int = 0) -> Iterator[bytes]:
+    """
+    Export rows of a GTFS table as a stream of encoded chunks.
+
+    Rows are fetched from DuckDB in Arrow record batches and encoded one
+    batch at a time, so large exports never build the whole result in memory.
+
+    Args:
+        table: "stops", "routes", "trips" or "stop_times"
+        format: "json", "ndjson", "csv", "geojson" (stops only), "arrow"
+            (Arrow IPC stream) or "parquet"
+        filters: Filter name to value; None values are ignored
+        limit: Maximum number of rows to export
+        offset: Rows to skip, in the table's sort key order
+
+    Returns:
+        Iterator over chunks of the response body
+
+    Raises:
+        ValueError: If the format or a filter is not supported for the table
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    if format == "geojson" and "geometry" not in EXPORT_TABLES[table]:
+        raise ValueError(f"GeoJSON exports are not available for {table}")
+    return stream_export(table, format, filters, limit, offset)
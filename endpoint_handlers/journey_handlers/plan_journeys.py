@@ -0,0 +1,110 @@
+from typing import Any, Dict, List, Optional
+from fastapi import HTTPException
+from database_connector import DatabaseConnector
+from pydantic_models import Journey, JourneyLeg
+from utils.caching import cached
+from utils.connection_scan import ConnectionTimetable, TRANSIT, get_connection_timetable
+from utils.error_handling import create_stop_not_found_exception
+from utils.gtfs_time import time_to_seconds, seconds_to_time, current_service_seconds
+from utils.service_calendar import parse_service_date
+
+
+def to_journey(timetable: ConnectionTimetable, journey: Dict[str, Any]) -> Journey:
+    """Convert a planner result to the response model."""
+    legs = []
+    for leg in journey["legs"]:
+        from_stop = timetable.stops[leg["from_stop"]]
+        to_stop = timetable.stops[leg["to_stop"]]
+        fields = {
+            "mode": leg["mode"],
+            "from_stop_id": from_stop["stop_id"],
+            "from_stop_name": from_stop["stop_name"],
+            "to_stop_id": to_stop["stop_id"],
+            "to_stop_name": to_stop["stop_name"],
+            "departure_time": seconds_to_time(leg["departure_secs"]),
+            "arrival_time": seconds_to_time(leg["arrival_secs"]),
+            "duration_seconds": leg["arrival_secs"] - leg["departure_secs"],
+        }
+        if leg["mode"] == TRANSIT:
+            trip_id, route_id, route_short_name, headsign = timetable.trips[leg["trip"]]
+            fields.update(
+                trip_id=trip_id,
+                route_id=route_id,
+                route_short_name=route_short_name,
+                headsign=headsign,
+                num_stops=leg["num_stops"]
+            )
+        legs.append(JourneyLeg(**fields))
+
+    return Journey(
+        departure_time=seconds_to_time(journey["departure_secs"]),
+        arrival_time=seconds_to_time(journey["arrival_secs"]),
+        duration_seconds=journey["arrival_secs"] - journey["departure_secs"],
+        transfers=max(0, sum(1 for leg in legs if leg.mode == TRANSIT) - 1),
+        legs=legs
+    )
+
+
+@cached(ttl=60)
+def plan_journeys(
+        db: DatabaseConnector,
+        from_stop_id: str,
+        to_stop_id: str,
+        departure_time: Optional[str] = None,
+        service_date: Optional[str] = None,
+        window_minutes: int = 0,
+        max_results: int = 5
+) -> List[Journey]:
+    """
+    Plan journeys between two stops with the Connection Scan Algorithm.
+
+    With no window the single earliest-arriving journey is returned. With a
+    window, every journey departing within it that no later departure beats
+    is returned (a profile query), ordered by departure.
+
+    Args:
+        db: Database connector instance
+        from_stop_id: Origin stop or parent station
+        to_stop_id: Destination stop or parent station
+        departure_time: Earliest departure in HH:MM:SS format (defaults to now)
+        service_date: Optional service date in YYYY-MM-DD format; without it every
+            trip is treated as running daily
+        window_minutes: Length of the departure window for a profile query
+        max_results: Maximum number of journeys to return
+
+    Returns:
+        List of Journey objects, empty if the destination cannot be reached
+    """
+    try:
+        timetable = get_connection_timetable(db)
+
+        sources = timetable.resolve_stop(from_stop_id)
+        if not sources:
+            raise create_stop_not_found_exception(from_stop_id, "from_stop_id")
+        targets = timetable.resolve_stop(to_stop_id)
+        if not targets:
+            raise create_stop_not_found_exception(to_stop_id, "to_stop_id")
+        if set(sources) & set(targets):
+            raise HTTPException(status_code=400, detail="Origin and destination must be different stops")
+
+        date = parse_service_date(service_date) if service_date else None
+        start_secs = time_to_seconds(departure_time) if departure_time else current_service_seconds()
+
+        if window_minutes <= 0:
+            journey = timetable.earliest_arrival(sources, targets, start_secs, date)
+            return [to_journey(timetable, journey)] if journey else []
+
+        journeys = []
+        options = timetable.profile(sources, targets, start_secs, start_secs + window_minutes * 60, date)
+        for departure_secs, _ in options[:max_results]:
+            journey = timetable.earliest_arrival(sources, targets, departure_secs, date)
+            if journey:
+                journeys.append(to_journey(timetable, journey))
+        return journeys
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error planning journey: {str(e)}")
@@ -0,0 +1,71 @@
+from typing import List, Optional
+from fastapi import HTTPException
+from database_connector import DatabaseConnector
+from pydantic_models import Journey
+from utils.caching import cached
+from utils.error_handling import create_stop_not_found_exception
+from utils.gtfs_time import time_to_seconds, current_service_seconds
+from utils.raptor import DEFAULT_MAX_TRANSFERS, get_raptor_timetable
+from utils.service_calendar import parse_service_date
+from endpoint_handlers.journey_handlers.plan_journeys import to_journey
+
+
+@cached(ttl=60)
+def plan_pareto_journeys(
+        db: DatabaseConnector,
+        from_stop_id: str,
+        to_stop_id: str,
+        departure_time: Optional[str] = None,
+        service_date: Optional[str] = None,
+        window_minutes: int = 0,
+        max_transfers: int = DEFAULT_MAX_TRANSFERS
+) -> List[Journey]:
+    """
+    Plan arrival time x transfers trade-off journeys between two stops with RAPTOR.
+
+    With no window every journey leaving at the departure time that arrives
+    earlier than all options with fewer transfers is returned. With a window,
+    journeys departing within it are compared on departure, arrival and
+    transfers together (range RAPTOR).
+
+    Args:
+        db: Database connector instance
+        from_stop_id: Origin stop or parent station
+        to_stop_id: Destination stop or parent station
+        departure_time: Earliest departure in HH:MM:SS format (defaults to now)
+        service_date: Optional service date in YYYY-MM-DD format; without it every
+            trip is treated as running daily
+        window_minutes: Length of the departure window for a range query
+        max_transfers: Most changes between trips in a journey
+
+    Returns:
+        List of Journey objects ordered by departure and then transfers, empty if
+        the destination cannot be reached
+    """
+    try:
+        timetable = get_raptor_timetable(db)
+
+        sources = timetable.resolve_stop(from_stop_id)
+        if not sources:
+            raise create_stop_not_found_exception(from_stop_id, "from_stop_id")
+        targets = timetable.resolve_stop(to_stop_id)
+        if not targets:
+            raise create_stop_not_found_exception(to_stop_id, "to_stop_id")
+        if set(sources) & set(targets):
+            raise HTTPException(status_code=400, detail="Origin and destination must be different stops")
+
+        date = parse_service_date(service_date) if service_date else None
+        start_secs = time_to_seconds(departure_time) if departure_time else current_service_seconds()
+
+        if window_minutes <= 0:
+            journeys = timetable.query(sources, targets, start_secs, date, max_transfers)
+        else:
+            journeys = timetable.range_query(sources, targets, start_secs, start_secs + window_minutes * 60, date, max_transfers)
+        return [to_journey(timetable, journey) for journey in journeys]
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error planning journey: {str(e)}")
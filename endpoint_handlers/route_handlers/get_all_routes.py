@@ -1,12 +1,15 @@
-from typing import List
+from typing import List, Union
+
+import pyarrow as pa
 
 from database_connector import DatabaseConnector
 from pydantic_models import RouteBasic
 from utils.caching import cached
+from utils.result_mapping import fetch_models
 
 
 @cached(ttl=600)
-def get_all_routes(db: DatabaseConnector, limit: int = 100, offset: int = 0) -> List[RouteBasic]:
+def get_all_routes(db: DatabaseConnector, limit: int = 100, offset: int = 0, format: str = "json") -> Union[List[RouteBasic], pa.Table]:
     """
     Get a list of all available routes with basic information.
 
@@ -14,42 +17,25 @@ def get_all_routes(db: DatabaseConnector, limit: int = 100, offset: int = 0) ->
         db: Database connector instance
         limit: Maximum number of routes to return
         offset: Number of routes to skip
+        format: "json" for response models, or "arrow"/"parquet" for the
+            query result as an Arrow table
 
     Returns:
-        List of RouteBasic objects
+        List of RouteBasic objects, or an Arrow table with the same columns
     """
     query = """
             SELECT
                 route_id,
-                route_short_name,
-                route_long_name,
+                COALESCE(route_short_name, '') as route_short_name,
+                COALESCE(route_long_name, '') as route_long_name,
                 COALESCE(route_color, 'FFFFFF') as route_color,
                 COALESCE(route_text_color, '000000') as route_text_color,
-                route_type
+                COALESCE(route_type, 3) as route_type
             FROM routes
-            ORDER BY route_short_name, route_long_name
+            ORDER BY routes.route_short_name, routes.route_long_name
                 LIMIT ? OFFSET ? \
             """
 
-    df = db.execute_df(query, [limit, offset])
-
-    routes = []
-    for _, row in df.iterrows():
-        route_type = 3
-        if row.get('route_type') and str(row['route_type']).strip():
-            try:
-                route_type = int(row['route_type'])
-            except (ValueError, TypeError):
-                route_type = 3
-
-        route = RouteBasic(
-            route_id=row['route_id'],
-            route_short_name=row['route_short_name'],
-            route_long_name=row['route_long_name'],
-            route_color=row['route_color'],
-            route_text_color=row['route_text_color'],
-            route_type=route_type
-        )
-        routes.append(route)
-
-    return routes
\ No newline at end of file
+    if format != "json":
+        return db.execute_arrow(query, [limit, offset])
+    return fetch_models(db, RouteBasic, query, [limit, offset])
@@ -4,6 +4,7 @@ from database_connector import DatabaseConnector
 from endpoint_handlers.route_handlers.get_route_stops import get_route_stops
 from pydantic_models import RouteDetail
 from utils.caching import cached
+from utils.result_mapping import fetch_model
 
 
 @cached(ttl=600)
@@ -22,42 +23,21 @@ def get_route_by_id(db: DatabaseConnector, route_id: str) -> Optional[RouteDetai
     route_query = """
                   SELECT
                       route_id,
-                      route_short_name,
-                      route_long_name,
+                      COALESCE(route_short_name, '') as route_short_name,
+                      COALESCE(route_long_name, '') as route_long_name,
                       route_desc,
                       COALESCE(route_color, 'FFFFFF') as route_color,
                       COALESCE(route_text_color, '000000') as route_text_color,
-                      route_type
+                      COALESCE(route_type, 3) as route_type
                   FROM routes
                   WHERE route_id = ? \
                   """
 
-    route_df = db.execute_df(route_query, [route_id])
+    route = fetch_model(db, RouteDetail, route_query, [route_id])
 
-    if route_df.empty:
+    if route is None:
         return None
 
-    route_row = route_df.iloc[0]
+    route.stops = get_route_stops(db, route_id)
 
-    route_type = 3
-    if route_row.get('route_type') and str(route_row['route_type']).strip():
-        try:
-            route_type = int(route_row['route_type'])
-        except (ValueError, TypeError):
-            route_type = 3
-
-    
-    stops = get_route_stops(db, route_id)
-
-    route_detail = RouteDetail(
-        route_id=route_row['route_id'],
-        route_short_name=route_row['route_short_name'],
-        route_long_name=route_row['route_long_name'],
-        route_color=route_row['route_color'],
-        route_text_color=route_row['route_text_color'],
-        route_type=route_type,
-        route_desc=route_row.get('route_desc'),
-        stops=stops,
-    )
-
-    return route_detail
\ No newline at end of file
+    return route
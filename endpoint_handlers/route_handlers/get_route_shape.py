@@ -1,40 +1,130 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional, Union
 from database_connector import DatabaseConnector
-from pydantic_models import GeoJSONResponse
+from pydantic_models import EncodedShape, EncodedShapeResponse, GeoJSONResponse
 from utils.caching import cached
+from utils.shape_geometry import (
+    POLYLINE_PRECISION, SHAPE_TOLERANCES_METERS, pack_binary_shapes, select_tier, zoom_tolerance
+)
 
-@cached(ttl=1800)  
-def get_route_shape(db: DatabaseConnector, route_id: str) -> Optional[GeoJSONResponse]:
+# Tier columns read for each output format
+FORMAT_COLUMNS = {
+    "geojson": "lats, lons",
+    "polyline": "polyline",
+    "binary": "coordinates_f32",
+}
+
+
+def shape_tier(db: DatabaseConnector, shape_id: str, tolerance: Optional[float], zoom: Optional[int]) -> int:
+    """
+    Tier to serve for a tolerance in meters or a map zoom level (full resolution for neither).
+
+    Zoom levels are converted to the ground size of a pixel at the latitude
+    of ``shape_id``.
+    """
+    if tolerance is not None:
+        return select_tier(tolerance)
+    if zoom is not None:
+        latitude = db.execute("""
+            SELECT lats[1] FROM shape_tiers WHERE shape_id = ? AND tier = ?
+            """, [shape_id, len(SHAPE_TOLERANCES_METERS) - 1])
+        return select_tier(zoom_tolerance(zoom, latitude[0][0] if latitude else 0.0))
+    return 0
+
+
+def fetch_shape_tiers(db: DatabaseConnector, shape_ids: List[str], tier: int, format: str) -> List[Dict[str, Any]]:
+    """Stored tier rows for ``shape_ids`` in that order, with the columns ``format`` needs."""
+    query = f"""
+            SELECT shape_id, tolerance_meters, point_count, {FORMAT_COLUMNS[format]}
+            FROM shape_tiers
+            WHERE list_contains(?, shape_id)
+              AND tier = ? \
+            """
+    tiers = {row["shape_id"]: row for row in db.execute_records(query, [shape_ids, tier])}
+    return [tiers[shape_id] for shape_id in shape_ids if shape_id in tiers]
+
+
+def encode_shapes(
+        shapes: List[Dict[str, Any]],
+        format: str,
+        covers: Dict[str, List[str]],
+        route_id: Optional[str] = None,
+        trip_id: Optional[str] = None
+) -> Union[EncodedShapeResponse, bytes]:
+    """Build a polyline or binary response from stored tier rows; the encodings are copied as stored."""
+    if format == "binary":
+        return pack_binary_shapes([(row["shape_id"], row["point_count"], row["coordinates_f32"]) for row in shapes])
+
+    return EncodedShapeResponse(
+        route_id=route_id,
+        trip_id=trip_id,
+        precision=POLYLINE_PRECISION,
+        shapes=[
+            EncodedShape(
+                shape_id=row["shape_id"],
+                covers=covers.get(row["shape_id"], []),
+                tolerance_meters=row["tolerance_meters"],
+                point_count=row["point_count"],
+                polyline=row["polyline"]
+            )
+            for row in shapes
+        ]
+    )
+
+
+@cached(ttl=1800)
+def get_route_shape(
+        db: DatabaseConnector,
+        route_id: str,
+        tolerance: Optional[float] = None,
+        zoom: Optional[int] = None,
+        format: str = "geojson"
+) -> Optional[Union[GeoJSONResponse, EncodedShapeResponse, bytes]]:
     """
     Get the geometric shape/path for a specific route.
 
+    Geometry comes from the simplification tiers precomputed at import, and
+    shapes lying along a longer shape of the route are folded into it (listed
+    in its ``covers`` property). Without ``tolerance`` or ``zoom`` shapes are
+    returned at full resolution.
+
     Args:
         db: Database connector instance
         route_id: Unique identifier for the route
+        tolerance: Largest acceptable deviation from the true shape in meters
+        zoom: Web map zoom level; selects the tier that stays within a pixel
+        format: "geojson", "polyline" (Google encoded polylines) or "binary"
+            (float32 coordinates framed by ``pack_binary_shapes``)
 
     Returns:
-        GeoJSONResponse with route shape or None if not found
+        GeoJSONResponse, EncodedShapeResponse or binary body with the route
+        shape, or None if not found
     """
-    query = """
-            SELECT DISTINCT
-                t.shape_id,
-                LIST(STRUCT_PACK(
-                        lat := CAST(s.shape_pt_lat AS DOUBLE),
-                        lon := CAST(s.shape_pt_lon AS DOUBLE)
-                     ) ORDER BY s.shape_pt_sequence) as coordinates
-            FROM trips t
-                     JOIN shapes s ON t.shape_id = s.shape_id
-            WHERE t.route_id = ?
-              AND t.shape_id IS NOT NULL
-            GROUP BY t.shape_id \
-            """
+    route_shapes = db.execute_records("""
+            SELECT shape_id, covered_by
+            FROM route_shapes
+            WHERE route_id = ?
+            ORDER BY trip_count DESC, shape_id
+            """, [route_id])
 
-    df = db.execute_df(query, [route_id])
+    if not route_shapes:
+        return None
+
+    tier = shape_tier(db, route_shapes[0]["shape_id"], tolerance, zoom)
+
+    covers = {}
+    for row in route_shapes:
+        if row["covered_by"] is not None:
+            covers.setdefault(row["covered_by"], []).append(row["shape_id"])
+    drawn = [row["shape_id"] for row in route_shapes if row["covered_by"] is None]
 
-    if df.empty:
+    shapes = fetch_shape_tiers(db, drawn, tier, format)
+
+    if not shapes:
         return None
 
-    
+    if format != "geojson":
+        return encode_shapes(shapes, format, covers, route_id=route_id)
+
     route_info_query = """
                        SELECT
                            route_id,
@@ -46,16 +136,16 @@ def get_route_shape(db: DatabaseConnector, route_id: str) -> Optional[GeoJSONRes
                        WHERE route_id = ? \
                        """
 
-    route_df = db.execute_df(route_info_query, [route_id])
+    route_rows = db.execute_records(route_info_query, [route_id])
 
-    if route_df.empty:
+    if not route_rows:
         return None
 
-    route_info = route_df.iloc[0]
+    route_info = route_rows[0]
 
     features = []
-    for _, row in df.iterrows():
-        coords = [[c['lon'], c['lat']] for c in row['coordinates']]
+    for row in shapes:
+        coords = [[lon, lat] for lat, lon in zip(row['lats'], row['lons'])]
         feature = {
             "type": "Feature",
             "properties": {
@@ -64,7 +154,10 @@ def get_route_shape(db: DatabaseConnector, route_id: str) -> Optional[GeoJSONRes
                 "route_long_name": route_info['route_long_name'],
                 "route_color": f"#{route_info['route_color']}",
                 "route_text_color": f"#{route_info['route_text_color']}",
-                "shape_id": row['shape_id']
+                "shape_id": row['shape_id'],
+                "covers": covers.get(row['shape_id'], []),
+                "tolerance_meters": row['tolerance_meters'],
+                "point_count": row['point_count']
             },
             "geometry": {
                 "type": "LineString",
@@ -73,4 +166,4 @@ def get_route_shape(db: DatabaseConnector, route_id: str) -> Optional[GeoJSONRes
         }
         features.append(feature)
 
-    return GeoJSONResponse(features=features)
\ No newline at end of file
+    return GeoJSONResponse(features=features)
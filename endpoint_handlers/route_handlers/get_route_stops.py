@@ -1,61 +1,59 @@
-from typing import List
+from typing import List, Optional, Union
+
+import pyarrow as pa
 
 from database_connector import DatabaseConnector
 from pydantic_models import Stop
 from utils.caching import cached
+from utils.result_mapping import fetch_models
 
 
 @cached(ttl=600)
-def get_route_stops(db: DatabaseConnector, route_id: str) -> List[Stop]:
+def get_route_stops(
+        db: DatabaseConnector,
+        route_id: str,
+        direction_id: Optional[int] = None,
+        format: str = "json"
+) -> Union[List[Stop], pa.Table]:
     """
     Get all stops served by a specific route.
 
+    Reads the ``route_stops`` table precomputed by the loader, which holds each
+    direction's canonical stop order with branch and short-turn stops merged in.
+
     Args:
         db: Database connector instance
         route_id: Unique identifier for the route
+        direction_id: Optional direction (0 or 1); without it, stops of every
+            direction are returned once, in the order they are first served
+        format: "json" for response models, or "arrow"/"parquet" for the
+            query result as an Arrow table
 
     Returns:
-        List of Stop objects in route order
+        List of Stop objects in route order, or an Arrow table with the same columns
     """
     query = """
-            SELECT DISTINCT
+            SELECT
                 s.stop_id,
                 s.stop_name,
                 s.stop_lat,
                 s.stop_lon,
-                s.location_type,
-                MIN(st.stop_sequence) as min_sequence
-            FROM stops s
-                     JOIN stop_times st ON s.stop_id = st.stop_id
-                     JOIN trips t ON st.trip_id = t.trip_id
-            WHERE t.route_id = ?
-            GROUP BY s.stop_id, s.stop_name, s.stop_lat, s.stop_lon, s.location_type
-            ORDER BY min_sequence \
+                COALESCE(s.location_type, 0) as location_type,
+                COALESCE(s.wheelchair_boarding, 0) as wheelchair_boarding,
+                s.platform_code,
+                s.stop_desc,
+                s.zone_id
+            FROM route_stops rs
+                     JOIN stops s ON rs.stop_id = s.stop_id
+            WHERE rs.route_id = ?
+              AND (? IS NULL OR rs.direction_id = ?)
+            QUALIFY row_number() OVER (
+                PARTITION BY rs.stop_id ORDER BY rs.direction_id NULLS FIRST, rs.stop_order
+            ) = 1
+            ORDER BY rs.direction_id NULLS FIRST, rs.stop_order \
             """
 
-    df = db.execute_df(query, [route_id])
-
-    stops = []
-    for _, row in df.iterrows():
-        
-        location_type = 0
-        if row.get('location_type') and str(row['location_type']).strip():
-            try:
-                location_type = int(row['location_type'])
-            except (ValueError, TypeError):
-                location_type = 0
-
-        stop = Stop(
-            stop_id=row['stop_id'],
-            stop_name=row['stop_name'],
-            stop_lat=float(row['stop_lat']),
-            stop_lon=float(row['stop_lon']),
-            location_type=location_type,
-            wheelchair_boarding=0,  
-            platform_code=None,    
-            stop_desc=None,        
-            zone_id=None          
-        )
-        stops.append(stop)
-
-    return stops
\ No newline at end of file
+    params = [route_id, direction_id, direction_id]
+    if format != "json":
+        return db.execute_arrow(query, params)
+    return fetch_models(db, Stop, query, params)
@@ -1,23 +1,39 @@
-from typing import Optional, List
+from typing import Optional, List, Union
+
+import pyarrow as pa
 
 from database_connector import DatabaseConnector
 from pydantic_models import Trip
 from utils.caching import cached
+from utils.result_mapping import fetch_models
+from utils.service_calendar import get_service_calendar, parse_service_date
 
 
 @cached(ttl=300)
-def get_route_trips(db: DatabaseConnector, route_id: str, service_date: Optional[str] = None, limit: int = 100) -> List[Trip]:
+def get_route_trips(
+        db: DatabaseConnector,
+        route_id: str,
+        service_date: Optional[str] = None,
+        limit: int = 100,
+        format: str = "json"
+) -> Union[List[Trip], pa.Table]:
     """
     Get all trips for a specific route.
 
     Args:
         db: Database connector instance
         route_id: Unique identifier for the route
-        service_date: Optional service date filter in YYYY-MM-DD format (not used without calendar table)
+        service_date: Optional service date in YYYY-MM-DD format; only trips whose
+            service runs on that date are returned
         limit: Maximum number of trips to return
+        format: "json" for response models, or "arrow"/"parquet" for the
+            query result as an Arrow table
 
     Returns:
-        List of Trip objects
+        List of Trip objects, or an Arrow table with the same columns
+
+    Raises:
+        ValueError: If the service date is invalid
     """
     query = """
             SELECT
@@ -28,32 +44,18 @@ def get_route_trips(db: DatabaseConnector, route_id: str, service_date: Optional
                 direction_id,
                 shape_id
             FROM trips
-            WHERE route_id = ?
-            ORDER BY trip_headsign, direction_id
-                LIMIT ? \
+            WHERE route_id = ? \
             """
-    params = [route_id, limit]
-
-    df = db.execute_df(query, params)
-
-    trips = []
-    for _, row in df.iterrows():
-        
-        direction_id = None
-        if row.get('direction_id') and str(row['direction_id']).strip():
-            try:
-                direction_id = int(row['direction_id'])
-            except (ValueError, TypeError):
-                direction_id = None
-
-        trip = Trip(
-            trip_id=row['trip_id'],
-            route_id=row['route_id'],
-            service_id=row['service_id'],
-            trip_headsign=row.get('trip_headsign'),
-            direction_id=direction_id,
-            shape_id=row.get('shape_id')
-        )
-        trips.append(trip)
-
-    return trips
\ No newline at end of file
+    params = [route_id]
+
+    if service_date:
+        active_service_ids = get_service_calendar(db).active_service_ids(parse_service_date(service_date))
+        query += " AND list_contains(?, service_id)"
+        params.append(active_service_ids)
+
+    query += " ORDER BY trip_headsign, direction_id LIMIT ?"
+    params.append(limit)
+
+    if format != "json":
+        return db.execute_arrow(query, params)
+    return fetch_models(db, Trip, query, params)
@@ -1,20 +1,24 @@
 from typing import List
 
+from fastapi import HTTPException
+
 from database_connector import DatabaseConnector
 from pydantic_models import Stop
 from utils.caching import cached
 from utils.error_handling import error_handler
+from utils.stop_search_index import get_stop_search_index
 
 
-@cached(ttl=300)  
+@cached(ttl=300, text_args=('query_text',))
 def search_stops_handler(db: DatabaseConnector, query_text: str, limit: int) -> List[Stop]:
     """
     Search stops by name using fuzzy search capabilities.
 
-    Uses LIKE pattern matching and similarity scoring to find relevant stops.
+    Uses the in-memory stop search index: exact, prefix and substring matches
+    rank first, followed by typo-tolerant trigram matches. Platforms named
+    like their parent station are returned once, as the station.
     """
     try:
-        
         from utils.validation import validate_search_query
         query_text = validate_search_query(query_text, min_length=1, max_length=100)
 
@@ -25,60 +29,10 @@ def search_stops_handler(db: DatabaseConnector, query_text: str, limit: int) ->
                 constraint="must be between 1 and 1000"
             )
 
-        
-        search_pattern = f"%{query_text.lower()}%"
-
-        query = """
-                WITH scored_stops AS (
-                    SELECT
-                        stop_id,
-                        stop_name,
-                        CAST(stop_lat AS DOUBLE) as stop_lat,
-                        CAST(stop_lon AS DOUBLE) as stop_lon,
-                        COALESCE(CAST(location_type AS INTEGER), 0) as location_type,
-                        -- Simple relevance scoring based on position of match
-                        CASE
-                            WHEN LOWER(stop_name) = LOWER(?) THEN 100  -- Exact match
-                            WHEN LOWER(stop_name) LIKE LOWER(?) THEN 90  -- Starts with query
-                            WHEN LOWER(stop_name) LIKE ? THEN 80  -- Contains query
-                            ELSE 50  -- Partial match
-                            END as relevance_score
-                    FROM stops
-                    WHERE LOWER(stop_name) LIKE ?
-                )
-                SELECT *
-                FROM scored_stops
-                ORDER BY relevance_score DESC, stop_name
-                    LIMIT ? \
-                """
-
-        params = [
-            query_text,  
-            f"{query_text.lower()}%",  
-            search_pattern,  
-            search_pattern,  
-            limit
-        ]
-
-        df = db.execute_df(query, params)
-
-        stops = []
-        for _, row in df.iterrows():
-            stop = Stop(
-                stop_id=row['stop_id'],
-                stop_name=row['stop_name'],
-                stop_lat=row['stop_lat'],
-                stop_lon=row['stop_lon'],
-                location_type=row['location_type'],  
-                wheelchair_boarding=0,
-                platform_code=None,
-                stop_desc=None,
-                zone_id=None
-            )
-            stops.append(stop)
-
-        return stops
+        return get_stop_search_index(db).search(query_text, limit)
 
+    except HTTPException:
+        raise
     except ValueError as e:
         if "search query" in str(e).lower():
             error_handler.handle_validation_error("q", query_text, str(e))
@@ -1,7 +1,9 @@
+from fastapi import HTTPException
 from database_connector import DatabaseConnector
 from pydantic_models import Stop
 from utils.caching import cached
 from utils.error_handling import error_handler
+from utils.result_mapping import fetch_model
 from utils.validation import validate_gtfs_id
 
 @cached(ttl=600)
@@ -18,31 +20,22 @@ def get_stop_by_id_handler(db: DatabaseConnector, stop_id: str) -> Stop:
                 SELECT
                     stop_id,
                     stop_name,
-                    CAST(stop_lat AS DOUBLE) as stop_lat,
-                    CAST(stop_lon AS DOUBLE) as stop_lon,
-                    COALESCE(CAST(location_type AS INTEGER), 0) as location_type
+                    stop_lat,
+                    stop_lon,
+                    COALESCE(location_type, 0) as location_type
                 FROM stops
                 WHERE stop_id = ? \
                 """
 
-        df = db.execute_df(query, [stop_id])
+        stop = fetch_model(db, Stop, query, [stop_id])
 
-        if df.empty:
+        if stop is None:
             error_handler.handle_not_found("stop", stop_id)
 
-        row = df.iloc[0]
-        return Stop(
-            stop_id=row['stop_id'],
-            stop_name=row['stop_name'],
-            stop_lat=row['stop_lat'],
-            stop_lon=row['stop_lon'],
-            location_type=row['location_type'],  
-            wheelchair_boarding=0,  
-            platform_code=None,
-            stop_desc=None,
-            zone_id=None
-        )
+        return stop
 
+    except HTTPException:
+        raise
     except ValueError as e:
         error_handler.handle_validation_error("stop_id", stop_id, str(e))
     except Exception as e:
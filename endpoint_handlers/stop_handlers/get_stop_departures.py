@@ -1,9 +1,16 @@
-from typing import List
+from typing import List, Optional
 from fastapi import HTTPException
 from database_connector import DatabaseConnector
 from pydantic_models import StopDeparture
-from datetime import datetime, timedelta
 from utils.caching import cached
+from utils.departure_board import get_departure_board
+from utils.gtfs_time import current_service_seconds
+from utils.service_calendar import parse_service_date
+
+
+def stop_exists(db: DatabaseConnector, stop_id: str) -> bool:
+    """Check the stops table for stops that have no scheduled departures."""
+    return bool(db.execute("SELECT 1 FROM stops WHERE stop_id = ? LIMIT 1", [stop_id]))
 
 
 @cached(ttl=60)
@@ -11,19 +18,21 @@ def get_stop_departures_handler(
         db: DatabaseConnector,
         stop_id: str,
         limit: int,
-        time_window_hours: int
+        time_window_hours: int,
+        service_date: Optional[str] = None
 ) -> List[StopDeparture]:
     """
     Get upcoming departures from a specific stop.
 
     Returns next departures sorted chronologically within the specified time window.
-    Uses actual departure times from the stop_times table.
+    The window may run past midnight; departures from the previous service day
+    with times past 24:00:00 are included. With a service date, only trips
+    whose service runs on that date are returned.
     """
     try:
-        stop_check_query = "SELECT COUNT(*) as count FROM stops WHERE stop_id = ?"
-        stop_count = db.execute_df(stop_check_query, [stop_id])
+        board = get_departure_board(db)
 
-        if stop_count.iloc[0]['count'] == 0:
+        if not board.has_stop(stop_id) and not stop_exists(db, stop_id):
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -39,48 +48,15 @@ def get_stop_departures_handler(
                 }
             )
 
-        current_time = datetime.now()
-        start_time = current_time.strftime("%H:%M:%S")
-        end_time = (current_time + timedelta(hours=time_window_hours)).strftime("%H:%M:%S")
-
-        if time_window_hours > 24 - current_time.hour:
-            end_time = "23:59:59"
-
-        query = """
-                SELECT
-                    t.trip_id,
-                    t.route_id,
-                    r.route_short_name,
-                    r.route_long_name,
-                    t.trip_headsign,
-                    st.departure_time,
-                    st.stop_sequence
-                FROM stop_times st
-                         JOIN trips t ON st.trip_id = t.trip_id
-                         JOIN routes r ON t.route_id = r.route_id
-                WHERE st.stop_id = ?
-                  AND st.departure_time BETWEEN ? AND ?
-                ORDER BY st.departure_time, st.stop_sequence
-                    LIMIT ? \
-                """
-
-        df = db.execute_df(query, [stop_id, start_time, end_time, limit])
-
-        departures = []
-        for _, row in df.iterrows():
-            departure = StopDeparture(
-                trip_id=row['trip_id'],
-                route_id=row['route_id'],
-                route_short_name=row['route_short_name'] or '',
-                route_long_name=row['route_long_name'] or '',
-                headsign=row.get('trip_headsign'),
-                departure_time=row['departure_time'],
-            )
-            departures.append(departure)
+        date = parse_service_date(service_date) if service_date else None
+        start_secs = current_service_seconds()
+        end_secs = start_secs + time_window_hours * 3600
 
-        return departures
+        return board.stop_departures(stop_id, start_secs, end_secs, limit, date)
 
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving stop departures: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,211 @@
+import math
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from database_connector import DatabaseConnector
+from pydantic_models import GeoJSONResponse
+from utils.caching import cached
+from utils.connection_scan import ConnectionTimetable, get_connection_timetable
+from utils.geospatial import miles_to_degrees
+from utils.gtfs_time import time_to_seconds, seconds_to_time, current_service_seconds
+from utils.service_calendar import parse_service_date
+from utils.spatial_index import get_stop_spatial_index
+from utils.transfer_graph import DEFAULT_FOOTPATH_MILES, METERS_PER_MILE, WALK_SPEED_MPS
+
+
+MAX_ISOCHRONE_MINUTES = 120
+
+# Departures are rounded down to this many seconds so that nearby requests
+# share one cached search
+DEPARTURE_BUCKET_SECONDS = 300
+
+# Vertices of the walking circle drawn around each reached stop
+CIRCLE_POINTS = 12
+
+
+def departure_bucket(departure_time: Optional[str]) -> int:
+    """Start of the departure bucket holding ``departure_time`` (defaults to now)."""
+    secs = time_to_seconds(departure_time) if departure_time else current_service_seconds()
+    return secs - secs % DEPARTURE_BUCKET_SECONDS
+
+
+@cached(ttl=300)
+def _stop_arrival_times(db: DatabaseConnector, stop_id: str, bucket_secs: int, service_date: Optional[str]) -> Dict[int, int]:
+    """Arrival seconds by stop position from a stop, for the longest isochrone."""
+    timetable = get_connection_timetable(db)
+    sources = timetable.resolve_stop(stop_id)
+    if not sources:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": {
+                    "code": "STOP_NOT_FOUND",
+                    "message": f"Stop with ID '{stop_id}' not found",
+                    "details": {
+                        "field": "stop_id",
+                        "value": stop_id,
+                        "constraint": "must be a valid stop identifier"
+                    }
+                }
+            }
+        )
+    date = parse_service_date(service_date) if service_date else None
+    return timetable.arrival_times({source: bucket_secs for source in sources}, date, MAX_ISOCHRONE_MINUTES * 60)
+
+
+@cached(ttl=300)
+def _point_arrival_times(db: DatabaseConnector, lat: float, lon: float, bucket_secs: int, service_date: Optional[str]) -> Dict[int, int]:
+    """Arrival seconds by stop position from a point, walking to the stops around it."""
+    timetable = get_connection_timetable(db)
+    # Timetable stop positions are stop spatial index positions
+    positions, distances = get_stop_spatial_index(db).within_radius(lat, lon, DEFAULT_FOOTPATH_MILES)
+    starts = {
+        int(position): bucket_secs + int(round(miles * METERS_PER_MILE / WALK_SPEED_MPS))
+        for position, miles in zip(positions.tolist(), distances.tolist())
+    }
+    date = parse_service_date(service_date) if service_date else None
+    return timetable.arrival_times(starts, date, MAX_ISOCHRONE_MINUTES * 60)
+
+
+def _walk_circle(lat: float, lon: float, walk_secs: int) -> List[List[float]]:
+    """
+    Closed (lon, lat) ring around the area walkable from a point in ``walk_secs``.
+
+    The radius is capped at the footpath radius; the ring is empty when no
+    walking time is left.
+    """
+    miles = min(walk_secs * WALK_SPEED_MPS / METERS_PER_MILE, DEFAULT_FOOTPATH_MILES)
+    if miles <= 0:
+        return []
+    lat_radius = miles / 69.0
+    lon_radius = miles_to_degrees(miles, lat)
+    ring = [
+        [lon + lon_radius * math.cos(2 * math.pi * i / CIRCLE_POINTS), lat + lat_radius * math.sin(2 * math.pi * i / CIRCLE_POINTS)]
+        for i in range(CIRCLE_POINTS)
+    ]
+    return ring + ring[:1]
+
+
+def to_isochrone(
+        timetable: ConnectionTimetable,
+        arrivals: Dict[int, int],
+        bucket_secs: int,
+        minutes: int,
+        origin: Optional[Tuple[float, float]] = None
+) -> GeoJSONResponse:
+    """
+    Build the isochrone feature collection.
+
+    The first feature is the area reachable within ``minutes``: a
+    MultiPolygon with one walking circle per reached stop (and the origin
+    point), sized by the walk possible in the time left. It is followed by
+    one point feature per reached stop, soonest first.
+
+    Args:
+        timetable: Connection timetable the arrivals were computed on
+        arrivals: Arrival seconds by stop position
+        bucket_secs: Departure time the arrivals were computed from
+        minutes: Travel time budget
+        origin: Optional (lat, lon) of an origin point, walkable in the whole budget
+    """
+    budget = minutes * 60
+    reached = sorted(
+        (secs - bucket_secs, position) for position, secs in arrivals.items() if secs - bucket_secs <= budget
+    )
+
+    circles: List[List[List[float]]] = []
+    if origin is not None:
+        circles.append(_walk_circle(origin[0], origin[1], budget))
+    stop_features = []
+    for travel_secs, position in reached:
+        stop = timetable.stops[position]
+        circles.append(_walk_circle(stop["stop_lat"], stop["stop_lon"], budget - travel_secs))
+        stop_features.append({
+            "type": "Feature",
+            "properties": {
+                "stop_id": stop["stop_id"],
+                "stop_name": stop["stop_name"],
+                "travel_seconds": travel_secs,
+                "arrival_time": seconds_to_time(bucket_secs + travel_secs)
+            },
+            "geometry": {
+                "type": "Point",
+                "coordinates": [stop["stop_lon"], stop["stop_lat"]]
+            }
+        })
+
+    polygon = {
+        "type": "Feature",
+        "properties": {
+            "minutes": minutes,
+            "departure_time": seconds_to_time(bucket_secs),
+            "stop_count": len(stop_features)
+        },
+        "geometry": {
+            "type": "MultiPolygon",
+            "coordinates": [[circle] for circle in circles if circle]
+        }
+    }
+    return GeoJSONResponse(features=[polygon] + stop_features)
+
+
+def get_stop_isochrone_handler(
+        db: DatabaseConnector,
+        stop_id: str,
+        minutes: int,
+        departure_time: Optional[str] = None,
+        service_date: Optional[str] = None
+) -> GeoJSONResponse:
+    """
+    Get the area and stops reachable from a stop within a travel time.
+
+    One one-to-all Connection Scan search is run per origin and departure
+    bucket, for the longest supported budget, and cached; every ``minutes``
+    value is then cut from the same arrival times.
+
+    Args:
+        db: Database connector instance
+        stop_id: Origin stop or parent station
+        minutes: Travel time budget in minutes
+        departure_time: Departure in HH:MM:SS format (defaults to now), rounded
+            down to the departure bucket
+        service_date: Optional service date in YYYY-MM-DD format
+
+    Returns:
+        GeoJSONResponse with the isochrone polygon and the reached stops
+    """
+    try:
+        bucket_secs = departure_bucket(departure_time)
+        arrivals = _stop_arrival_times(db, stop_id, bucket_secs, service_date)
+        return to_isochrone(get_connection_timetable(db), arrivals, bucket_secs, minutes)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing isochrone: {str(e)}")
+
+
+def get_point_isochrone_handler(
+        db: DatabaseConnector,
+        lat: float,
+        lon: float,
+        minutes: int,
+        departure_time: Optional[str] = None,
+        service_date: Optional[str] = None
+) -> GeoJSONResponse:
+    """
+    Get the area and stops reachable from a point within a travel time.
+
+    Stops within walking distance of the point are the origins of the search;
+    otherwise this behaves as ``get_stop_isochrone_handler``.
+    """
+    try:
+        bucket_secs = departure_bucket(departure_time)
+        arrivals = _point_arrival_times(db, lat, lon, bucket_secs, service_date)
+        return to_isochrone(get_connection_timetable(db), arrivals, bucket_secs, minutes, (lat, lon))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing isochrone: {str(e)}")
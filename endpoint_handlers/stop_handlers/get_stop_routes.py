@@ -5,6 +5,7 @@ from fastapi import HTTPException
 from database_connector import DatabaseConnector
 from pydantic_models import RouteBasic
 from utils.caching import cached
+from utils.stop_route_index import get_stop_route_index
 
 
 @cached(ttl=600)  
@@ -15,10 +16,9 @@ def get_stop_routes_handler(db: DatabaseConnector, stop_id: str) -> List[RouteBa
     Returns basic route information for all routes stopping at this location.
     """
     try:
-        stop_check_query = "SELECT COUNT(*) as count FROM stops WHERE stop_id = ?"
-        stop_count = db.execute_df(stop_check_query, [stop_id])
+        index = get_stop_route_index(db)
 
-        if stop_count.iloc[0]['count'] == 0:
+        if not index.has_stop(stop_id):
             raise HTTPException(
                 status_code=404,
                 detail={
@@ -34,36 +34,7 @@ def get_stop_routes_handler(db: DatabaseConnector, stop_id: str) -> List[RouteBa
                 }
             )
 
-        query = """
-                SELECT DISTINCT
-                    r.route_id,
-                    r.route_short_name,
-                    r.route_long_name,
-                    r.route_color,
-                    r.route_text_color,
-                    COALESCE(CAST(r.route_type AS INTEGER), 3) as route_type
-                FROM routes r
-                         JOIN trips t ON r.route_id = t.route_id
-                         JOIN stop_times st ON t.trip_id = st.trip_id
-                WHERE st.stop_id = ?
-                ORDER BY r.route_short_name, r.route_long_name \
-                """
-
-        df = db.execute_df(query, [stop_id])
-
-        routes = []
-        for _, row in df.iterrows():
-            route = RouteBasic(
-                route_id=row['route_id'],
-                route_short_name=row['route_short_name'] or '',
-                route_long_name=row['route_long_name'] or '',
-                route_color=row['route_color'] or 'FFFFFF',
-                route_text_color=row['route_text_color'] or '000000',
-                route_type=row['route_type']
-            )
-            routes.append(route)
-
-        return routes
+        return index.routes_for_stop(stop_id)
 
     except HTTPException:
         raise
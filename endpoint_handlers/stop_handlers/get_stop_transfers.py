@@ -0,0 +1,51 @@
+from typing import List
+
+from fastapi import HTTPException
+
+from database_connector import DatabaseConnector
+from pydantic_models import StopTransfer
+from utils.caching import cached
+from utils.spatial_index import get_stop_spatial_index
+from utils.transfer_graph import get_transfer_graph
+
+
+@cached(ttl=600)
+def get_stop_transfers_handler(db: DatabaseConnector, stop_id: str) -> List[StopTransfer]:
+    """
+    Get the stops reachable on foot from a specific stop.
+
+    Reads the precomputed transfer graph, so the stops come back quickest
+    first with their walking (or ``transfers.txt`` minimum) times.
+    """
+    try:
+        spatial_index = get_stop_spatial_index(db)
+
+        if spatial_index.get_stop(stop_id) is None:
+            raise HTTPException(
+                status_code=404,
+                detail={
+                    "error": {
+                        "code": "STOP_NOT_FOUND",
+                        "message": f"Stop with ID '{stop_id}' not found",
+                        "details": {
+                            "field": "stop_id",
+                            "value": stop_id,
+                            "constraint": "must be a valid stop identifier"
+                        }
+                    }
+                }
+            )
+
+        return [
+            StopTransfer(
+                **spatial_index.records[spatial_index.positions[to_stop_id]],
+                distance_miles=round(miles, 4),
+                walk_seconds=walk_secs
+            )
+            for to_stop_id, walk_secs, miles in get_transfer_graph(db).transfers_from(stop_id)
+        ]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving stop transfers: {str(e)}")
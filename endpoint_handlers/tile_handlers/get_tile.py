@@ -0,0 +1,28 @@
+from database_connector import DatabaseConnector
+from utils.vector_tiles import MAX_TILE_ZOOM, get_vector_tile_source
+
+
+def get_tile(db: DatabaseConnector, z: int, x: int, y: int) -> bytes:
+    """
+    Get a Mapbox Vector Tile with the stops and route lines in tile ``z/x/y``.
+
+    Encoded tiles are kept in the tile source's LRU, so repeated requests
+    for a tile skip clipping and encoding.
+
+    Args:
+        db: Database connector instance
+        z: Zoom level
+        x: Tile column
+        y: Tile row, counted from the north
+
+    Returns:
+        Encoded tile; empty when nothing falls in the tile
+
+    Raises:
+        ValueError: If the tile coordinates are outside the zoom level
+    """
+    if not 0 <= z <= MAX_TILE_ZOOM:
+        raise ValueError(f"Zoom must be between 0 and {MAX_TILE_ZOOM}")
+    if not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise ValueError(f"Tile {x}/{y} is outside zoom level {z}")
+    return get_vector_tile_source(db).tile(z, x, y)
@@ -1,6 +1,7 @@
 from typing import Optional
 from database_connector import DatabaseConnector
 from pydantic_models import Trip
+from utils.result_mapping import fetch_model
 
 
 def get_trip_by_id(db: DatabaseConnector, trip_id: str) -> Optional[Trip]:
@@ -26,28 +27,4 @@ def get_trip_by_id(db: DatabaseConnector, trip_id: str) -> Optional[Trip]:
             WHERE trip_id = ? \
             """
 
-    df = db.execute_df(query, [trip_id])
-
-    if df.empty:
-        return None
-
-    row = df.iloc[0]
-
-    
-    direction_id = None
-    if row.get('direction_id') and str(row['direction_id']).strip():
-        try:
-            direction_id = int(row['direction_id'])
-        except (ValueError, TypeError):
-            direction_id = None
-
-    trip = Trip(
-        trip_id=row['trip_id'],
-        route_id=row['route_id'],
-        service_id=row['service_id'],
-        trip_headsign=row.get('trip_headsign'),
-        direction_id=direction_id,
-        shape_id=row.get('shape_id')
-    )
-
-    return trip
\ No newline at end of file
+    return fetch_model(db, Trip, query, [trip_id])
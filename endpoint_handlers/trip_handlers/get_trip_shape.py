@@ -0,0 +1,64 @@
+from typing import Optional, Union
+from database_connector import DatabaseConnector
+from pydantic_models import EncodedShapeResponse, GeoJSONResponse
+from utils.caching import cached
+from endpoint_handlers.route_handlers.get_route_shape import encode_shapes, fetch_shape_tiers, shape_tier
+
+
+@cached(ttl=1800)
+def get_trip_shape(
+        db: DatabaseConnector,
+        trip_id: str,
+        tolerance: Optional[float] = None,
+        zoom: Optional[int] = None,
+        format: str = "geojson"
+) -> Optional[Union[GeoJSONResponse, EncodedShapeResponse, bytes]]:
+    """
+    Get the path travelled by a specific trip.
+
+    Args:
+        db: Database connector instance
+        trip_id: Unique identifier for the trip
+        tolerance: Largest acceptable deviation from the true shape in meters
+        zoom: Web map zoom level; selects the tier that stays within a pixel
+        format: "geojson", "polyline" or "binary", as for route shapes
+
+    Returns:
+        The trip's shape in the requested format, or None if the trip has no shape
+    """
+    trips = db.execute_records("""
+            SELECT trip_id, route_id, trip_headsign, direction_id, shape_id
+            FROM trips
+            WHERE trip_id = ? AND shape_id IS NOT NULL \
+            """, [trip_id])
+
+    if not trips:
+        return None
+
+    trip = trips[0]
+    tier = shape_tier(db, trip["shape_id"], tolerance, zoom)
+    shapes = fetch_shape_tiers(db, [trip["shape_id"]], tier, format)
+
+    if not shapes:
+        return None
+
+    if format != "geojson":
+        return encode_shapes(shapes, format, {}, route_id=trip["route_id"], trip_id=trip_id)
+
+    shape = shapes[0]
+    return GeoJSONResponse(features=[{
+        "type": "Feature",
+        "properties": {
+            "trip_id": trip["trip_id"],
+            "route_id": trip["route_id"],
+            "trip_headsign": trip["trip_headsign"],
+            "direction_id": trip["direction_id"],
+            "shape_id": shape["shape_id"],
+            "tolerance_meters": shape["tolerance_meters"],
+            "point_count": shape["point_count"]
+        },
+        "geometry": {
+            "type": "LineString",
+            "coordinates": [[lon, lat] for lat, lon in zip(shape["lats"], shape["lons"])]
+        }
+    }])
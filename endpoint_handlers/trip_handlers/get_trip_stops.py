@@ -1,18 +1,23 @@
 
-from typing import List
+from typing import List, Union
+import pyarrow as pa
 from database_connector import DatabaseConnector
 from pydantic_models import TripStop
+from utils.result_mapping import fetch_models
 
-def get_trip_stops(db: DatabaseConnector, trip_id: str) -> List[TripStop]:
+def get_trip_stops(db: DatabaseConnector, trip_id: str, format: str = "json") -> Union[List[TripStop], pa.Table]:
     """
     Get the complete stop sequence for a specific trip.
 
     Args:
         db: Database connector instance
         trip_id: Unique identifier for the trip
+        format: "json" for response models, or "arrow"/"parquet" for the
+            query result as an Arrow table
 
     Returns:
-        List of TripStop objects ordered by stop sequence
+        List of TripStop objects ordered by stop sequence, or an Arrow table
+        with the same columns
     """
     query = """
             SELECT
@@ -27,17 +32,6 @@ def get_trip_stops(db: DatabaseConnector, trip_id: str) -> List[TripStop]:
             ORDER BY st.stop_sequence \
             """
 
-    df = db.execute_df(query, [trip_id])
-
-    trip_stops = []
-    for _, row in df.iterrows():
-        trip_stop = TripStop(
-            stop_id=row['stop_id'],
-            stop_name=row['stop_name'],
-            arrival_time=row['arrival_time'],
-            departure_time=row['departure_time'],
-            stop_sequence=int(row['stop_sequence'])
-        )
-        trip_stops.append(trip_stop)
-
-    return trip_stops
\ No newline at end of file
+    if format != "json":
+        return db.execute_arrow(query, [trip_id])
+    return fetch_models(db, TripStop, query, [trip_id])
@@ -1,6 +1,9 @@
 from typing import List, Optional
 from database_connector import DatabaseConnector
 from pydantic_models import Trip
+from utils.gtfs_time import time_to_seconds
+from utils.service_calendar import parse_service_date
+from utils.trip_span_index import get_trip_span_index
 import re
 
 
@@ -9,7 +12,8 @@ def get_trips_by_time_range(
         start_time: str,
         end_time: str,
         route_id: Optional[str] = None,
-        limit: int = 100
+        limit: int = 100,
+        service_date: Optional[str] = None
 ) -> List[Trip]:
     """
     Get trips that operate within a specific time range.
@@ -17,65 +21,22 @@ def get_trips_by_time_range(
     Args:
         db: Database connector instance
         start_time: Start time in HH:MM:SS format
-        end_time: End time in HH:MM:SS format
+        end_time: End time in HH:MM:SS format; an end before the start wraps past midnight
         route_id: Optional filter by route ID
         limit: Maximum number of trips to return
+        service_date: Optional service date in YYYY-MM-DD format; only trips
+            running on that date are returned
 
     Returns:
-        List of Trip objects that have departures within the time range
+        List of Trip objects in service at some point within the time range,
+        ordered by when each trip is first in service within it
     """
     
     time_pattern = r'^\d{1,2}:\d{2}:\d{2}$'
     if not re.match(time_pattern, start_time) or not re.match(time_pattern, end_time):
         raise ValueError("Time must be in HH:MM:SS format")
+    date = parse_service_date(service_date) if service_date else None
 
-    query = """
-            SELECT DISTINCT
-                t.trip_id,
-                t.route_id,
-                t.service_id,
-                t.trip_headsign,
-                t.direction_id,
-                t.shape_id,
-                MIN(st.departure_time) as first_departure
-            FROM trips t
-                     JOIN stop_times st ON t.trip_id = st.trip_id
-            WHERE st.departure_time BETWEEN ? AND ? \
-            """
-
-    params = [start_time, end_time]
-
-    if route_id:
-        query += " AND t.route_id = ?"
-        params.append(route_id)
-
-    query += """
-    GROUP BY t.trip_id, t.route_id, t.service_id, t.trip_headsign, t.direction_id, t.shape_id
-    ORDER BY first_departure
-    LIMIT ?
-    """
-    params.append(limit)
-
-    df = db.execute_df(query, params)
-
-    trips = []
-    for _, row in df.iterrows():
-        
-        direction_id = None
-        if row.get('direction_id') and str(row['direction_id']).strip():
-            try:
-                direction_id = int(row['direction_id'])
-            except (ValueError, TypeError):
-                direction_id = None
-
-        trip = Trip(
-            trip_id=row['trip_id'],
-            route_id=row['route_id'],
-            service_id=row['service_id'],
-            trip_headsign=row.get('trip_headsign'),
-            direction_id=direction_id,
-            shape_id=row.get('shape_id')
-        )
-        trips.append(trip)
-
-    return trips
\ No newline at end of file
+    index = get_trip_span_index(db)
+    positions = index.overlapping(time_to_seconds(start_time), time_to_seconds(end_time), route_id, date)
+    return index.to_trips(positions, limit)
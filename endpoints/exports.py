@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Query, HTTPException, Path, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from endpoint_handlers.export_handlers.export_table import export_table
+from utils.caching import get_cache_headers
+from utils.columnar_formats import negotiate_format
+from utils.resource_limits import get_endpoint_category, get_export_limit, validate_export_request
+from utils.streaming_export import EXPORT_MEDIA_TYPES
+
+export_routes = APIRouter(prefix="/export")
+
+@export_routes.get("/{table}")
+async def export_table_endpoint(
+    request: Request,
+    table: str = Path(..., description="Table to export", regex=r'^(stops|routes|trips|stop_times)$'),
+    format: Optional[str] = Query(None, description="Export format: json, ndjson, csv, geojson (stops only), arrow (Arrow IPC stream) or parquet; defaults to ndjson unless the Accept header asks for Arrow or Parquet", regex=r'^(json|ndjson|csv|geojson|arrow|parquet)$'),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of rows (defaults to the table's bulk export limit)"),
+    offset: int = Query(0, ge=0, description="Rows to skip, in primary key order"),
+    route_id: Optional[str] = Query(None, description="Filter trips or stop_times by route"),
+    trip_id: Optional[str] = Query(None, description="Filter stop_times by trip"),
+    stop_id: Optional[str] = Query(None, description="Filter stop_times by stop"),
+    service_id: Optional[str] = Query(None, description="Filter trips by service"),
+    parent_station: Optional[str] = Query(None, description="Filter stops by parent station"),
+    route_type: Optional[int] = Query(None, description="Filter routes by route type")
+):
+    """
+    Stream a GTFS table as JSON, NDJSON, CSV, GeoJSON, Arrow IPC or Parquet.
+    
+    Rows are read in Arrow record batches and encoded as they arrive, so
+    memory use stays flat regardless of export size.
+    Resource limits: the table's bulk export limit per request; use offset
+    to page through larger tables.
+    """
+    
+    format = format or negotiate_format(None, request.headers.get("accept")) or "ndjson"
+    limit = limit or get_export_limit(get_endpoint_category(request.url.path))
+    await validate_export_request(request, limit=limit, format_type=format)
+    
+    filters = {
+        "route_id": route_id,
+        "trip_id": trip_id,
+        "stop_id": stop_id,
+        "service_id": service_id,
+        "parent_station": parent_station,
+        "route_type": route_type
+    }
+    try:
+        chunks = export_table(table, format, filters, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    headers = {
+        **get_cache_headers(300),
+        "Content-Disposition": f'attachment; filename="{table}.{format}"'
+    }
+    return StreamingResponse(chunks, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,59 @@
+from fastapi import APIRouter, Query, Depends, Response
+from typing import List, Optional
+from database_connector import get_db, DatabaseConnector
+from endpoint_handlers.journey_handlers.plan_journeys import plan_journeys
+from endpoint_handlers.journey_handlers.plan_pareto_journeys import plan_pareto_journeys
+from pydantic_models import Journey
+from utils.caching import get_cache_headers
+from utils.raptor import DEFAULT_MAX_TRANSFERS, MAX_TRANSFERS
+
+journey_routes = APIRouter(prefix="/journeys")
+
+@journey_routes.get("/", response_model=List[Journey])
+def get_journeys(
+    response: Response,
+    from_stop_id: str = Query(..., description="Origin stop or parent station ID"),
+    to_stop_id: str = Query(..., description="Destination stop or parent station ID"),
+    departure_time: Optional[str] = Query(None, description="Earliest departure in HH:MM:SS format (defaults to now)", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    service_date: Optional[str] = Query(None, description="Only use trips running on this service date (YYYY-MM-DD)"),
+    window_minutes: int = Query(0, ge=0, le=180, description="Return every best journey departing within this many minutes instead of only the earliest arrival"),
+    max_results: int = Query(5, ge=1, le=20, description="Maximum number of journeys to return"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Plan journeys between two stops.
+    
+    Uses the Connection Scan Algorithm over the scheduled timetable, with
+    walking transfers between nearby stops.
+    """
+    
+    cache_headers = get_cache_headers(60)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    return plan_journeys(db, from_stop_id, to_stop_id, departure_time, service_date, window_minutes, max_results)
+
+
+@journey_routes.get("/pareto", response_model=List[Journey])
+def get_pareto_journeys(
+    response: Response,
+    from_stop_id: str = Query(..., description="Origin stop or parent station ID"),
+    to_stop_id: str = Query(..., description="Destination stop or parent station ID"),
+    departure_time: Optional[str] = Query(None, description="Earliest departure in HH:MM:SS format (defaults to now)", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    service_date: Optional[str] = Query(None, description="Only use trips running on this service date (YYYY-MM-DD)"),
+    window_minutes: int = Query(0, ge=0, le=180, description="Compare journeys departing within this many minutes instead of at the departure time only"),
+    max_transfers: int = Query(DEFAULT_MAX_TRANSFERS, ge=0, le=MAX_TRANSFERS, description="Maximum number of transfers between trips"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Plan journeys trading off arrival time against the number of transfers.
+    
+    Uses RAPTOR over the route patterns, returning each journey that no other
+    option beats on departure, arrival and transfers together.
+    """
+    
+    cache_headers = get_cache_headers(60)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    return plan_pareto_journeys(db, from_stop_id, to_stop_id, departure_time, service_date, window_minutes, max_transfers)
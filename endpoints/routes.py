@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from database_connector import get_db, DatabaseConnector
 from endpoint_handlers.route_handlers.get_nearby_routes import get_nearby_routes
@@ -12,32 +12,38 @@ from endpoint_handlers.route_handlers.get_route_stops import get_route_stops
 from endpoint_handlers.route_handlers.get_route_trips import get_route_trips
 
 from endpoint_handlers.route_handlers.get_route_shape import get_route_shape
-from pydantic_models import RouteBasic, RouteDetail, Stop, Trip
+from pydantic_models import RouteBasic, RouteDetail, NearbyRoute, Stop, Trip
 from utils.caching import get_cache_headers
+from utils.columnar_formats import columnar_response, negotiate_format
+from utils.shape_geometry import BINARY_MEDIA_TYPE
 
 route_routes = APIRouter(prefix="/routes")
 
-@route_routes.get("/nearby")
+@route_routes.get("/nearby", response_model=List[NearbyRoute])
 def get_nearby(
     response: Response,
-    lat: float = Query(..., description="Latitude"),
-    lon: float = Query(..., description="Longitude"),
-    radius_miles: float = Query(0.5, description="Search radius in miles"),
+    lat: float = Query(..., description="Latitude", ge=-90, le=90),
+    lon: float = Query(..., description="Longitude", ge=-180, le=180),
+    radius_miles: float = Query(0.5, description="Search radius in miles", gt=0, le=10),
+    limit: int = Query(20, description="Maximum number of routes to return", ge=1, le=100),
     db: DatabaseConnector = Depends(get_db)
 ):
+    """Find routes whose shapes pass within a specified radius of a point."""
     
     cache_headers = get_cache_headers(300)  
     for key, value in cache_headers.items():
         response.headers[key] = value
     
-    return get_nearby_routes(db, lat, lon, radius_miles)
+    return get_nearby_routes(db, lat, lon, radius_miles, limit)
 
 @route_routes.get("/", response_model=List[RouteBasic])
 def list_routes(
+    request: Request,
     response: Response,
     db: DatabaseConnector = Depends(get_db),
     limit: int = Query(100, ge=1, le=1000, description="Maximum number of routes to return"),
-    offset: int = Query(0, ge=0, description="Number of routes to skip")
+    offset: int = Query(0, ge=0, description="Number of routes to skip"),
+    format: Optional[str] = Query(None, description="Response format: json, arrow (Arrow IPC stream) or parquet; also negotiable with the Accept header", regex=r'^(json|arrow|parquet)$')
 ):
     """Get a list of all available routes."""
     
@@ -45,7 +51,11 @@ def list_routes(
     for key, value in cache_headers.items():
         response.headers[key] = value
     
-    return get_all_routes(db, limit, offset)
+    columnar = negotiate_format(format, request.headers.get("accept"))
+    routes = get_all_routes(db, limit, offset, columnar or "json")
+    if columnar:
+        return columnar_response(routes, columnar, cache_headers)
+    return routes
 
 @route_routes.get("/{route_id}", response_model=RouteDetail)
 def get_route(
@@ -66,31 +76,39 @@ def get_route(
 
 @route_routes.get("/{route_id}/stops", response_model=List[Stop])
 def get_route_stops_endpoint(
+    request: Request,
     response: Response,
     route_id: str,
+    direction_id: Optional[int] = Query(None, ge=0, le=1, description="Only return stops served in this direction"),
+    format: Optional[str] = Query(None, description="Response format: json, arrow (Arrow IPC stream) or parquet; also negotiable with the Accept header", regex=r'^(json|arrow|parquet)$'),
     db: DatabaseConnector = Depends(get_db)
 ):
-    """Get all stops served by a specific route."""
+    """Get all stops served by a specific route, in route order."""
     
     cache_headers = get_cache_headers(600)  
     for key, value in cache_headers.items():
         response.headers[key] = value
     
-    stops = get_route_stops(db, route_id)
+    columnar = negotiate_format(format, request.headers.get("accept"))
+    stops = get_route_stops(db, route_id, direction_id, columnar or "json")
     if not stops:
         
         route = get_route_by_id(db, route_id)
         if not route:
             raise HTTPException(status_code=404, detail=f"Route {route_id} not found")
+    if columnar:
+        return columnar_response(stops, columnar, cache_headers)
     return stops
 
 @route_routes.get("/{route_id}/trips", response_model=List[Trip])
 def get_route_trips_endpoint(
+    request: Request,
     response: Response,
     route_id: str,
     db: DatabaseConnector = Depends(get_db),
     service_date: Optional[str] = Query(None, description="Service date in YYYY-MM-DD format"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of trips to return")
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of trips to return"),
+    format: Optional[str] = Query(None, description="Response format: json, arrow (Arrow IPC stream) or parquet; also negotiable with the Accept header", regex=r'^(json|arrow|parquet)$')
 ):
     """Get all trips for a specific route."""
     
@@ -98,18 +116,27 @@ def get_route_trips_endpoint(
     for key, value in cache_headers.items():
         response.headers[key] = value
     
-    trips = get_route_trips(db, route_id, service_date, limit)
+    columnar = negotiate_format(format, request.headers.get("accept"))
+    try:
+        trips = get_route_trips(db, route_id, service_date, limit, columnar or "json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not trips:
         
         route = get_route_by_id(db, route_id)
         if not route:
             raise HTTPException(status_code=404, detail=f"Route {route_id} not found")
+    if columnar:
+        return columnar_response(trips, columnar, cache_headers)
     return trips
 
 @route_routes.get("/{route_id}/shape")
 def get_route_shape_endpoint(
     response: Response,
     route_id: str,
+    tolerance: Optional[float] = Query(None, ge=0, description="Largest acceptable deviation from the true shape in meters; selects a simplified geometry tier"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom level; selects the geometry tier accurate to about one pixel (ignored when tolerance is given)"),
+    format: str = Query("geojson", description="Output format: geojson, polyline (Google encoded polylines) or binary (float32 coordinates)", regex=r'^(geojson|polyline|binary)$'),
     db: DatabaseConnector = Depends(get_db)
 ):
     """Get the geometric shape/path for a specific route."""
@@ -118,13 +145,15 @@ def get_route_shape_endpoint(
     for key, value in cache_headers.items():
         response.headers[key] = value
     
-    shape = get_route_shape(db, route_id)
+    shape = get_route_shape(db, route_id, tolerance, zoom, format)
     if not shape:
         
         route = get_route_by_id(db, route_id)
         if not route:
             raise HTTPException(status_code=404, detail=f"Route {route_id} not found")
         raise HTTPException(status_code=404, detail=f"No shape data found for route {route_id}")
+    if isinstance(shape, bytes):
+        return Response(content=shape, media_type=BINARY_MEDIA_TYPE, headers=cache_headers)
     return shape
 
 
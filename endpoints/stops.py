@@ -9,11 +9,17 @@ from endpoint_handlers.stop_handlers.fuzzy_search_stops import search_stops_hand
 
 from endpoint_handlers.stop_handlers.get_stop_routes import get_stop_routes_handler
 
+from endpoint_handlers.stop_handlers.get_stop_transfers import get_stop_transfers_handler
+
 from endpoint_handlers.stop_handlers.get_stop_departures import get_stop_departures_handler
 from endpoint_handlers.trip_handlers.get_trip_by_time import get_stop_departures_by_time
 
+from endpoint_handlers.stop_handlers.get_stop_isochrone import (
+    MAX_ISOCHRONE_MINUTES, get_stop_isochrone_handler, get_point_isochrone_handler
+)
+
 from pydantic_models import (
-    Stop, StopDeparture,
+    Stop, StopDeparture, StopWithDistance, StopTransfer,
     GeoJSONResponse, RouteBasic
 )
 from utils.caching import get_cache_headers
@@ -23,7 +29,7 @@ from utils.resource_limits import ResourceLimitValidator
 
 stop_routes = APIRouter(prefix="/stops")
 
-@stop_routes.get("/nearby", response_model=List[Stop])
+@stop_routes.get("/nearby", response_model=List[StopWithDistance])
 @ResourceLimitValidator.validate_export_limits(max_size=100)
 async def get_nearby_stops(
     request: Request,
@@ -54,24 +60,6 @@ async def get_nearby_stops(
     
     return get_nearby_stops_handler(db, lat, lon, radius_miles, limit)
 
-@stop_routes.get("/{stop_id}", response_model=Stop)
-def get_stop_by_id(
-    response: Response,
-    stop_id: str = Path(..., description="Unique identifier for the stop"),
-    db: DatabaseConnector = Depends(get_db)
-):
-    """
-    Get detailed information for a specific stop by ID.
-    
-    Returns complete stop information including location and accessibility features.
-    """
-    
-    cache_headers = get_cache_headers(600)  
-    for key, value in cache_headers.items():
-        response.headers[key] = value
-    
-    return get_stop_by_id_handler(db, stop_id)
-
 @stop_routes.get("/search", response_model=List[Stop])
 @ResourceLimitValidator.validate_export_limits(max_size=500)
 async def search_stops(
@@ -101,6 +89,48 @@ async def search_stops(
     
     return search_stops_handler(db, q, limit)
 
+@stop_routes.get("/isochrone", response_model=GeoJSONResponse)
+def get_point_isochrone(
+    response: Response,
+    lat: float = Query(..., description="Latitude", ge=-90, le=90),
+    lon: float = Query(..., description="Longitude", ge=-180, le=180),
+    minutes: int = Query(30, description="Travel time budget in minutes", ge=1, le=MAX_ISOCHRONE_MINUTES),
+    departure_time: Optional[str] = Query(None, description="Departure in HH:MM:SS format (defaults to now, rounded down to 5 minutes)", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    service_date: Optional[str] = Query(None, description="Only use trips running on this service date (YYYY-MM-DD)"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Get the area reachable from a point within a travel time.
+    
+    Returns a GeoJSON MultiPolygon of walking circles followed by the
+    reachable stops with their travel times, walking to the stops near the
+    point first.
+    """
+    
+    cache_headers = get_cache_headers(300)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    return get_point_isochrone_handler(db, lat, lon, minutes, departure_time, service_date)
+
+@stop_routes.get("/{stop_id}", response_model=Stop)
+def get_stop_by_id(
+    response: Response,
+    stop_id: str = Path(..., description="Unique identifier for the stop"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Get detailed information for a specific stop by ID.
+    
+    Returns complete stop information including location and accessibility features.
+    """
+    
+    cache_headers = get_cache_headers(600)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    return get_stop_by_id_handler(db, stop_id)
+
 @stop_routes.get("/{stop_id}/routes", response_model=List[RouteBasic])
 def get_stop_routes(
     response: Response,
@@ -119,6 +149,24 @@ def get_stop_routes(
     
     return get_stop_routes_handler(db, stop_id)
 
+@stop_routes.get("/{stop_id}/transfers", response_model=List[StopTransfer])
+def get_stop_transfers(
+    response: Response,
+    stop_id: str = Path(..., description="Unique identifier for the stop"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Get the stops within walking distance of a specific stop.
+    
+    Returns the walking transfers used by journey planning, quickest first.
+    """
+    
+    cache_headers = get_cache_headers(600)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    return get_stop_transfers_handler(db, stop_id)
+
 @stop_routes.get("/{stop_id}/departures", response_model=List[StopDeparture])
 @ResourceLimitValidator.validate_time_windows()
 async def get_stop_departures(
@@ -129,6 +177,7 @@ async def get_stop_departures(
     time_window_hours: int = Query(2, description="Time window in hours from now", ge=1, le=24),
     start_time: Optional[str] = Query(None, description="Start time in HH:MM:SS format (overrides current time)", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
     end_time: Optional[str] = Query(None, description="End time in HH:MM:SS format (overrides time_window_hours)", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    service_date: Optional[str] = Query(None, description="Only include departures of trips running on this service date (YYYY-MM-DD)"),
     db: DatabaseConnector = Depends(get_db)
 ):
     """
@@ -145,9 +194,31 @@ async def get_stop_departures(
     
     if start_time or end_time:
         try:
-            return get_stop_departures_by_time(db, stop_id, start_time, end_time, limit)
+            return get_stop_departures_by_time(db, stop_id, start_time, end_time, limit, service_date)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
     else:
         
-        return get_stop_departures_handler(db, stop_id, limit, time_window_hours)
+        return get_stop_departures_handler(db, stop_id, limit, time_window_hours, service_date)
+
+@stop_routes.get("/{stop_id}/isochrone", response_model=GeoJSONResponse)
+def get_stop_isochrone(
+    response: Response,
+    stop_id: str = Path(..., description="Unique identifier for the stop"),
+    minutes: int = Query(30, description="Travel time budget in minutes", ge=1, le=MAX_ISOCHRONE_MINUTES),
+    departure_time: Optional[str] = Query(None, description="Departure in HH:MM:SS format (defaults to now, rounded down to 5 minutes)", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    service_date: Optional[str] = Query(None, description="Only use trips running on this service date (YYYY-MM-DD)"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Get the area reachable from a stop within a travel time.
+    
+    Returns a GeoJSON MultiPolygon of walking circles followed by the
+    reachable stops with their travel times.
+    """
+    
+    cache_headers = get_cache_headers(300)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    return get_stop_isochrone_handler(db, stop_id, minutes, departure_time, service_date)
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Depends, Response
+from database_connector import get_db, DatabaseConnector
+from endpoint_handlers.tile_handlers.get_tile import get_tile
+from utils.caching import get_cache_headers
+from utils.vector_tiles import MVT_MEDIA_TYPE
+
+tile_routes = APIRouter(prefix="/tiles")
+
+@tile_routes.get("/{z}/{x}/{y}.mvt")
+def get_tile_endpoint(
+    z: int,
+    x: int,
+    y: int,
+    db: DatabaseConnector = Depends(get_db)
+):
+    """
+    Get a Mapbox Vector Tile of stops and route shapes.
+    
+    The ``routes`` layer holds the route lines at the simplification tier
+    suited to the zoom level; the ``stops`` layer is included from zoom 12.
+    """
+    try:
+        tile = get_tile(db, z, x, y)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=get_cache_headers(3600))
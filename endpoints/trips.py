@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
 from typing import List, Optional
 from database_connector import get_db, DatabaseConnector
 from endpoint_handlers.trip_handlers.get_trip_by_id import get_trip_by_id
@@ -10,10 +10,45 @@ from endpoint_handlers.trip_handlers.get_active_trips import get_active_trips
 from endpoint_handlers.trip_handlers.get_trips_by_time_range import get_trips_by_time_range
 
 from endpoint_handlers.trip_handlers.get_trip_by_time import get_stop_departures_by_time
+
+from endpoint_handlers.trip_handlers.get_trip_shape import get_trip_shape
 from pydantic_models import Trip, TripStop, StopDeparture
+from utils.caching import get_cache_headers
+from utils.columnar_formats import columnar_response, negotiate_format
+from utils.shape_geometry import BINARY_MEDIA_TYPE
 
 trip_routes = APIRouter(prefix="/trips")
 
+@trip_routes.get("/active", response_model=List[Trip])
+def get_active_trips_endpoint(
+    db: DatabaseConnector = Depends(get_db),
+    route_id: Optional[str] = Query(None, description="Filter by route ID"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of trips to return"),
+    service_date: Optional[str] = Query(None, description="Only include trips running on this service date (YYYY-MM-DD)")
+):
+    """Get currently active trips (simplified implementation without real-time data)."""
+    try:
+        trips = get_active_trips(db, route_id, limit, service_date)
+        return trips
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@trip_routes.get("/by-time", response_model=List[Trip])
+def get_trips_by_time_endpoint(
+    start_time: str = Query(..., description="Start time in HH:MM:SS format", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    end_time: str = Query(..., description="End time in HH:MM:SS format", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
+    route_id: Optional[str] = Query(None, description="Filter by route ID"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of trips to return"),
+    service_date: Optional[str] = Query(None, description="Only include trips running on this service date (YYYY-MM-DD)"),
+    db: DatabaseConnector = Depends(get_db)
+):
+    """Get trips that operate within a specific time range."""
+    try:
+        trips = get_trips_by_time_range(db, start_time, end_time, route_id, limit, service_date)
+        return trips
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @trip_routes.get("/{trip_id}", response_model=Trip)
 def get_trip(
     trip_id: str,
@@ -27,43 +62,55 @@ def get_trip(
 
 @trip_routes.get("/{trip_id}/stops", response_model=List[TripStop])
 def get_trip_stops_endpoint(
+    request: Request,
+    response: Response,
     trip_id: str,
+    format: Optional[str] = Query(None, description="Response format: json, arrow (Arrow IPC stream) or parquet; also negotiable with the Accept header", regex=r'^(json|arrow|parquet)$'),
     db: DatabaseConnector = Depends(get_db)
 ):
     """Get the complete stop sequence for a specific trip."""
-    stops = get_trip_stops(db, trip_id)
+    
+    cache_headers = get_cache_headers(600)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    columnar = negotiate_format(format, request.headers.get("accept"))
+    stops = get_trip_stops(db, trip_id, columnar or "json")
     if not stops:
         
         trip = get_trip_by_id(db, trip_id)
         if not trip:
             raise HTTPException(status_code=404, detail=f"Trip {trip_id} not found")
         raise HTTPException(status_code=404, detail=f"No stops found for trip {trip_id}")
+    if columnar:
+        return columnar_response(stops, columnar, cache_headers)
     return stops
 
-@trip_routes.get("/active", response_model=List[Trip])
-def get_active_trips_endpoint(
-    db: DatabaseConnector = Depends(get_db),
-    route_id: Optional[str] = Query(None, description="Filter by route ID"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of trips to return")
-):
-    """Get currently active trips (simplified implementation without real-time data)."""
-    trips = get_active_trips(db, route_id, limit)
-    return trips
-
-@trip_routes.get("/by-time", response_model=List[Trip])
-def get_trips_by_time_endpoint(
-    start_time: str = Query(..., description="Start time in HH:MM:SS format", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
-    end_time: str = Query(..., description="End time in HH:MM:SS format", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
-    route_id: Optional[str] = Query(None, description="Filter by route ID"),
-    limit: int = Query(100, ge=1, le=1000, description="Maximum number of trips to return"),
+@trip_routes.get("/{trip_id}/shape")
+def get_trip_shape_endpoint(
+    response: Response,
+    trip_id: str,
+    tolerance: Optional[float] = Query(None, ge=0, description="Largest acceptable deviation from the true shape in meters; selects a simplified geometry tier"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom level; selects the geometry tier accurate to about one pixel (ignored when tolerance is given)"),
+    format: str = Query("geojson", description="Output format: geojson, polyline (Google encoded polylines) or binary (float32 coordinates)", regex=r'^(geojson|polyline|binary)$'),
     db: DatabaseConnector = Depends(get_db)
 ):
-    """Get trips that operate within a specific time range."""
-    try:
-        trips = get_trips_by_time_range(db, start_time, end_time, route_id, limit)
-        return trips
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    """Get the path travelled by a specific trip."""
+    
+    cache_headers = get_cache_headers(1800)  
+    for key, value in cache_headers.items():
+        response.headers[key] = value
+    
+    shape = get_trip_shape(db, trip_id, tolerance, zoom, format)
+    if not shape:
+        
+        trip = get_trip_by_id(db, trip_id)
+        if not trip:
+            raise HTTPException(status_code=404, detail=f"Trip {trip_id} not found")
+        raise HTTPException(status_code=404, detail=f"No shape data found for trip {trip_id}")
+    if isinstance(shape, bytes):
+        return Response(content=shape, media_type=BINARY_MEDIA_TYPE, headers=cache_headers)
+    return shape
 
 @trip_routes.get("/departures/{stop_id}", response_model=List[StopDeparture])
 def get_stop_departures_by_time_endpoint(
@@ -71,11 +118,12 @@ def get_stop_departures_by_time_endpoint(
     start_time: Optional[str] = Query(None, description="Start time in HH:MM:SS format", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
     end_time: Optional[str] = Query(None, description="End time in HH:MM:SS format", regex=r'^\d{1,2}:\d{2}:\d{2}$'),
     limit: int = Query(20, ge=1, le=100, description="Maximum number of departures to return"),
+    service_date: Optional[str] = Query(None, description="Only include departures of trips running on this service date (YYYY-MM-DD)"),
     db: DatabaseConnector = Depends(get_db)
 ):
     """Get departures from a stop within a specific time range, sorted chronologically."""
     try:
-        departures = get_stop_departures_by_time(db, stop_id, start_time, end_time, limit)
+        departures = get_stop_departures_by_time(db, stop_id, start_time, end_time, limit, service_date)
         if not departures:
             check_query = "SELECT COUNT(*) as count FROM stop_times WHERE stop_id = ?"
             df = db.execute_df(check_query, [stop_id])
@@ -1,50 +1,639 @@
+"""
+GTFS import pipeline.
+
+Streams every GTFS file under ``data/<feed>/`` into ``transit.duckdb`` using
+DuckDB's native CSV reader. Columns are stored with the types declared in
+``GTFS_SCHEMA`` so read queries never cast per row, and GTFS times are kept
+both as the original ``HH:MM:SS`` strings and as integer seconds since the
+start of the service day (values past 24:00:00 are preserved).
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import duckdb
+import numpy as np
 import pandas as pd
-from pathlib import Path
+from utils.shape_geometry import (
+    SHAPE_TOLERANCES_METERS, SUBSET_TOLERANCE_METERS, project, simplify_tiers, polyline_covers,
+    encode_polyline, encode_float32
+)
+from utils.transfer_graph import compute_transfers
 
 DATA_DIR = Path("data")
 DB_PATH = "transit.duckdb"
 
-print(f"Connecting to database at {DB_PATH}")
-con = duckdb.connect(DB_PATH)
+VARCHAR = "VARCHAR"
+INTEGER = "INTEGER"
+DOUBLE = "DOUBLE"
+DATE = "DATE"
+GTFS_TIME = "GTFS_TIME"
+
+
+GTFS_SCHEMA: Dict[str, List[Tuple[str, str]]] = {
+    "agency": [
+        ("agency_id", VARCHAR),
+        ("agency_name", VARCHAR),
+        ("agency_url", VARCHAR),
+        ("agency_timezone", VARCHAR),
+        ("agency_lang", VARCHAR),
+        ("agency_phone", VARCHAR),
+        ("agency_fare_url", VARCHAR),
+        ("agency_email", VARCHAR),
+    ],
+    "stops": [
+        ("stop_id", VARCHAR),
+        ("stop_code", VARCHAR),
+        ("stop_name", VARCHAR),
+        ("stop_desc", VARCHAR),
+        ("stop_lat", DOUBLE),
+        ("stop_lon", DOUBLE),
+        ("zone_id", VARCHAR),
+        ("stop_url", VARCHAR),
+        ("location_type", INTEGER),
+        ("parent_station", VARCHAR),
+        ("stop_timezone", VARCHAR),
+        ("wheelchair_boarding", INTEGER),
+        ("level_id", VARCHAR),
+        ("platform_code", VARCHAR),
+    ],
+    "routes": [
+        ("route_id", VARCHAR),
+        ("agency_id", VARCHAR),
+        ("route_short_name", VARCHAR),
+        ("route_long_name", VARCHAR),
+        ("route_desc", VARCHAR),
+        ("route_type", INTEGER),
+        ("route_url", VARCHAR),
+        ("route_color", VARCHAR),
+        ("route_text_color", VARCHAR),
+        ("route_sort_order", INTEGER),
+    ],
+    "trips": [
+        ("route_id", VARCHAR),
+        ("service_id", VARCHAR),
+        ("trip_id", VARCHAR),
+        ("trip_headsign", VARCHAR),
+        ("trip_short_name", VARCHAR),
+        ("direction_id", INTEGER),
+        ("block_id", VARCHAR),
+        ("shape_id", VARCHAR),
+        ("wheelchair_accessible", INTEGER),
+        ("bikes_allowed", INTEGER),
+    ],
+    "stop_times": [
+        ("trip_id", VARCHAR),
+        ("arrival_time", GTFS_TIME),
+        ("departure_time", GTFS_TIME),
+        ("stop_id", VARCHAR),
+        ("stop_sequence", INTEGER),
+        ("stop_headsign", VARCHAR),
+        ("pickup_type", INTEGER),
+        ("drop_off_type", INTEGER),
+        ("shape_dist_traveled", DOUBLE),
+        ("timepoint", INTEGER),
+    ],
+    "calendar": [
+        ("service_id", VARCHAR),
+        ("monday", INTEGER),
+        ("tuesday", INTEGER),
+        ("wednesday", INTEGER),
+        ("thursday", INTEGER),
+        ("friday", INTEGER),
+        ("saturday", INTEGER),
+        ("sunday", INTEGER),
+        ("start_date", DATE),
+        ("end_date", DATE),
+    ],
+    "calendar_dates": [
+        ("service_id", VARCHAR),
+        ("date", DATE),
+        ("exception_type", INTEGER),
+    ],
+    "shapes": [
+        ("shape_id", VARCHAR),
+        ("shape_pt_lat", DOUBLE),
+        ("shape_pt_lon", DOUBLE),
+        ("shape_pt_sequence", INTEGER),
+        ("shape_dist_traveled", DOUBLE),
+    ],
+    "transfers": [
+        ("from_stop_id", VARCHAR),
+        ("to_stop_id", VARCHAR),
+        ("from_route_id", VARCHAR),
+        ("to_route_id", VARCHAR),
+        ("from_trip_id", VARCHAR),
+        ("to_trip_id", VARCHAR),
+        ("transfer_type", INTEGER),
+        ("min_transfer_time", INTEGER),
+    ],
+    "frequencies": [
+        ("trip_id", VARCHAR),
+        ("start_time", GTFS_TIME),
+        ("end_time", GTFS_TIME),
+        ("headway_secs", INTEGER),
+        ("exact_times", INTEGER),
+    ],
+    "feed_info": [
+        ("feed_publisher_name", VARCHAR),
+        ("feed_publisher_url", VARCHAR),
+        ("feed_lang", VARCHAR),
+        ("feed_start_date", DATE),
+        ("feed_end_date", DATE),
+        ("feed_version", VARCHAR),
+        ("feed_contact_email", VARCHAR),
+        ("feed_contact_url", VARCHAR),
+    ],
+}
+
+
+def seconds_column(column: str) -> str:
+    """Name of the derived seconds column for a GTFS time column."""
+    return column.replace("_time", "_secs")
+
+
+def create_tables(con: duckdb.DuckDBPyConnection) -> None:
+    """Create (or replace) every table in ``GTFS_SCHEMA`` with typed columns."""
+    for table, columns in GTFS_SCHEMA.items():
+        col_defs = []
+        for name, col_type in columns:
+            if col_type == GTFS_TIME:
+                col_defs.append(f"{name} VARCHAR")
+                col_defs.append(f"{seconds_column(name)} INTEGER")
+            else:
+                col_defs.append(f"{name} {col_type}")
+        con.execute(f"CREATE OR REPLACE TABLE {table} ({', '.join(col_defs)})")
+
+    con.execute("CREATE OR REPLACE TABLE import_metadata (key VARCHAR, value VARCHAR)")
+
+    con.execute("""
+        CREATE OR REPLACE TEMP MACRO gtfs_time_secs(t) AS
+            TRY_CAST(split_part(t, ':', 1) AS INTEGER) * 3600
+            + TRY_CAST(split_part(t, ':', 2) AS INTEGER) * 60
+            + TRY_CAST(split_part(t, ':', 3) AS INTEGER)
+    """)
+
+
+def column_expressions(source_column: str, name: str, col_type: str) -> List[str]:
+    """SQL select expressions converting one raw CSV column to its schema type(s)."""
+    raw = f"NULLIF(TRIM(\"{source_column}\"), '')"
+
+    if col_type == VARCHAR:
+        return [f"{raw} AS {name}"]
+    if col_type == GTFS_TIME:
+        return [f"{raw} AS {name}", f"gtfs_time_secs({raw}) AS {seconds_column(name)}"]
+    if col_type == DATE:
+        return [f"CAST(TRY_STRPTIME({raw}, '%Y%m%d') AS DATE) AS {name}"]
+    return [f"TRY_CAST({raw} AS {col_type}) AS {name}"]
+
+
+def import_file(con: duckdb.DuckDBPyConnection, txt_file: Path) -> int:
+    """
+    Stream one GTFS file into its table.
+
+    Args:
+        con: Open DuckDB connection
+        txt_file: Path to the GTFS ``.txt`` file
+
+    Returns:
+        Number of rows inserted
+    """
+    table = txt_file.stem
+    reader = f"read_csv('{txt_file.as_posix()}', header = true, all_varchar = true)"
+
+    file_columns = {
+        row[0].strip().lstrip("\ufeff").lower(): row[0]
+        for row in con.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()
+    }
+
+    expressions = []
+    for name, col_type in GTFS_SCHEMA[table]:
+        if name in file_columns:
+            expressions.extend(column_expressions(file_columns[name], name, col_type))
+
+    ignored = sorted(set(file_columns) - {name for name, _ in GTFS_SCHEMA[table]})
+    if ignored:
+        print(f"Ignoring columns {ignored} not in the GTFS schema for '{table}'")
+
+    if not expressions:
+        print(f"No known columns in {txt_file}, skipping")
+        return 0
+
+    return con.execute(
+        f"INSERT INTO {table} BY NAME SELECT {', '.join(expressions)} FROM {reader}"
+    ).fetchone()[0]
+
+
+def load_feeds(con: duckdb.DuckDBPyConnection, data_dir: Path = DATA_DIR) -> Dict[str, int]:
+    """
+    Import every feed directory under ``data_dir``.
+
+    Returns:
+        Dictionary of rows inserted per table
+    """
+    totals: Dict[str, int] = {}
+
+    for feed_dir in sorted(data_dir.iterdir()):
+        if not feed_dir.is_dir():
+            print(f"Skipping non-directory {feed_dir}")
+            continue
+
+        print(f"Processing feed directory: {feed_dir}")
+
+        for txt_file in sorted(feed_dir.glob("*.txt")):
+            table = txt_file.stem
+            if table not in GTFS_SCHEMA:
+                print(f"Skipping {txt_file}: no schema for table '{table}'")
+                continue
+
+            started = time.perf_counter()
+            rows = import_file(con, txt_file)
+            elapsed = time.perf_counter() - started
+            rate = rows / elapsed if elapsed > 0 else float(rows)
+
+            totals[table] = totals.get(table, 0) + rows
+            print(f"Loaded {rows} rows into '{table}' in {elapsed:.2f}s ({rate:,.0f} rows/sec)")
+
+    return totals
+
+
+def merge_stop_sequences(sequences: List[List[str]]) -> List[str]:
+    """
+    Merge stop sequences into one ordering that respects the first sequence.
+
+    Stops missing from the merged order are inserted right after the closest
+    preceding stop of their own sequence, so branch and short-turn variants
+    slot in where they diverge from the canonical pattern.
+    """
+    merged: List[str] = []
+    for sequence in sequences:
+        anchor = -1
+        for stop_id in sequence:
+            if stop_id in merged:
+                anchor = merged.index(stop_id)
+            else:
+                anchor += 1
+                merged.insert(anchor, stop_id)
+    return merged
+
+
+def build_route_patterns(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    """
+    Precompute stop patterns and stop orders per route.
+
+    A pattern is a distinct ordered list of stops served by trips of one route
+    and direction. ``route_patterns`` ranks them by trip count (rank 1 is the
+    canonical pattern), ``route_pattern_stops`` lists their stops, and
+    ``route_stops`` holds each route direction's merged stop order, so reads
+    never aggregate ``stop_times``.
+
+    Returns:
+        Dictionary of rows written per table
+    """
+    con.execute("""
+        CREATE OR REPLACE TABLE route_patterns AS
+        WITH trip_sequences AS (
+            SELECT trip_id, list(stop_id ORDER BY stop_sequence) AS stop_ids
+            FROM stop_times
+            GROUP BY trip_id
+        ),
+        patterns AS (
+            SELECT
+                t.route_id,
+                t.direction_id,
+                ts.stop_ids,
+                count(*) AS trip_count,
+                mode(t.shape_id) AS shape_id
+            FROM trips t
+                     JOIN trip_sequences ts ON t.trip_id = ts.trip_id
+            GROUP BY t.route_id, t.direction_id, ts.stop_ids
+        ),
+        ranked AS (
+            SELECT
+                *,
+                row_number() OVER (
+                    PARTITION BY route_id, direction_id
+                    ORDER BY trip_count DESC, len(stop_ids) DESC, stop_ids
+                ) AS pattern_rank
+            FROM patterns
+        )
+        SELECT
+            route_id || ':' || COALESCE(CAST(direction_id AS VARCHAR), '') || ':' || pattern_rank AS pattern_id,
+            route_id,
+            direction_id,
+            CAST(pattern_rank AS INTEGER) AS pattern_rank,
+            CAST(trip_count AS INTEGER) AS trip_count,
+            CAST(len(stop_ids) AS INTEGER) AS stop_count,
+            shape_id,
+            stop_ids
+        FROM ranked
+        ORDER BY route_id, direction_id, pattern_rank
+    """)
+
+    con.execute("""
+        CREATE OR REPLACE TABLE route_pattern_stops AS
+        SELECT
+            pattern_id,
+            CAST(generate_subscripts(stop_ids, 1) AS INTEGER) AS stop_order,
+            unnest(stop_ids) AS stop_id
+        FROM route_patterns
+        ORDER BY pattern_id, stop_order
+    """)
+
+    rows = con.execute("""
+        SELECT route_id, direction_id, stop_ids, trip_count
+        FROM route_patterns
+        ORDER BY route_id, direction_id NULLS FIRST, pattern_rank
+    """).fetchall()
+
+    groups: Dict[Tuple[str, Optional[int]], List[Tuple[List[str], int]]] = {}
+    for route_id, direction_id, stop_ids, trip_count in rows:
+        groups.setdefault((route_id, direction_id), []).append((stop_ids, trip_count))
+
+    route_stop_rows = []
+    for (route_id, direction_id), patterns in groups.items():
+        pattern_counts: Dict[str, int] = {}
+        trip_counts: Dict[str, int] = {}
+        for stop_ids, trip_count in patterns:
+            for stop_id in set(stop_ids):
+                pattern_counts[stop_id] = pattern_counts.get(stop_id, 0) + 1
+                trip_counts[stop_id] = trip_counts.get(stop_id, 0) + trip_count
+
+        merged = merge_stop_sequences([stop_ids for stop_ids, _ in patterns])
+        for stop_order, stop_id in enumerate(merged, start=1):
+            route_stop_rows.append(
+                (route_id, direction_id, stop_order, stop_id, pattern_counts[stop_id], trip_counts[stop_id])
+            )
+
+    route_stops = pd.DataFrame(
+        route_stop_rows,
+        columns=["route_id", "direction_id", "stop_order", "stop_id", "pattern_count", "trip_count"]
+    ).astype({"direction_id": "Int32", "stop_order": "int32", "pattern_count": "int32", "trip_count": "int32"})
+
+    con.execute("""
+        CREATE OR REPLACE TABLE route_stops (
+            route_id VARCHAR,
+            direction_id INTEGER,
+            stop_order INTEGER,
+            stop_id VARCHAR,
+            pattern_count INTEGER,
+            trip_count INTEGER
+        )
+    """)
+    con.register("route_stops_df", route_stops)
+    con.execute("INSERT INTO route_stops SELECT * FROM route_stops_df ORDER BY route_id, direction_id, stop_order")
+    con.unregister("route_stops_df")
+    con.execute("CREATE INDEX route_stops_route_idx ON route_stops (route_id)")
+    con.execute("CREATE INDEX route_pattern_stops_pattern_idx ON route_pattern_stops (pattern_id)")
+
+    return {
+        "route_patterns": con.execute("SELECT count(*) FROM route_patterns").fetchone()[0],
+        "route_pattern_stops": con.execute("SELECT count(*) FROM route_pattern_stops").fetchone()[0],
+        "route_stops": len(route_stops),
+    }
+
+
+def build_trip_spans(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    """
+    Precompute the service span of every trip.
+
+    ``trip_spans`` holds each trip's first departure and last arrival in
+    seconds since the start of its service day (past 24:00:00 for overnight
+    trips) with its route and service, so "trips running at T" is a range
+    query instead of an aggregate over ``stop_times``.
+
+    Returns:
+        Dictionary of rows written per table
+    """
+    con.execute("""
+        CREATE OR REPLACE TABLE trip_spans AS
+        SELECT
+            t.trip_id,
+            t.route_id,
+            t.service_id,
+            t.direction_id,
+            CAST(min(COALESCE(st.departure_secs, st.arrival_secs)) AS INTEGER) AS start_secs,
+            CAST(max(COALESCE(st.arrival_secs, st.departure_secs)) AS INTEGER) AS end_secs,
+            CAST(count(*) AS INTEGER) AS stop_count
+        FROM trips t
+                 JOIN stop_times st ON t.trip_id = st.trip_id
+        GROUP BY t.trip_id, t.route_id, t.service_id, t.direction_id
+        HAVING min(COALESCE(st.departure_secs, st.arrival_secs)) IS NOT NULL
+        ORDER BY start_secs, t.trip_id
+    """)
+    con.execute("CREATE INDEX trip_spans_start_idx ON trip_spans (start_secs)")
+
+    return {"trip_spans": con.execute("SELECT count(*) FROM trip_spans").fetchone()[0]}
+
+
+def build_stop_transfers(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    """
+    Precompute walking transfers between nearby stops.
+
+    ``stop_transfers`` links every pair of stops within walking distance,
+    adjusted by the stop and station rules of ``transfers.txt``, so the API
+    loads the transfer graph at startup instead of computing distances.
+
+    Returns:
+        Dictionary of rows written per table
+    """
+    stops = con.execute("""
+        SELECT stop_id, stop_lat, stop_lon, parent_station
+        FROM stops
+        WHERE stop_lat IS NOT NULL AND stop_lon IS NOT NULL
+        ORDER BY stop_id
+    """).df()
+    # Route- and trip-specific rules only apply to particular boardings, not to the walk itself
+    transfers = con.execute("""
+        SELECT from_stop_id, to_stop_id, transfer_type, min_transfer_time
+        FROM transfers
+        WHERE from_stop_id IS NOT NULL AND to_stop_id IS NOT NULL
+          AND from_route_id IS NULL AND to_route_id IS NULL
+          AND from_trip_id IS NULL AND to_trip_id IS NULL
+    """).df()
+
+    links = compute_transfers(
+        stops["stop_id"].tolist(),
+        stops["stop_lat"].to_numpy(),
+        stops["stop_lon"].to_numpy(),
+        transfers,
+        parent_stations=stops["parent_station"].tolist()
+    )
+    con.execute("""
+        CREATE OR REPLACE TABLE stop_transfers (
+            from_stop_id VARCHAR,
+            to_stop_id VARCHAR,
+            distance_miles DOUBLE,
+            walk_secs INTEGER,
+            source VARCHAR
+        )
+    """)
+    con.register("stop_transfers_df", links)
+    con.execute("INSERT INTO stop_transfers SELECT * FROM stop_transfers_df ORDER BY from_stop_id, walk_secs, to_stop_id")
+    con.unregister("stop_transfers_df")
+
+    return {"stop_transfers": len(links)}
+
+
+def build_shape_tiers(con: duckdb.DuckDBPyConnection) -> Dict[str, int]:
+    """
+    Precompute simplified shape geometries and the shapes to draw per route.
+
+    ``shape_tiers`` holds every shape at each tolerance of
+    ``SHAPE_TOLERANCES_METERS`` (tier 0 is full resolution). ``route_shapes``
+    lists the shapes used by each route's trips; a shape lying within
+    ``SUBSET_TOLERANCE_METERS`` of a longer shape of the same route records
+    that shape in ``covered_by`` and is not drawn separately. Each tier is
+    also stored as an encoded polyline and as float32 coordinates, so the
+    compact output formats are served without touching individual points.
+
+    Returns:
+        Dictionary of rows written per table
+    """
+    points = con.execute("""
+        SELECT shape_id, shape_pt_lat, shape_pt_lon
+        FROM shapes
+        WHERE shape_id IS NOT NULL AND shape_pt_lat IS NOT NULL AND shape_pt_lon IS NOT NULL
+        ORDER BY shape_id, shape_pt_sequence
+    """).df()
+    shape_ids, starts = np.unique(points["shape_id"].to_numpy(dtype=object), return_index=True)
+    ends = np.append(starts[1:], len(points))
+    lats = points["shape_pt_lat"].to_numpy(dtype=np.float64)
+    lons = points["shape_pt_lon"].to_numpy(dtype=np.float64)
+
+    tier_rows = []
+    shape_lengths: Dict[str, float] = {}
+    subset_tier: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for shape_id, start, end in zip(shape_ids.tolist(), starts.tolist(), ends.tolist()):
+        shape_lats, shape_lons = lats[start:end], lons[start:end]
+        tiers = simplify_tiers(shape_lats, shape_lons)
+        for tier, (tolerance, positions) in enumerate(zip(SHAPE_TOLERANCES_METERS, tiers)):
+            tier_lats, tier_lons = shape_lats[positions], shape_lons[positions]
+            tier_rows.append((
+                shape_id, tier, tolerance, len(positions), tier_lats.tolist(), tier_lons.tolist(),
+                encode_polyline(tier_lats, tier_lons), encode_float32(tier_lats, tier_lons)
+            ))
+        xs, ys = project(shape_lats[tiers[0]], shape_lons[tiers[0]])
+        shape_lengths[shape_id] = float(np.hypot(np.diff(xs), np.diff(ys)).sum())
+        subset_tier[shape_id] = (shape_lats[tiers[1]], shape_lons[tiers[1]])
+
+    con.execute("""
+        CREATE OR REPLACE TABLE shape_tiers (
+            shape_id VARCHAR,
+            tier INTEGER,
+            tolerance_meters DOUBLE,
+            point_count INTEGER,
+            lats DOUBLE[],
+            lons DOUBLE[],
+            polyline VARCHAR,
+            coordinates_f32 BLOB
+        )
+    """)
+    shape_tiers = pd.DataFrame(tier_rows, columns=[
+        "shape_id", "tier", "tolerance_meters", "point_count", "lats", "lons", "polyline", "coordinates_f32"
+    ])
+    con.register("shape_tiers_df", shape_tiers)
+    con.execute("INSERT INTO shape_tiers SELECT * FROM shape_tiers_df ORDER BY shape_id, tier")
+    con.unregister("shape_tiers_df")
+    con.execute("CREATE INDEX shape_tiers_shape_idx ON shape_tiers (shape_id)")
+
+    route_shape_counts = con.execute("""
+        SELECT route_id, shape_id, count(*) AS trip_count
+        FROM trips
+        WHERE route_id IS NOT NULL AND shape_id IS NOT NULL
+        GROUP BY route_id, shape_id
+        ORDER BY route_id, shape_id
+    """).fetchall()
+    by_route: Dict[str, List[Tuple[str, int]]] = {}
+    for route_id, shape_id, trip_count in route_shape_counts:
+        if shape_id in shape_lengths:
+            by_route.setdefault(route_id, []).append((shape_id, trip_count))
+
+    # Tier 1 points may sit up to its tolerance off the true line on both shapes
+    subset_tolerance = SUBSET_TOLERANCE_METERS + 2 * SHAPE_TOLERANCES_METERS[1]
+    route_rows = []
+    for route_id, shapes in by_route.items():
+        shapes.sort(key=lambda shape: (-shape_lengths[shape[0]], -shape[1], shape[0]))
+        reference_lat = float(np.mean([subset_tier[shape_id][0].mean() for shape_id, _ in shapes]))
+        projected = {shape_id: project(*subset_tier[shape_id], reference_lat) for shape_id, _ in shapes}
+        drawn: List[str] = []
+        for shape_id, trip_count in shapes:
+            covered_by = next(
+                (outer for outer in drawn if polyline_covers(projected[outer], projected[shape_id], subset_tolerance)),
+                None
+            )
+            if covered_by is None:
+                drawn.append(shape_id)
+            route_rows.append((route_id, shape_id, trip_count, round(shape_lengths[shape_id], 1), covered_by))
+
+    con.execute("""
+        CREATE OR REPLACE TABLE route_shapes (
+            route_id VARCHAR,
+            shape_id VARCHAR,
+            trip_count INTEGER,
+            length_meters DOUBLE,
+            covered_by VARCHAR
+        )
+    """)
+    route_shapes = pd.DataFrame(route_rows, columns=["route_id", "shape_id", "trip_count", "length_meters", "covered_by"])
+    con.register("route_shapes_df", route_shapes)
+    con.execute("INSERT INTO route_shapes SELECT * FROM route_shapes_df ORDER BY route_id, trip_count DESC, shape_id")
+    con.unregister("route_shapes_df")
+    con.execute("CREATE INDEX route_shapes_route_idx ON route_shapes (route_id)")
+
+    return {"shape_tiers": len(shape_tiers), "route_shapes": len(route_shapes)}
+
+
+def write_import_metadata(con: duckdb.DuckDBPyConnection, totals: Dict[str, int]) -> None:
+    """Record when the import ran so the API can version cached data."""
+    imported_at = datetime.now(timezone.utc)
+    metadata = [
+        ("imported_at", imported_at.isoformat()),
+        ("data_version", imported_at.strftime("%Y%m%d%H%M%S")),
+    ]
+    metadata.extend((f"rows.{table}", str(rows)) for table, rows in sorted(totals.items()))
+    con.executemany("INSERT INTO import_metadata VALUES (?, ?)", metadata)
+
 
-for feed_dir in DATA_DIR.iterdir():
-    if not feed_dir.is_dir():
-        print(f"Skipping non-directory {feed_dir}")
-        continue
+def main() -> None:
+    print(f"Connecting to database at {DB_PATH}")
+    con = duckdb.connect(DB_PATH)
+    con.execute("SET preserve_insertion_order = false")
 
-    print(f"Processing feed directory: {feed_dir}")
+    started = time.perf_counter()
+    create_tables(con)
+    totals = load_feeds(con)
+    total_rows = sum(totals.values())
 
-    for txt_file in feed_dir.glob("*.txt"):
-        table = txt_file.stem
-        print(f"Reading file: {txt_file}")
+    derived_started = time.perf_counter()
+    derived = build_route_patterns(con)
+    print(f"Built route patterns {derived} in {time.perf_counter() - derived_started:.2f}s")
+    totals.update(derived)
 
-        df = pd.read_csv(txt_file, dtype=str)
+    spans_started = time.perf_counter()
+    spans = build_trip_spans(con)
+    print(f"Built trip spans {spans} in {time.perf_counter() - spans_started:.2f}s")
+    totals.update(spans)
 
-        if table == "trips":
-            df = df.drop(columns=["block_id"], errors="ignore")
-        elif table == "stops":
-            df = df.drop(columns=["zone_id", "stop_url", "stop_desc", "parent_station"], errors="ignore")
-        elif table == "stop_times":
-            cols_to_drop = ["pickup_type", "drop_off_type", "timepoint", "departure_time", "arrival_time"]
-            df = df.drop(columns=[c for c in cols_to_drop if c in df.columns])
-            print(f"Dropped columns {cols_to_drop} for 'stop_times'")
+    shapes_started = time.perf_counter()
+    shape_tiers = build_shape_tiers(con)
+    print(f"Built shape tiers {shape_tiers} in {time.perf_counter() - shapes_started:.2f}s")
+    totals.update(shape_tiers)
 
-        print(f"Read {len(df)} rows into DataFrame for table '{table}'")
+    transfers_started = time.perf_counter()
+    transfers = build_stop_transfers(con)
+    print(f"Built stop transfers {transfers} in {time.perf_counter() - transfers_started:.2f}s")
+    totals.update(transfers)
+    write_import_metadata(con, totals)
 
-        table_exists = con.execute(
-            f"SELECT COUNT(*) FROM information_schema.tables WHERE table_name='{table}'"
-        ).fetchone()[0]
+    elapsed = time.perf_counter() - started
+    print(f"Imported {total_rows} rows in {elapsed:.2f}s")
 
-        if not table_exists:
-            print(f"Creating table '{table}'")
-            col_defs = ", ".join(f"{c} VARCHAR" for c in df.columns)
-            con.execute(f"CREATE TABLE {table} ({col_defs})")
+    print("Closing database connection")
+    con.close()
+    print("Done")
 
-        cols = ", ".join(df.columns)
-        print(f"Inserting data into table '{table}'")
-        con.execute(f"INSERT INTO {table} ({cols}) SELECT * FROM df")
 
-print("Closing database connection")
-con.close()
-print("Done")
+if __name__ == "__main__":
+    main()
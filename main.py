@@ -6,38 +6,70 @@ from pydantic import ValidationError
 from endpoints.routes import route_routes
 from endpoints.stops import stop_routes
 from endpoints.trips import trip_routes
+from endpoints.journeys import journey_routes
+from endpoints.tiles import tile_routes
+from endpoints.exports import export_routes
 from utils.cache_management import get_cache_manager
 from utils.cache_middleware import add_cache_middleware
+from utils.feed_indexes import warm_feed_indexes
 from utils.error_handling import (
     global_exception_handler,
     validation_exception_handler
 )
 from utils.rate_limiting import add_rate_limiting_middleware
-from database_connector import get_db
+from utils.response_cache import add_response_cache_middleware
+from database_connector import get_connection_manager
+
+
+CACHE_CLEANUP_INTERVAL = 300
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
-    Application lifespan manager for cache warming and cleanup.
+    Application lifespan manager for the database pool, feed indexes, cache warming and cleanup.
     """
+    connection_manager = get_connection_manager()
+    cache_manager = get_cache_manager()
+    try:
+        connection_manager.open()
+        print(f"Database pool ready: {connection_manager.health_check()}")
+    except Exception as e:
+        print(f"Database pool failed to open on startup: {e}")
+
     try:
-        cache_manager = get_cache_manager()
-        db = next(get_db())
-        warmed_counts = await cache_manager.warm_cache(db)
+        with connection_manager.connection() as db:
+            build_times = warm_feed_indexes(db)
+        print(f"Feed indexes built: { {name: round(secs, 3) for name, secs in build_times.items()} }")
+    except Exception as e:
+        print(f"Feed index build failed on startup: {e}")
+
+    try:
+        with connection_manager.connection() as db:
+            data_version = cache_manager.refresh_data_version(db)
+            print(f"Cache keys namespaced by data version {data_version}")
+            warmed_counts = await cache_manager.warm_cache(db)
         print(f"Cache warmed on startup: {warmed_counts}")
     except Exception as e:
         print(f"Cache warming failed on startup: {e}")
+
+    cache_manager.start_cleanup_task(interval=CACHE_CLEANUP_INTERVAL)
     
     yield
 
     try:
-        cache_manager = get_cache_manager()
+        await cache_manager.stop_cleanup_task()
         cache_manager.invalidate_all_cache()
         print("Cache cleared on shutdown")
     except Exception as e:
         print(f"Cache cleanup failed on shutdown: {e}")
 
+    try:
+        connection_manager.close()
+        print("Database pool closed on shutdown")
+    except Exception as e:
+        print(f"Database pool shutdown failed: {e}")
+
 
 app = FastAPI(
     title="NYC Public Transit API",
@@ -50,9 +82,17 @@ app.add_exception_handler(Exception, global_exception_handler)
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 app.add_exception_handler(ValidationError, validation_exception_handler)
 
-add_rate_limiting_middleware(app, exclude_paths=["/docs", "/redoc", "/openapi.json", "/health", "/system/status"])
+UNCACHED_PATHS = ["/docs", "/redoc", "/openapi.json", "/health", "/system/status"]
+
+# Streamed responses would have to be buffered whole to be cached
+STREAMED_PATHS = ["/export"]
 
-add_cache_middleware(app, cleanup_interval=300)
+# Accept selects Arrow or Parquet bodies on list endpoints
+add_response_cache_middleware(app, exclude_paths=UNCACHED_PATHS + STREAMED_PATHS, vary_headers=("accept",))
+
+add_rate_limiting_middleware(app, exclude_paths=UNCACHED_PATHS)
+
+add_cache_middleware(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -65,4 +105,13 @@ app.add_middleware(
 
 app.include_router(route_routes)
 app.include_router(stop_routes)
-app.include_router(trip_routes)
\ No newline at end of file
+app.include_router(trip_routes)
+app.include_router(journey_routes)
+app.include_router(tile_routes)
+app.include_router(export_routes)
+
+
+@app.get("/health")
+def health():
+    """Report database pool health."""
+    return {"database": get_connection_manager().health_check()}
\ No newline at end of file
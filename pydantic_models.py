@@ -13,6 +13,22 @@ class GeoJSONResponse(BaseModel):
     type: str = "FeatureCollection"
     features: List[RouteFeature]
 
+class EncodedShape(BaseModel):
+    """One shape as a Google encoded polyline."""
+    shape_id: str = Field(..., description="Shape identifier")
+    covers: List[str] = Field(default_factory=list, description="Shapes lying along this one that are not returned separately")
+    tolerance_meters: float = Field(..., ge=0, description="Simplification tolerance of the geometry in meters")
+    point_count: int = Field(..., ge=0, description="Number of encoded points")
+    polyline: str = Field(..., description="Encoded polyline of (lat, lon) points")
+
+class EncodedShapeResponse(BaseModel):
+    """Route or trip shapes as encoded polylines."""
+    route_id: Optional[str] = Field(None, description="Route the shapes belong to")
+    trip_id: Optional[str] = Field(None, description="Trip the shape belongs to, for trip shapes")
+    format: str = Field("polyline", description="Encoding of the shapes")
+    precision: int = Field(5, description="Decimal places kept by the polyline encoding")
+    shapes: List[EncodedShape] = Field(default_factory=list, description="Encoded shapes")
+
 class Stop(BaseModel):
     """Basic stop information model."""
     stop_id: str = Field(..., description="Unique identifier for the stop")
@@ -35,6 +51,10 @@ class StopWithDistance(Stop):
     """Stop model with distance information for nearby searches."""
     distance_miles: float = Field(..., description="Distance from search point in miles")
 
+class StopTransfer(StopWithDistance):
+    """Stop reachable on foot from another stop."""
+    walk_seconds: int = Field(..., ge=0, description="Walking or minimum transfer time in seconds")
+
 class StopDeparture(BaseModel):
     """Departure information for a stop."""
     trip_id: str = Field(..., description="Unique identifier for the trip")
@@ -70,6 +90,10 @@ class RouteDetail(RouteBasic):
     stops: List[Stop] = Field(default_factory=list, description="List of stops served by this route")
     route_desc: Optional[str] = Field(None, description="Description of the route")
 
+class NearbyRoute(RouteBasic):
+    """Route summary with distance information for nearby searches."""
+    distance_miles: float = Field(..., description="Distance from search point to the closest point of the route shape in miles")
+
 class StopWithRoutes(Stop):
     """Stop model with associated routes."""
     routes: List[RouteBasic] = Field(default_factory=list, description="Routes serving this stop")
@@ -108,6 +132,31 @@ class TripWithStops(Trip):
     stops: List[TripStop] = Field(default_factory=list, description="Ordered list of stops for this trip")
 
 
+class JourneyLeg(BaseModel):
+    """One leg of a journey: a ride on a single trip or a walk between stops."""
+    mode: str = Field(..., description="Leg type (transit or walk)")
+    from_stop_id: str = Field(..., description="Stop where the leg starts")
+    from_stop_name: str = Field(..., description="Name of the stop where the leg starts")
+    to_stop_id: str = Field(..., description="Stop where the leg ends")
+    to_stop_name: str = Field(..., description="Name of the stop where the leg ends")
+    departure_time: str = Field(..., description="Departure time in HH:MM:SS format")
+    arrival_time: str = Field(..., description="Arrival time in HH:MM:SS format")
+    duration_seconds: int = Field(..., ge=0, description="Leg duration in seconds")
+    trip_id: Optional[str] = Field(None, description="Trip ridden on a transit leg")
+    route_id: Optional[str] = Field(None, description="Route of the trip ridden on a transit leg")
+    route_short_name: Optional[str] = Field(None, description="Short name of the route")
+    headsign: Optional[str] = Field(None, description="Trip headsign")
+    num_stops: Optional[int] = Field(None, ge=1, description="Number of stops ridden on a transit leg")
+
+class Journey(BaseModel):
+    """A planned journey between two stops."""
+    departure_time: str = Field(..., description="Departure time in HH:MM:SS format")
+    arrival_time: str = Field(..., description="Arrival time in HH:MM:SS format")
+    duration_seconds: int = Field(..., ge=0, description="Total journey duration in seconds")
+    transfers: int = Field(..., ge=0, description="Number of changes between trips")
+    legs: List[JourneyLeg] = Field(default_factory=list, description="Journey legs in travel order")
+
+
 class PaginatedResponse(BaseModel, Generic[T]):
     """Generic paginated response model."""
     items: List[T] = Field(..., description="List of items for this page")
@@ -119,13 +168,13 @@ class PaginatedResponse(BaseModel, Generic[T]):
 
 class ExportRequest(BaseModel):
     """Request model for data exports."""
-    format: str = Field(..., description="Export format (json, csv, geojson)")
+    format: str = Field(..., description="Export format (json, ndjson, csv, geojson, arrow, parquet)")
     filters: Optional[dict] = Field(None, description="Optional filters to apply")
     
     @validator('format')
     def validate_format(cls, v):
-        if v not in ['json', 'csv', 'geojson']:
-            raise ValueError('format must be one of: json, csv, geojson')
+        if v not in ['json', 'ndjson', 'csv', 'geojson', 'arrow', 'parquet']:
+            raise ValueError('format must be one of: json, ndjson, csv, geojson, arrow, parquet')
         return v
 
 class ErrorDetail(BaseModel):
@@ -0,0 +1,37 @@
+"""
+Shared fixtures: a toy transit network small enough to check journeys by hand.
+
+Stops A-E. Route R1 runs A-B-C twice, R2 runs B-D and R3 runs A-D directly
+but slowly. C and E are two minutes apart on foot, so E is only reached by
+walking from C.
+"""
+
+from typing import List
+import pytest
+from tests.networks import Footpath, Trip, build_connection_timetable, build_raptor_timetable
+from utils.connection_scan import ConnectionTimetable
+from utils.raptor import RaptorTimetable
+
+
+STOP_IDS = ["A", "B", "C", "D", "E"]
+
+# trip_id, route_id, [(stop_id, arrival_secs, departure_secs), ...]
+TOY_TRIPS: List[Trip] = [
+    ("R1-0800", "R1", [("A", 28800, 28800), ("B", 29400, 29460), ("C", 30000, 30000)]),
+    ("R1-0830", "R1", [("A", 30600, 30600), ("B", 31200, 31260), ("C", 31800, 31800)]),
+    ("R2-0815", "R2", [("B", 29700, 29700), ("D", 30300, 30300)]),
+    ("R3-0800", "R3", [("A", 28800, 28800), ("D", 32400, 32400)]),
+]
+
+# Symmetric walking links: (stop_id, stop_id, seconds)
+TOY_FOOTPATHS: List[Footpath] = [("C", "E", 120)]
+
+
+@pytest.fixture
+def connection_timetable() -> ConnectionTimetable:
+    return build_connection_timetable(STOP_IDS, TOY_TRIPS, TOY_FOOTPATHS)
+
+
+@pytest.fixture
+def raptor_timetable() -> RaptorTimetable:
+    return build_raptor_timetable(STOP_IDS, TOY_TRIPS, TOY_FOOTPATHS)
@@ -0,0 +1,128 @@
+"""
+Builders for small in-memory journey planner timetables.
+
+A network is given as stop ids, trips as (trip_id, route_id, stop times) with
+stop times as (stop_id, arrival_secs, departure_secs), and symmetric walking
+links as (stop_id, stop_id, seconds). Trips of a route must visit the same
+stops without overtaking each other.
+"""
+
+import random
+from typing import Any, Dict, List, Sequence, Tuple
+import numpy as np
+from utils.connection_scan import Connections, ConnectionTimetable
+from utils.raptor import RaptorTimetable
+
+
+StopTime = Tuple[str, int, int]
+Trip = Tuple[str, str, List[StopTime]]
+Footpath = Tuple[str, str, int]
+
+
+def stop_records(stop_ids: Sequence[str]) -> List[Dict[str, Any]]:
+    return [{"stop_id": stop_id, "stop_name": f"Stop {stop_id}"} for stop_id in stop_ids]
+
+
+def trip_records(trips: Sequence[Trip]) -> List[Tuple[str, str, str, None]]:
+    return [(trip_id, route_id, route_id, None) for trip_id, route_id, _ in trips]
+
+
+def footpath_arrays(stop_ids: Sequence[str], footpaths: Sequence[Footpath]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """CSR arrays (offsets, targets, seconds) of ``footpaths`` in both directions."""
+    links: Dict[int, List[Tuple[int, int]]] = {}
+    for a, b, secs in footpaths:
+        links.setdefault(stop_ids.index(a), []).append((stop_ids.index(b), secs))
+        links.setdefault(stop_ids.index(b), []).append((stop_ids.index(a), secs))
+    offsets, targets, walk_secs = [0], [], []
+    for stop in range(len(stop_ids)):
+        for target, secs in links.get(stop, []):
+            targets.append(target)
+            walk_secs.append(secs)
+        offsets.append(len(targets))
+    return np.array(offsets, dtype=np.int64), np.array(targets, dtype=np.int32), np.array(walk_secs, dtype=np.int32)
+
+
+def build_connection_timetable(stop_ids: Sequence[str], trips: Sequence[Trip], footpaths: Sequence[Footpath]) -> ConnectionTimetable:
+    stop_ids = list(stop_ids)
+    rows = []
+    for trip, (_, _, stop_times) in enumerate(trips):
+        for (dep_stop, _, dep_secs), (arr_stop, arr_secs, _) in zip(stop_times, stop_times[1:]):
+            rows.append((stop_ids.index(dep_stop), stop_ids.index(arr_stop), dep_secs, arr_secs, trip))
+    rows.sort(key=lambda row: (row[2], row[3]))
+    columns = [np.array(column, dtype=np.int32) for column in zip(*rows)] or [np.empty(0, dtype=np.int32)] * 5
+    return ConnectionTimetable(
+        stop_records(stop_ids),
+        Connections(*columns),
+        trip_records(trips),
+        np.zeros(len(trips), dtype=np.int32),
+        None,
+        footpath_arrays(stop_ids, footpaths),
+        {}
+    )
+
+
+def build_raptor_timetable(stop_ids: Sequence[str], trips: Sequence[Trip], footpaths: Sequence[Footpath]) -> RaptorTimetable:
+    stop_ids = list(stop_ids)
+    patterns: Dict[str, List[int]] = {}
+    for trip, (_, route_id, _) in enumerate(trips):
+        patterns.setdefault(route_id, []).append(trip)
+    stop_lists, trip_lists, arrivals, departures = [], [], [], []
+    for pattern_trips in patterns.values():
+        pattern_trips = sorted(pattern_trips, key=lambda trip: trips[trip][2][0][2])
+        stop_times = [trips[trip][2] for trip in pattern_trips]
+        stop_count = len(stop_times[0])
+        stop_lists.append([stop_ids.index(stop_id) for stop_id, _, _ in stop_times[0]])
+        trip_lists.append(pattern_trips)
+        arrivals.append(np.array([[times[j][1] for times in stop_times] for j in range(stop_count)], dtype=np.int32))
+        departures.append(np.array([[times[j][2] for times in stop_times] for j in range(stop_count)], dtype=np.int32))
+    return RaptorTimetable(
+        stop_records(stop_ids),
+        list(patterns),
+        stop_lists,
+        trip_lists,
+        arrivals,
+        departures,
+        trip_records(trips),
+        np.zeros(len(trips), dtype=np.int32),
+        None,
+        footpath_arrays(stop_ids, footpaths),
+        {}
+    )
+
+
+def random_network(
+    seed: int,
+    stop_count: int = 12,
+    route_count: int = 6,
+    footpath_count: int = 10
+) -> Tuple[List[str], List[Trip], List[Footpath]]:
+    """
+    A small random network running between 08:00 and about 10:00.
+
+    Each route visits 2-5 distinct stops with fixed running times and runs
+    1-4 trips, so trips of a route never overtake. Walking links join random
+    stop pairs and are not transitively closed.
+    """
+    rng = random.Random(seed)
+    stop_ids = [f"S{i}" for i in range(stop_count)]
+    trips: List[Trip] = []
+    for route in range(route_count):
+        stops = rng.sample(stop_ids, rng.randint(2, 5))
+        running = [rng.randint(60, 900) for _ in stops[1:]]
+        dwell = [rng.choice((0, 0, 30)) for _ in stops]
+        start = 28800 + rng.randint(0, 1800)
+        for number in range(rng.randint(1, 4)):
+            time = start + number * rng.choice((600, 900, 1200))
+            stop_times = []
+            for i, stop_id in enumerate(stops):
+                if i:
+                    time += running[i - 1]
+                stop_times.append((stop_id, time, time + dwell[i]))
+                time += dwell[i]
+            trips.append((f"T{route}-{number}", f"R{route}", stop_times))
+
+    footpaths: Dict[Tuple[str, str], int] = {}
+    while len(footpaths) < footpath_count:
+        a, b = sorted(rng.sample(stop_ids, 2))
+        footpaths[(a, b)] = rng.randint(60, 600)
+    return stop_ids, trips, [(a, b, secs) for (a, b), secs in footpaths.items()]
@@ -0,0 +1,93 @@
+import itertools
+import pytest
+from tests.networks import build_connection_timetable, random_network
+from utils.connection_scan import TRANSIT, WALK
+
+
+@pytest.mark.parametrize("source, target, departure_secs, expected_arrival", [
+    # R1 to B, then R2 beats the direct but slow R3
+    ("A", "D", 28800, 30300),
+    # Too late for the 08:00 trips; R1-0830 does not reach D
+    ("A", "D", 28900, None),
+    ("A", "C", 28800, 30000),
+    ("A", "C", 28900, 31800),
+    # Only reachable on foot from C
+    ("A", "E", 28800, 30120),
+    ("B", "D", 29400, 30300),
+    ("D", "A", 28800, None),
+])
+def test_earliest_arrival(connection_timetable, source, target, departure_secs, expected_arrival):
+    journey = connection_timetable.earliest_arrival(
+        connection_timetable.resolve_stop(source), connection_timetable.resolve_stop(target), departure_secs
+    )
+    if expected_arrival is None:
+        assert journey is None
+    else:
+        assert journey["arrival_secs"] == expected_arrival
+
+
+def test_earliest_arrival_legs(connection_timetable):
+    journey = connection_timetable.earliest_arrival([0], [4], 28800)
+    assert [(leg["mode"], leg["from_stop"], leg["to_stop"]) for leg in journey["legs"]] == [
+        (TRANSIT, 0, 2),
+        (WALK, 2, 4),
+    ]
+    assert journey["legs"][0]["num_stops"] == 2
+    assert journey["departure_secs"] == 28800
+
+
+def test_arrival_times_matches_earliest_arrival(connection_timetable):
+    arrivals = connection_timetable.arrival_times({0: 28800})
+    for target in range(1, 5):
+        journey = connection_timetable.earliest_arrival([0], [target], 28800)
+        assert arrivals.get(target) == (journey["arrival_secs"] if journey else None)
+
+
+def test_walk_after_ride_to_stop_also_reached_on_foot():
+    # B is a short walk from A, but D is only reachable on foot from B
+    # after riding there; walks from A must not chain through B
+    timetable = build_connection_timetable(
+        ["A", "B", "C", "D"],
+        [("T1", "R1", [("A", 28800, 28800), ("C", 29000, 29000), ("B", 29400, 29400)])],
+        [("A", "B", 120), ("B", "D", 180)],
+    )
+    journey = timetable.earliest_arrival([0], [3], 28800)
+    assert journey["arrival_secs"] == 29580
+    assert [(leg["mode"], leg["from_stop"], leg["to_stop"]) for leg in journey["legs"]] == [
+        (TRANSIT, 0, 1),
+        (WALK, 1, 3),
+    ]
+    assert timetable.arrival_times({0: 28800}) == {0: 28800, 1: 28920, 2: 29000, 3: 29580}
+
+
+def _check_legs(journey):
+    modes = [leg["mode"] for leg in journey["legs"]]
+    assert all(not (a == WALK and b == WALK) for a, b in zip(modes, modes[1:]))
+    for leg, next_leg in zip(journey["legs"], journey["legs"][1:]):
+        assert leg["to_stop"] == next_leg["from_stop"]
+        assert leg["arrival_secs"] <= next_leg["departure_secs"]
+    assert journey["legs"][-1]["arrival_secs"] == journey["arrival_secs"]
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_profile_matches_earliest_arrival(seed):
+    stop_ids, trips, footpaths = random_network(seed)
+    timetable = build_connection_timetable(stop_ids, trips, footpaths)
+    for source, target in itertools.permutations(range(len(stop_ids)), 2):
+        for departure_secs, arrival_secs in timetable.profile([source], [target], 28800, 30600):
+            journey = timetable.earliest_arrival([source], [target], departure_secs)
+            assert journey is not None and journey["arrival_secs"] == arrival_secs, (seed, source, target, departure_secs)
+            _check_legs(journey)
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_arrival_times_match_earliest_arrival(seed):
+    stop_ids, trips, footpaths = random_network(seed)
+    timetable = build_connection_timetable(stop_ids, trips, footpaths)
+    for source in range(len(stop_ids)):
+        arrivals = timetable.arrival_times({source: 28800})
+        for target in range(len(stop_ids)):
+            if target == source:
+                continue
+            journey = timetable.earliest_arrival([source], [target], 28800)
+            assert arrivals.get(target) == (journey["arrival_secs"] if journey else None), (seed, source, target)
@@ -0,0 +1,91 @@
+import itertools
+import pytest
+from utils.connection_scan import WALK
+from tests.networks import build_connection_timetable, build_raptor_timetable, random_network
+
+
+DEPARTURES = [28000, 28800, 28900, 29400, 29700, 30600, 31000]
+
+
+def test_query_pareto_journeys(raptor_timetable):
+    journeys = raptor_timetable.query([0], [3], 28800)
+    # Direct but slow R3, then R1 and R2 with one transfer
+    assert [(journey["transfers"], journey["arrival_secs"]) for journey in journeys] == [(0, 32400), (1, 30300)]
+
+
+@pytest.mark.parametrize("departure_secs", DEPARTURES)
+def test_earliest_arrival_matches_connection_scan(raptor_timetable, connection_timetable, departure_secs):
+    for source, target in itertools.permutations(range(len(raptor_timetable.stops)), 2):
+        journey = connection_timetable.earliest_arrival([source], [target], departure_secs)
+        journeys = raptor_timetable.query([source], [target], departure_secs)
+        expected = journey["arrival_secs"] if journey else None
+        arrival = min(journey["arrival_secs"] for journey in journeys) if journeys else None
+        assert arrival == expected, (source, target, departure_secs)
+
+
+def test_range_query_keeps_fewer_transfer_options():
+    # A later departure with a transfer arrives first; leaving earlier
+    # without a transfer must still be offered
+    stop_ids = ["A", "B", "D"]
+    trips = [
+        ("X", "X", [("A", 28000, 28000), ("D", 33000, 33000)]),
+        ("Y", "Y", [("A", 28800, 28800), ("B", 29400, 29400)]),
+        ("Z", "Z", [("B", 29700, 29700), ("D", 30300, 30300)]),
+    ]
+    timetable = build_raptor_timetable(stop_ids, trips, [])
+    journeys = timetable.range_query([0], [2], 27000, 29000)
+    assert [(j["departure_secs"], j["arrival_secs"], j["transfers"]) for j in journeys] == [
+        (28000, 33000, 0),
+        (28800, 30300, 1),
+    ]
+
+
+def test_range_query_toy_network(raptor_timetable):
+    journeys = raptor_timetable.range_query([0], [3], 28000, 31000)
+    assert [(j["departure_secs"], j["arrival_secs"], j["transfers"]) for j in journeys] == [
+        (28800, 32400, 0),
+        (28800, 30300, 1),
+    ]
+
+
+def _pareto(options):
+    return {
+        option for option in options
+        if not any(
+            other != option and other[0] >= option[0] and other[1] <= option[1] and other[2] <= option[2]
+            for other in options
+        )
+    }
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_range_query_matches_single_queries(seed):
+    stop_ids, trips, footpaths = random_network(seed)
+    timetable = build_raptor_timetable(stop_ids, trips, footpaths)
+    earliest, latest = 28800, 30600
+    for source, target in itertools.permutations(range(len(stop_ids)), 2):
+        departures = timetable._source_departures([source], earliest, latest, (None, None))
+        expected = _pareto({
+            (j["departure_secs"], j["arrival_secs"], j["transfers"])
+            for departure in departures
+            for j in timetable.query([source], [target], departure, max_transfers=4)
+        })
+        journeys = timetable.range_query([source], [target], earliest, latest, max_transfers=4)
+        assert {(j["departure_secs"], j["arrival_secs"], j["transfers"]) for j in journeys} == expected, (seed, source, target)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_networks_match_connection_scan(seed):
+    stop_ids, trips, footpaths = random_network(seed)
+    raptor = build_raptor_timetable(stop_ids, trips, footpaths)
+    csa = build_connection_timetable(stop_ids, trips, footpaths)
+    for departure_secs in (28800, 29700):
+        for source, target in itertools.permutations(range(len(stop_ids)), 2):
+            journey = csa.earliest_arrival([source], [target], departure_secs)
+            journeys = raptor.query([source], [target], departure_secs, max_transfers=len(trips))
+            expected = journey["arrival_secs"] if journey else None
+            arrival = min(j["arrival_secs"] for j in journeys) if journeys else None
+            assert arrival == expected, (seed, source, target, departure_secs)
+            for j in journeys:
+                modes = [leg["mode"] for leg in j["legs"]]
+                assert all(not (a == WALK and b == WALK) for a, b in zip(modes, modes[1:]))
@@ -0,0 +1,75 @@
+import struct
+from typing import List, Tuple
+import numpy as np
+import pytest
+from utils.shape_geometry import encode_float32, encode_polyline, pack_binary_shapes
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    """Reference decoder for the Google encoded polyline format."""
+    values, value, shift = [], 0, 0
+    for char in encoded:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    assert shift == 0, "truncated polyline"
+
+    points, lat, lon = [], 0, 0
+    for lat_delta, lon_delta in zip(values[::2], values[1::2]):
+        lat += lat_delta
+        lon += lon_delta
+        points.append((lat / 10 ** precision, lon / 10 ** precision))
+    return points
+
+
+def test_encode_polyline_reference_example():
+    # Example from the format's documentation
+    lats = np.array([38.5, 40.7, 43.252])
+    lons = np.array([-120.2, -120.95, -126.453])
+    assert encode_polyline(lats, lons) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def test_encode_polyline_empty():
+    assert encode_polyline(np.array([]), np.array([])) == ""
+
+
+@pytest.mark.parametrize("precision", [5, 6])
+def test_encode_polyline_round_trip(precision):
+    rng = np.random.default_rng(7)
+    # A wandering line around New York, crossing zero deltas and sign changes
+    lats = 40.7 + np.cumsum(rng.normal(0, 0.01, 200))
+    lons = -74.0 + np.cumsum(rng.normal(0, 0.01, 200))
+    lats[50] = lats[49]
+    lons[120:130] = 0.0
+
+    decoded = np.array(decode_polyline(encode_polyline(lats, lons, precision), precision))
+    assert decoded.shape == (200, 2)
+    np.testing.assert_allclose(decoded[:, 0], lats, atol=0.5 / 10 ** precision + 1e-12)
+    np.testing.assert_allclose(decoded[:, 1], lons, atol=0.5 / 10 ** precision + 1e-12)
+
+
+def test_pack_binary_shapes_round_trip():
+    shapes = {
+        "S1": (np.array([40.70, 40.71, 40.72]), np.array([-74.00, -74.01, -74.02])),
+        "LONGER_ID": (np.array([40.80, 40.81]), np.array([-73.90, -73.91])),
+    }
+    body = pack_binary_shapes([
+        (shape_id, len(lats), encode_float32(lats, lons)) for shape_id, (lats, lons) in shapes.items()
+    ])
+
+    (count,), offset = struct.unpack_from("<I", body), 4
+    assert count == len(shapes)
+    for shape_id, (lats, lons) in shapes.items():
+        point_count, id_length = struct.unpack_from("<II", body, offset)
+        offset += 8
+        assert body[offset:offset + id_length].decode("utf-8") == shape_id
+        offset += id_length + (-id_length % 4)
+        assert offset % 4 == 0
+        pairs = np.frombuffer(body, dtype="<f4", count=point_count * 2, offset=offset).reshape(-1, 2)
+        np.testing.assert_array_equal(pairs[:, 0], lons.astype(np.float32))
+        np.testing.assert_array_equal(pairs[:, 1], lats.astype(np.float32))
+        offset += point_count * 8
+    assert offset == len(body)
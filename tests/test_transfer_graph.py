@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from utils.transfer_graph import DISTANCE_SOURCE, TRANSFERS_SOURCE, TransferGraph, compute_transfers, walk_seconds
+
+
+# Stations P (platforms P1, P2) and Q (platform Q1), about 300 m apart;
+# F is a stop without a station, over a mile away
+STOP_IDS = ["F", "P", "P1", "P2", "Q", "Q1"]
+LATS = np.array([40.7700, 40.75005, 40.7500, 40.7501, 40.7527, 40.7527])
+LONS = np.array([-73.9900, -73.9900, -73.9900, -73.9900, -73.9900, -73.9900])
+PARENT_STATIONS = [None, None, "P", "P", None, "Q"]
+
+
+def _rules(*rows) -> pd.DataFrame:
+    return pd.DataFrame(list(rows), columns=["from_stop_id", "to_stop_id", "transfer_type", "min_transfer_time"])
+
+
+def _links(transfers=None, parent_stations=PARENT_STATIONS):
+    links = compute_transfers(STOP_IDS, LATS, LONS, transfers, parent_stations=parent_stations)
+    return {(row.from_stop_id, row.to_stop_id): (row.walk_secs, row.source) for row in links.itertuples()}
+
+
+def test_distance_links_are_symmetric():
+    links = _links()
+    assert links[("P1", "P2")] == links[("P2", "P1")]
+    assert links[("P1", "P2")][1] == DISTANCE_SOURCE
+    assert links[("P1", "P2")][0] < 20
+    assert not any("F" in pair for pair in links)
+
+
+def test_same_station_rule_sets_minimum_time_between_platforms():
+    links = _links(_rules(("P", "P", 2, 180)))
+    assert links[("P1", "P2")] == (180, TRANSFERS_SOURCE)
+    assert links[("P2", "P1")] == (180, TRANSFERS_SOURCE)
+    # Not between the station and its own platforms, nor to other stations
+    assert links[("P1", "Q1")][1] == DISTANCE_SOURCE
+
+
+def test_same_station_rule_keeps_slower_walks():
+    far = LATS.copy()
+    far[3] = 40.7530
+    links = compute_transfers(STOP_IDS, far, LONS, _rules(("P", "P", 2, 60)), parent_stations=PARENT_STATIONS)
+    walk = links[(links["from_stop_id"] == "P1") & (links["to_stop_id"] == "P2")]["walk_secs"].item()
+    assert walk > 60
+
+
+def test_station_rule_applies_to_child_platforms():
+    links = _links(_rules(("P", "Q", 2, 300), ("F", "Q", 0, None)))
+    for platform in ("P1", "P2"):
+        assert links[(platform, "Q1")] == (300, TRANSFERS_SOURCE)
+        assert links[("Q1", platform)] == (300, TRANSFERS_SOURCE)
+    # Beyond the walking radius, added by the rule at walking speed
+    distance_walk = links[("F", "Q1")]
+    assert distance_walk[1] == TRANSFERS_SOURCE
+    assert distance_walk[0] > 300
+
+
+def test_stop_rule_overrides_station_rule():
+    links = _links(_rules(("P", "Q", 2, 300), ("P2", "Q1", 3, None), ("P", "P", 2, 180), ("P1", "P2", 2, 90)))
+    assert links[("P1", "Q1")] == (300, TRANSFERS_SOURCE)
+    assert ("P2", "Q1") not in links and ("Q1", "P2") not in links
+    assert links[("P1", "P2")] == (90, TRANSFERS_SOURCE)
+
+
+def test_station_rules_without_parent_stations():
+    links = _links(_rules(("P", "P", 2, 180), ("P", "Q", 2, 300)), parent_stations=None)
+    assert links[("P", "Q")] == (300, TRANSFERS_SOURCE)
+    assert links[("P1", "P2")][1] == DISTANCE_SOURCE
+
+
+def test_transfer_graph_from_frame():
+    links = compute_transfers(STOP_IDS, LATS, LONS, _rules(("P", "P", 2, 180)), parent_stations=PARENT_STATIONS)
+    graph = TransferGraph.from_frame(STOP_IDS, links)
+    transfers = graph.transfers_from("P1")
+    assert [secs for _, secs, _ in transfers] == sorted(secs for _, secs, _ in transfers)
+    assert ("P2", 180) in [(stop_id, secs) for stop_id, secs, _ in transfers]
+    assert walk_seconds(np.array([0.0]))[0] == 0
+
+
+def test_both_directions_take_slowest_rule_per_pair():
+    links = _links(_rules(("P1", "Q1", 2, 100), ("Q1", "P1", 2, 200), ("P1", "F", 2, 500)))
+    assert links[("P1", "Q1")] == links[("Q1", "P1")] == (200, TRANSFERS_SOURCE)
+    assert links[("P1", "F")] == links[("F", "P1")] == (500, TRANSFERS_SOURCE)
@@ -0,0 +1,209 @@
+from typing import Any, Dict, List, Tuple
+import duckdb
+import numpy as np
+import pytest
+from database_connector import DatabaseConnector
+from utils.feed_indexes import invalidate_feed_indexes
+from utils.vector_tiles import (
+    EXTENT, ROUTES_LAYER, STOP_MIN_ZOOM, STOPS_LAYER, VectorTileSource, clip_line, mercator
+)
+
+
+STOPS = [
+    ("S1", "First Stop", 40.7500, -73.9900),
+    ("S2", "Second Stop", 40.7520, -73.9880),
+]
+
+ROUTES = [
+    ("R1", "1", "One", 3, "EE352E"),
+    ("R2", "2", "Two", 3, None),
+    ("R3", "3", "Three", 1, "0039A6"),
+]
+
+# route_id, shape_id, trip_count, covered_by: R1 and R2 share SH1; SH3
+# lies along SH2 and is not drawn
+ROUTE_SHAPES = [
+    ("R1", "SH1", 10, None),
+    ("R2", "SH1", 4, None),
+    ("R3", "SH2", 8, None),
+    ("R3", "SH3", 2, "SH2"),
+]
+
+SHAPES = {
+    "SH1": ([40.7500, 40.7510, 40.7520], [-73.9900, -73.9890, -73.9880]),
+    "SH2": ([40.7490, 40.7500, 40.7515], [-73.9920, -73.9895, -73.9885]),
+    "SH3": ([40.7500, 40.7515], [-73.9895, -73.9885]),
+}
+
+
+def _varint(data: bytes, i: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, i
+
+
+def _fields(data: bytes) -> List[Tuple[int, Any]]:
+    fields, i = [], 0
+    while i < len(data):
+        key, i = _varint(data, i)
+        wire_type = key & 0x7
+        if wire_type == 0:
+            value, i = _varint(data, i)
+        elif wire_type == 1:
+            value, i = data[i:i + 8], i + 8
+        elif wire_type == 2:
+            length, i = _varint(data, i)
+            value, i = data[i:i + length], i + length
+        else:
+            raise ValueError(f"Unexpected wire type {wire_type}")
+        fields.append((key >> 3, value))
+    return fields
+
+
+def _packed(data: bytes) -> List[int]:
+    values, i = [], 0
+    while i < len(data):
+        value, i = _varint(data, i)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def decode_tile(tile: bytes) -> Dict[str, Dict[str, Any]]:
+    """Minimal Mapbox Vector Tile decoder: layer name -> version, extent and features."""
+    layers = {}
+    for field, layer in _fields(tile):
+        assert field == 3
+        layer_fields = _fields(layer)
+        keys = [value.decode("utf-8") for number, value in layer_fields if number == 3]
+        values = []
+        for number, value in layer_fields:
+            if number == 4:
+                (value_type, raw), = _fields(value)
+                values.append(raw.decode("utf-8") if value_type == 1 else raw)
+        features = []
+        for number, value in layer_fields:
+            if number != 2:
+                continue
+            feature = dict(_fields(value))
+            tags = _packed(feature.get(2, b""))
+            commands = _packed(feature[4])
+            parts, x, y, i = [], 0, 0, 0
+            while i < len(commands):
+                command, count = commands[i] & 0x7, commands[i] >> 3
+                i += 1
+                if command == 1:
+                    parts.append([])
+                for _ in range(count):
+                    x += _unzigzag(commands[i])
+                    y += _unzigzag(commands[i + 1])
+                    i += 2
+                    parts[-1].append((x, y))
+            features.append({
+                "id": feature.get(1),
+                "type": feature[3],
+                "properties": {keys[tags[j]]: values[tags[j + 1]] for j in range(0, len(tags), 2)},
+                "geometry": parts,
+            })
+        fields = dict(layer_fields)
+        layers[fields[1].decode("utf-8")] = {"version": fields[15], "extent": fields[5], "features": features}
+    return layers
+
+
+def tile_of(lat: float, lon: float, z: int) -> Tuple[int, int]:
+    xs, ys = mercator(np.array([lat]), np.array([lon]))
+    return int(xs[0] * 2 ** z), int(ys[0] * 2 ** z)
+
+
+@pytest.fixture
+def tile_source():
+    db = DatabaseConnector(connection=duckdb.connect())
+    db.execute("""
+        CREATE TABLE stops (
+            stop_id VARCHAR, stop_name VARCHAR, stop_lat DOUBLE, stop_lon DOUBLE, location_type INTEGER,
+            wheelchair_boarding INTEGER, platform_code VARCHAR, stop_desc VARCHAR, zone_id VARCHAR
+        )
+    """)
+    db.execute("""
+        CREATE TABLE routes (
+            route_id VARCHAR, route_short_name VARCHAR, route_long_name VARCHAR, route_type INTEGER, route_color VARCHAR
+        )
+    """)
+    db.execute("CREATE TABLE route_shapes (route_id VARCHAR, shape_id VARCHAR, trip_count INTEGER, covered_by VARCHAR)")
+    db.execute("CREATE TABLE shape_tiers (shape_id VARCHAR, tier INTEGER, lats DOUBLE[], lons DOUBLE[])")
+    for stop in STOPS:
+        db.execute("INSERT INTO stops VALUES (?, ?, ?, ?, 0, 1, NULL, NULL, NULL)", list(stop))
+    for route in ROUTES:
+        db.execute("INSERT INTO routes VALUES (?, ?, ?, ?, ?)", list(route))
+    for route_shape in ROUTE_SHAPES:
+        db.execute("INSERT INTO route_shapes VALUES (?, ?, ?, ?)", list(route_shape))
+    for shape_id, (lats, lons) in SHAPES.items():
+        for tier in range(5):
+            db.execute("INSERT INTO shape_tiers VALUES (?, ?, ?, ?)", [shape_id, tier, lats, lons])
+
+    invalidate_feed_indexes()
+    try:
+        yield VectorTileSource.from_database(db)
+    finally:
+        invalidate_feed_indexes()
+
+
+def test_tile_layers_and_features(tile_source):
+    x, y = tile_of(40.7510, -73.9890, 14)
+    layers = decode_tile(tile_source.tile(14, x, y))
+
+    assert set(layers) == {ROUTES_LAYER, STOPS_LAYER}
+    for layer in layers.values():
+        assert layer["version"] == 2
+        assert layer["extent"] == EXTENT
+
+    routes = layers[ROUTES_LAYER]["features"]
+    assert sorted((f["properties"]["route_id"], f["properties"]["shape_id"]) for f in routes) == [
+        ("R1", "SH1"), ("R2", "SH1"), ("R3", "SH2"),
+    ]
+    by_route = {f["properties"]["route_id"]: f for f in routes}
+    assert by_route["R1"]["properties"]["route_color"] == "#EE352E"
+    assert by_route["R2"]["properties"]["route_color"] == "#FFFFFF"
+    for feature in routes:
+        assert feature["type"] == 2
+        assert feature["geometry"] and all(len(part) >= 2 for part in feature["geometry"])
+    # Routes sharing a shape are drawn over the same geometry
+    assert by_route["R1"]["geometry"] == by_route["R2"]["geometry"]
+    assert by_route["R1"]["geometry"] != by_route["R3"]["geometry"]
+
+    stops = layers[STOPS_LAYER]["features"]
+    assert sorted(f["properties"]["stop_id"] for f in stops) == ["S1", "S2"]
+    for feature in stops:
+        assert feature["type"] == 1
+        (point,), = feature["geometry"]
+        assert 0 <= point[0] < EXTENT and 0 <= point[1] < EXTENT
+
+
+def test_stops_left_out_below_min_zoom(tile_source):
+    x, y = tile_of(40.7510, -73.9890, STOP_MIN_ZOOM - 1)
+    layers = decode_tile(tile_source.tile(STOP_MIN_ZOOM - 1, x, y))
+    assert set(layers) == {ROUTES_LAYER}
+    assert len(layers[ROUTES_LAYER]["features"]) == 3
+
+
+def test_empty_tile(tile_source):
+    x, y = tile_of(51.5, -0.12, 14)
+    assert tile_source.tile(14, x, y) == b""
+
+
+def test_clip_line():
+    xs = np.array([-100.0, 50.0, 200.0])
+    ys = np.array([10.0, 10.0, 10.0])
+    assert clip_line(xs, ys, 0, 100) == [([0, 50, 100], [10, 10, 10])]
+    # Leaves and re-enters the square
+    xs = np.array([10.0, 10.0, 10.0, 10.0])
+    ys = np.array([10.0, 150.0, 160.0, 20.0])
+    assert clip_line(xs, ys, 0, 100) == [([10, 10], [10, 100]), ([10, 10], [100, 20])]
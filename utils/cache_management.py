@@ -3,9 +3,11 @@ Cache management utilities for the transit API.
 Provides cache invalidation strategies and cache warming functionality.
 """
 
+import asyncio
 from typing import List, Optional, Dict, Any
 from endpoint_handlers.route_handlers.get_all_routes import get_all_routes
-from utils.caching import get_global_cache, invalidate_cache_pattern
+from utils.caching import get_global_cache, invalidate_cache_pattern, set_data_version, get_data_version
+from utils.response_cache import get_response_cache
 from database_connector import DatabaseConnector
 
 class CacheManager:
@@ -15,6 +17,7 @@ class CacheManager:
     
     def __init__(self):
         self.cache = get_global_cache()
+        self.response_cache = get_response_cache()
         self._invalidation_patterns = {
             'stops': ['get_stop_by_id_handler', 'search_stops_handler', 'get_stop_routes_handler'],
             'routes': ['get_all_routes', 'get_route_by_id', 'get_route_stops', 'get_route_shape'],
@@ -22,6 +25,7 @@ class CacheManager:
             'system': ['get_system_status', 'get_active_alerts', 'get_system_stats'],
             'geospatial': ['get_nearby_stops_handler', 'get_nearby_routes']
         }
+        self._cleanup_task: Optional[asyncio.Task] = None
     
     def invalidate_stop_cache(self, stop_id: Optional[str] = None) -> int:
         """
@@ -131,9 +135,30 @@ class CacheManager:
     
     def invalidate_all_cache(self) -> None:
         """
-        Clear all cache entries.
+        Clear all cache entries, including cached responses.
         """
         self.cache.clear()
+        self.response_cache.clear()
+    
+    def refresh_data_version(self, db: DatabaseConnector) -> str:
+        """
+        Namespace cache keys by the data version recorded at import time.
+        
+        Args:
+            db: Database connector instance
+            
+        Returns:
+            The data version now in use
+        """
+        try:
+            rows = db.execute("SELECT value FROM import_metadata WHERE key = 'data_version'")
+        except Exception as e:
+            print(f"Could not read data version, keeping '{get_data_version()}': {e}")
+            return get_data_version()
+        
+        if rows:
+            set_data_version(rows[0][0])
+        return get_data_version()
     
     def get_cache_health(self) -> Dict[str, Any]:
         """
@@ -162,6 +187,7 @@ class CacheManager:
             "health_score": round(health_score, 2),
             "health_status": health_status,
             "statistics": stats,
+            "response_cache": self.response_cache.get_stats(),
             "recommendations": self._get_cache_recommendations(stats, cache_info)
         }
     
@@ -188,8 +214,10 @@ class CacheManager:
         if cache_size < 10 and total_requests > 100:
             recommendations.append("Cache size is small relative to request volume. Check TTL settings.")
         
-        if cache_size > 1000:
-            recommendations.append("Large cache size detected. Consider implementing cache size limits.")
+        evictions = stats.get('evictions', 0)
+        sets = stats.get('sets', 0)
+        if sets and evictions > sets * 0.5:
+            recommendations.append("Most cached entries are evicted for space. Consider raising CACHE_MAX_ENTRIES or CACHE_MAX_BYTES.")
         
         
         expired_count = sum(1 for entry in cache_info.get('entries', []) if entry.get('is_expired', False))
@@ -213,7 +241,39 @@ class CacheManager:
         Returns:
             Number of entries removed
         """
-        return self.cache.cleanup_expired()
+        return self.cache.cleanup_expired() + self.response_cache.cleanup_expired()
+    
+    def start_cleanup_task(self, interval: int = 300) -> None:
+        """
+        Start the background task that sweeps expired entries every ``interval`` seconds.
+        
+        Must be called from a running event loop, normally the application lifespan.
+        """
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop(interval))
+    
+    async def stop_cleanup_task(self) -> None:
+        """
+        Cancel the background cleanup task and wait for it to finish.
+        """
+        if self._cleanup_task is None:
+            return
+        self._cleanup_task.cancel()
+        try:
+            await self._cleanup_task
+        except asyncio.CancelledError:
+            pass
+        self._cleanup_task = None
+    
+    async def _cleanup_loop(self, interval: int) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                removed_count = await asyncio.to_thread(self.cleanup_expired_entries)
+                if removed_count > 0:
+                    print(f"Cache cleanup: removed {removed_count} expired entries")
+            except Exception as e:
+                print(f"Cache cleanup error: {e}")
     
     async def warm_cache(self, db: DatabaseConnector) -> Dict[str, int]:
         """
@@ -1,19 +1,66 @@
+import os
+import sys
 import time
 import threading
-from typing import Any, Optional, Dict, Callable, Union
+import inspect
+from collections import OrderedDict
+from typing import Any, Optional, Dict, Callable, Union, Iterable, Tuple
 from functools import wraps
 from datetime import datetime, timedelta
 import hashlib
+from abc import ABC, abstractmethod
 import json
+import duckdb
+from starlette.requests import Request
+from starlette.responses import Response
+from database_connector import DatabaseConnector
+
+
+DEFAULT_FLOAT_PRECISION = 5
+KEY_SEPARATOR = ":"
+VERSION_SEPARATOR = "#"
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+DEFAULT_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "tinylfu")
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Estimate the memory held by a cached value in bytes.
+
+    Walks containers, pydantic models and plain objects once, so the cost is
+    paid at insertion time rather than on every stats call.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(v, _seen) for v in value)
+    if isinstance(getattr(value, "nbytes", None), int):
+        # NumPy arrays and Arrow tables report their buffer sizes
+        return size + value.nbytes
+    if hasattr(value, "__dict__"):
+        return size + estimate_size(vars(value), _seen)
+    return size
 
 
 class CacheEntry:
-    def __init__(self, value: Any, ttl_seconds: Optional[int] = None):
+    def __init__(self, value: Any, ttl_seconds: Optional[int] = None, size: Optional[int] = None):
         self.value = value
         self.created_at = time.time()
         self.ttl_seconds = ttl_seconds
         self.access_count = 0
         self.last_accessed = self.created_at
+        self.size = estimate_size(value) if size is None else size
 
     def is_expired(self) -> bool:
         if self.ttl_seconds is None:
@@ -26,17 +73,224 @@ class CacheEntry:
         return self.value
 
 
+class EvictionPolicy(ABC):
+    """
+    Decides which key leaves the cache when it is over budget.
+
+    The cache calls the ``record_*`` hooks under its lock; every hook and
+    ``victim()`` must run in O(1).
+    """
+
+    @abstractmethod
+    def record_insert(self, key: str) -> None:
+        """Track a key added to the cache."""
+
+    @abstractmethod
+    def record_access(self, key: str) -> None:
+        """Track a read or overwrite of a cached key."""
+
+    @abstractmethod
+    def record_removal(self, key: str) -> None:
+        """Forget a key that left the cache."""
+
+    @abstractmethod
+    def victim(self) -> Optional[str]:
+        """Key to evict next, or None if nothing is tracked."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Forget every key."""
+
+
+class LRUPolicy(EvictionPolicy):
+    """Evicts the least recently used key."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._order: "OrderedDict[str, None]" = OrderedDict()
+
+    def record_insert(self, key: str) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def record_access(self, key: str) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def record_removal(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def victim(self) -> Optional[str]:
+        return next(iter(self._order), None)
+
+    def clear(self) -> None:
+        self._order.clear()
+
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent access frequencies with periodic aging.
+
+    Counters saturate at 15 and are halved every ``sample_size`` increments
+    so the sketch tracks recent popularity rather than all-time counts.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+
+    def __init__(self, capacity: int):
+        width = 16
+        while width < capacity:
+            width <<= 1
+        self._mask = width - 1
+        self._table = [[0] * width for _ in range(self.DEPTH)]
+        self._sample_size = 10 * width
+        self._additions = 0
+
+    def _indexes(self, key: str):
+        h = hash(key)
+        for row in range(self.DEPTH):
+            h = (h * 0x9E3779B1 + row) & 0xFFFFFFFFFFFF
+            yield row, (h ^ (h >> 17)) & self._mask
+
+    def frequency(self, key: str) -> int:
+        return min(self._table[row][index] for row, index in self._indexes(key))
+
+    def increment(self, key: str) -> None:
+        added = False
+        for row, index in self._indexes(key):
+            if self._table[row][index] < self.MAX_COUNT:
+                self._table[row][index] += 1
+                added = True
+        if added:
+            self._additions += 1
+            if self._additions >= self._sample_size:
+                self._age()
+
+    def _age(self) -> None:
+        for row in self._table:
+            for i, count in enumerate(row):
+                row[i] = count >> 1
+        self._additions //= 2
+
+    def clear(self) -> None:
+        for row in self._table:
+            for i in range(len(row)):
+                row[i] = 0
+        self._additions = 0
+
+
+class WTinyLFUPolicy(EvictionPolicy):
+    """
+    Window TinyLFU eviction.
+
+    New keys enter a small LRU window. Keys pushed out of the window join the
+    probation segment of a segmented LRU and must beat the probation victim's
+    estimated frequency to stay; keys hit again in probation are promoted to
+    the protected segment. One-off keys (a single nearby or search lookup)
+    are therefore evicted before popular ones.
+    """
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._window_capacity = max(1, int(max_entries * self.WINDOW_RATIO))
+        main_capacity = max(1, max_entries - self._window_capacity)
+        self._protected_capacity = max(1, int(main_capacity * self.PROTECTED_RATIO))
+
+        self._window: "OrderedDict[str, None]" = OrderedDict()
+        self._probation: "OrderedDict[str, None]" = OrderedDict()
+        self._protected: "OrderedDict[str, None]" = OrderedDict()
+        self._candidate: Optional[str] = None
+        self._sketch = FrequencySketch(max_entries)
+
+    def record_insert(self, key: str) -> None:
+        self._sketch.increment(key)
+        self._window[key] = None
+        if len(self._window) > self._window_capacity:
+            candidate, _ = self._window.popitem(last=False)
+            self._probation[candidate] = None
+            self._candidate = candidate
+
+    def record_access(self, key: str) -> None:
+        self._sketch.increment(key)
+        if key in self._window:
+            self._window.move_to_end(key)
+        elif key in self._protected:
+            self._protected.move_to_end(key)
+        elif key in self._probation:
+            del self._probation[key]
+            self._protected[key] = None
+            if len(self._protected) > self._protected_capacity:
+                demoted, _ = self._protected.popitem(last=False)
+                self._probation[demoted] = None
+
+    def record_removal(self, key: str) -> None:
+        for segment in (self._window, self._probation, self._protected):
+            if key in segment:
+                del segment[key]
+                break
+        if self._candidate == key:
+            self._candidate = None
+
+    def victim(self) -> Optional[str]:
+        if self._probation:
+            head = next(iter(self._probation))
+            candidate = self._candidate
+            if candidate is not None and candidate != head and candidate in self._probation:
+                if self._sketch.frequency(candidate) <= self._sketch.frequency(head):
+                    return candidate
+            return head
+        if self._protected:
+            return next(iter(self._protected))
+        return next(iter(self._window), None)
+
+    def clear(self) -> None:
+        self._window.clear()
+        self._probation.clear()
+        self._protected.clear()
+        self._candidate = None
+        self._sketch.clear()
+
+
+EVICTION_POLICIES: Dict[str, Callable[[int], EvictionPolicy]] = {
+    "lru": LRUPolicy,
+    "tinylfu": WTinyLFUPolicy,
+}
+
+
+def create_eviction_policy(name: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> EvictionPolicy:
+    if name not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown eviction policy: {name}. Use one of {sorted(EVICTION_POLICIES)}")
+    return EVICTION_POLICIES[name](max_entries)
+
+
 class InMemoryCache:
-    def __init__(self, default_ttl: Optional[int] = 300):
+    def __init__(
+        self,
+        default_ttl: Optional[int] = 300,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        policy: Union[str, EvictionPolicy] = DEFAULT_EVICTION_POLICY
+    ):
         self._cache: Dict[str, CacheEntry] = {}
         self._lock = threading.RLock()
         self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._policy = (
+            policy if isinstance(policy, EvictionPolicy)
+            else create_eviction_policy(policy, max_entries or DEFAULT_MAX_ENTRIES)
+        )
+        self._total_bytes = 0
         self._stats = {
             'hits': 0,
             'misses': 0,
             'sets': 0,
             'deletes': 0,
-            'evictions': 0
+            'evictions': 0,
+            'expirations': 0,
+            'rejected': 0
         }
 
     def _generate_key(self, key: Union[str, tuple, dict]) -> str:
@@ -48,6 +302,25 @@ class InMemoryCache:
             return hashlib.md5(json.dumps(key, sort_keys=True).encode()).hexdigest()
         return hashlib.md5(str(key).encode()).hexdigest()
 
+    def _remove(self, cache_key: str) -> CacheEntry:
+        entry = self._cache.pop(cache_key)
+        self._total_bytes -= entry.size
+        self._policy.record_removal(cache_key)
+        return entry
+
+    def _over_budget(self) -> bool:
+        if self.max_entries is not None and len(self._cache) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._total_bytes > self.max_bytes
+
+    def _evict_to_budget(self) -> None:
+        while self._cache and self._over_budget():
+            victim = self._policy.victim()
+            if victim is None or victim not in self._cache:
+                break
+            self._remove(victim)
+            self._stats['evictions'] += 1
+
     def get(self, key):
         cache_key = self._generate_key(key)
         with self._lock:
@@ -57,46 +330,82 @@ class InMemoryCache:
                 return None
 
             if entry.is_expired():
-                del self._cache[cache_key]
-                self._stats['evictions'] += 1
+                self._remove(cache_key)
+                self._stats['expirations'] += 1
                 self._stats['misses'] += 1
                 return None
 
             self._stats['hits'] += 1
+            self._policy.record_access(cache_key)
             return entry.access()
 
     def set(self, key, value, ttl: Optional[int] = None):
         cache_key = self._generate_key(key)
         ttl_to_use = ttl if ttl is not None else self.default_ttl
+        entry = CacheEntry(value, ttl_to_use)
+
         with self._lock:
-            self._cache[cache_key] = CacheEntry(value, ttl_to_use)
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                # The old value must not outlive the write that replaced it
+                if cache_key in self._cache:
+                    self._remove(cache_key)
+                self._stats['rejected'] += 1
+                return
+
+            if cache_key in self._cache:
+                self._total_bytes -= self._cache[cache_key].size
+                self._policy.record_access(cache_key)
+            else:
+                self._policy.record_insert(cache_key)
+
+            self._cache[cache_key] = entry
+            self._total_bytes += entry.size
             self._stats['sets'] += 1
+            self._evict_to_budget()
 
     def delete(self, key) -> bool:
         cache_key = self._generate_key(key)
         with self._lock:
             if cache_key in self._cache:
-                del self._cache[cache_key]
+                self._remove(cache_key)
                 self._stats['deletes'] += 1
                 return True
             return False
 
+    def delete_matching(self, predicate: Callable[[str], bool]) -> int:
+        with self._lock:
+            matching = [k for k in self._cache if predicate(k)]
+            for k in matching:
+                self._remove(k)
+            self._stats['deletes'] += len(matching)
+            return len(matching)
+
     def clear(self):
         with self._lock:
             self._cache.clear()
+            self._policy.clear()
+            self._total_bytes = 0
             self._stats = {k: 0 for k in self._stats}
 
     def cleanup_expired(self) -> int:
         with self._lock:
             expired = [k for k, v in self._cache.items() if v.is_expired()]
             for k in expired:
-                del self._cache[k]
-                self._stats['evictions'] += 1
+                self._remove(k)
+                self._stats['expirations'] += 1
             return len(expired)
 
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def hit_rate(self) -> float:
+        """Hit rate from the running counters, without taking the lock."""
+        hits = self._stats['hits']
+        total_requests = hits + self._stats['misses']
+        return hits / total_requests if total_requests else 0
+
     def get_stats(self) -> Dict[str, Any]:
         with self._lock:
-            values = list(self._cache.values())
             total_requests = self._stats['hits'] + self._stats['misses']
             hit_rate = self._stats['hits'] / total_requests if total_requests else 0
 
@@ -104,8 +413,11 @@ class InMemoryCache:
                 **self._stats,
                 'total_requests': total_requests,
                 'hit_rate': hit_rate,
-                'cache_size': len(values),
-                'memory_usage_estimate': sum(len(str(e.value)) for e in values)
+                'cache_size': len(self._cache),
+                'memory_usage_estimate': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'eviction_policy': type(self._policy).__name__
             }
 
     def get_cache_info(self) -> Dict[str, Any]:
@@ -124,7 +436,7 @@ class InMemoryCache:
                     entry.created_at + entry.ttl_seconds
                 ).isoformat() if entry.ttl_seconds else None,
                 'is_expired': entry.is_expired(),
-                'size_estimate': len(str(entry.value))
+                'size_estimate': entry.size
             })
 
         return {
@@ -134,28 +446,174 @@ class InMemoryCache:
 
 
 _global_cache = InMemoryCache()
+_data_version = "0"
+_unkeyed_types: Tuple[type, ...] = (DatabaseConnector, duckdb.DuckDBPyConnection, Request, Response)
+
+
+def get_global_cache() -> InMemoryCache:
+    return _global_cache
+
+
+def set_data_version(version: str) -> None:
+    """
+    Set the data-version token appended to every cache key.
+
+    Changing the token makes entries cached for an older import unreachable.
+    """
+    global _data_version
+    _data_version = str(version)
+
+
+def get_data_version() -> str:
+    return _data_version
+
+
+def register_unkeyed_type(cls: type) -> None:
+    """Exclude arguments of this type (connections, requests, ...) from cache keys."""
+    global _unkeyed_types
+    if cls not in _unkeyed_types:
+        _unkeyed_types = _unkeyed_types + (cls,)
 
 
-def cached(ttl: Optional[int] = None, key_func: Optional[Callable] = None):
+def normalize_text(value: str) -> str:
+    """Collapse whitespace and case so equivalent search text shares a key."""
+    return " ".join(value.split()).casefold()
+
+
+def canonicalize_value(value: Any, float_precision: int = DEFAULT_FLOAT_PRECISION) -> str:
+    """
+    Render an argument value as a stable cache key component.
+
+    Floats are rounded to ``float_precision`` decimals so coordinates that only
+    differ by noise share a key; containers are rendered recursively.
+    """
+    if value is None or isinstance(value, bool):
+        return str(value)
+    if isinstance(value, float):
+        rounded = round(value, float_precision)
+        return f"{rounded + 0.0:.{float_precision}f}"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\").replace(KEY_SEPARATOR, "\\" + KEY_SEPARATOR)
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(canonicalize_value(v, float_precision) for v in value) + "]"
+    if isinstance(value, dict):
+        items = sorted((str(k), canonicalize_value(v, float_precision)) for k, v in value.items())
+        return "{" + ",".join(f"{k}={v}" for k, v in items) + "}"
+    return canonicalize_value(str(value), float_precision)
+
+
+def build_cache_key(
+    namespace: str,
+    arguments: Iterable[Tuple[str, Any]],
+    float_precision: int = DEFAULT_FLOAT_PRECISION,
+    text_args: Iterable[str] = ()
+) -> str:
+    """
+    Build a cache key of the form ``namespace:arg1:arg2#data_version``.
+
+    Args:
+        namespace: Usually the cached function's name
+        arguments: (name, value) pairs in signature order
+        float_precision: Decimal places kept for float arguments
+        text_args: Names of free-text arguments to normalise
+
+    Returns:
+        Cache key string
+    """
+    text_args = set(text_args)
+    parts = [namespace]
+    for name, value in arguments:
+        if isinstance(value, _unkeyed_types):
+            continue
+        if name in text_args and isinstance(value, str):
+            value = normalize_text(value)
+        parts.append(canonicalize_value(value, float_precision))
+    return KEY_SEPARATOR.join(parts) + VERSION_SEPARATOR + _data_version
+
+
+def invalidate_cache_pattern(pattern: str) -> int:
+    """
+    Remove cached entries whose key starts with ``pattern``.
+
+    The pattern must end on a key component boundary, e.g.
+    ``"get_stop_by_id_handler"`` or ``"get_stop_by_id_handler:123"``.
+
+    Returns:
+        Number of entries removed
+    """
+    boundaries = (pattern + KEY_SEPARATOR, pattern + VERSION_SEPARATOR)
+    return _global_cache.delete_matching(
+        lambda key: key == pattern or key.startswith(boundaries)
+    )
+
+
+def get_cache_headers(max_age: int, public: bool = True) -> Dict[str, str]:
+    """
+    HTTP caching headers for a response that may be reused for ``max_age`` seconds.
+    """
+    visibility = "public" if public else "private"
+    return {"Cache-Control": f"{visibility}, max-age={max_age}"}
+
+
+def cached(
+    ttl: Optional[int] = None,
+    key_func: Optional[Callable] = None,
+    float_precision: int = DEFAULT_FLOAT_PRECISION,
+    text_args: Iterable[str] = ()
+):
+    """
+    Cache a function's results in the global cache.
+
+    Keys are namespaced by function name and the current data version.
+    Connection and request arguments are left out of the key, floats are
+    rounded to ``float_precision`` and arguments named in ``text_args`` are
+    case- and whitespace-normalised.
+    """
+    text_args = tuple(text_args)
+
     def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        stats = {'hits': 0, 'misses': 0}
+        stats_lock = threading.Lock()
+
+        def make_key(*args, **kwargs) -> str:
+            if key_func:
+                return key_func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return build_cache_key(func.__name__, bound.arguments.items(), float_precision, text_args)
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            cache_key = (
-                key_func(*args, **kwargs)
-                if key_func
-                else f"{func.__name__}:{hash((args, tuple(sorted(kwargs.items()))))}"
-            )
+            cache_key = make_key(*args, **kwargs)
 
             cached_result = _global_cache.get(cache_key)
             if cached_result is not None:
+                with stats_lock:
+                    stats['hits'] += 1
                 return cached_result
 
+            with stats_lock:
+                stats['misses'] += 1
             result = func(*args, **kwargs)
             _global_cache.set(cache_key, result, ttl)
             return result
 
-        wrapper.cache_clear = _global_cache.clear
-        wrapper.cache_info = _global_cache.get_stats
+        def cache_info() -> Dict[str, Any]:
+            with stats_lock:
+                hits, misses = stats['hits'], stats['misses']
+            total = hits + misses
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / total if total else 0
+            }
+
+        wrapper.cache_clear = lambda: invalidate_cache_pattern(func.__name__)
+        wrapper.cache_info = cache_info
+        wrapper.cache_key = make_key
         return wrapper
 
     return decorator
@@ -0,0 +1,122 @@
+"""
+Arrow IPC and Parquet responses.
+Query results are taken from DuckDB as Arrow data and written out as an
+Arrow IPC stream or a Parquet file without building response models.
+Formats are chosen with a ``format`` query parameter or the Accept header.
+"""
+
+import io
+from typing import Dict, Iterator, Optional
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import Response
+
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+COLUMNAR_MEDIA_TYPES = {
+    "arrow": ARROW_STREAM_MEDIA_TYPE,
+    "parquet": PARQUET_MEDIA_TYPE,
+}
+
+PARQUET_COMPRESSION = "zstd"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last ``drain``.
+
+    ``tell`` keeps counting across drains, so Parquet footers get the right offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def negotiate_format(format: Optional[str], accept: Optional[str]) -> Optional[str]:
+    """
+    Columnar format asked for by a request.
+
+    An explicit ``format`` wins; otherwise the Accept header is checked for
+    the Arrow stream or Parquet media types.
+
+    Args:
+        format: Value of the ``format`` query parameter, if any
+        accept: Value of the Accept header, if any
+
+    Returns:
+        "arrow" or "parquet", or None for the endpoint's usual format
+    """
+    if format is not None:
+        return format if format in COLUMNAR_MEDIA_TYPES else None
+    for media_range in (accept or "").lower().split(","):
+        media_type, _, params = media_range.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        for name, columnar_type in COLUMNAR_MEDIA_TYPES.items():
+            if media_type.strip() == columnar_type:
+                return name
+    return None
+
+
+def iter_arrow_stream(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    """Arrow IPC stream of ``reader``, one chunk per record batch."""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, reader.schema) as writer:
+        yield sink.drain()
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_parquet(reader: pa.RecordBatchReader) -> Iterator[bytes]:
+    """Parquet file of ``reader``, written one row group per record batch."""
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, reader.schema, compression=PARQUET_COMPRESSION) as writer:
+        for batch in reader:
+            if batch.num_rows:
+                writer.write_batch(batch)
+                yield sink.drain()
+    yield sink.drain()
+
+
+COLUMNAR_ENCODERS = {
+    "arrow": iter_arrow_stream,
+    "parquet": iter_parquet,
+}
+
+
+def encode_table(table: pa.Table, format: str) -> bytes:
+    """Encode a whole Arrow table as ``format``."""
+    return b"".join(COLUMNAR_ENCODERS[format](pa.RecordBatchReader.from_batches(table.schema, table.to_batches())))
+
+
+def columnar_response(table: pa.Table, format: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Response with ``table`` encoded as an Arrow IPC stream or Parquet file.
+
+    Args:
+        table: Query result
+        format: "arrow" or "parquet"
+        headers: Extra response headers, e.g. cache headers
+    """
+    return Response(content=encode_table(table, format), media_type=COLUMNAR_MEDIA_TYPES[format], headers=headers)
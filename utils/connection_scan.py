@@ -0,0 +1,532 @@
+"""
+Connection Scan journey planner.
+Every pair of consecutive stop events of a trip becomes a connection. The
+connections are held in NumPy arrays sorted by departure time, so an
+earliest-arrival query is a single forward scan from the departure time and
+a profile query (all best journeys over a departure window) is a single
+backward scan. Walking transfers come from the precomputed transfer graph.
+"""
+
+from bisect import bisect_left
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from database_connector import DatabaseConnector
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.gtfs_time import SECONDS_PER_DAY
+from utils.service_calendar import ServiceCalendar, get_service_calendar
+from utils.spatial_index import StopSpatialIndex, get_stop_spatial_index
+from utils.transfer_graph import get_transfer_graph
+
+
+MAX_JOURNEY_SECONDS = 4 * 3600
+
+INFINITY = 2 ** 62
+
+TRANSIT = "transit"
+WALK = "walk"
+
+# Connections are copied to Python lists in blocks of this size while
+# scanning; list indexing is several times faster than NumPy scalar access.
+_SCAN_BLOCK = 4096
+
+
+def load_station_children(db: DatabaseConnector, spatial_index: StopSpatialIndex) -> Dict[str, List[int]]:
+    """Spatial index positions of the child stops of each parent station."""
+    station_children: Dict[str, List[int]] = {}
+    for stop_id, parent_station in db.execute(
+        "SELECT stop_id, parent_station FROM stops WHERE parent_station IS NOT NULL ORDER BY stop_id"
+    ):
+        position = spatial_index.positions.get(stop_id)
+        if position is not None:
+            station_children.setdefault(parent_station, []).append(position)
+    return station_children
+
+
+class Connections:
+    """Connections of one service day frame, sorted by departure time."""
+
+    def __init__(self, dep_stop: np.ndarray, arr_stop: np.ndarray, dep_secs: np.ndarray, arr_secs: np.ndarray, trips: np.ndarray):
+        self.dep_stop = dep_stop
+        self.arr_stop = arr_stop
+        self.dep_secs = dep_secs
+        self.arr_secs = arr_secs
+        self.trips = trips
+
+    def __len__(self) -> int:
+        return len(self.dep_secs)
+
+    def block(self, start: int, end: int) -> Tuple[List[int], List[int], List[int], List[int], List[int]]:
+        return (
+            self.dep_stop[start:end].tolist(),
+            self.arr_stop[start:end].tolist(),
+            self.dep_secs[start:end].tolist(),
+            self.arr_secs[start:end].tolist(),
+            self.trips[start:end].tolist(),
+        )
+
+
+class ConnectionTimetable:
+    """
+    Connection Scan timetable over the whole feed.
+
+    Stops are numbered by their stop spatial index position. A connection is
+    one ride between consecutive stops of a trip; trip positions index
+    ``trips``. Connections of a trip taken from the previous service day (the
+    part of an overnight trip running past 24:00:00) get trip position
+    ``t + len(trips)`` so they never merge with the same trip's run today.
+    """
+
+    def __init__(
+        self,
+        stops: List[Dict[str, Any]],
+        connections: Connections,
+        trips: List[Tuple[str, str, str, Optional[str]]],
+        trip_services: np.ndarray,
+        calendar: Optional[ServiceCalendar],
+        footpaths: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        station_children: Dict[str, List[int]]
+    ):
+        """
+        Args:
+            stops: Stop records by stop position, as held by the spatial index
+            connections: All connections in their trip's service day frame
+            trips: (trip_id, route_id, route_short_name, headsign) by trip position
+            trip_services: Service code of each trip in ``calendar``
+            calendar: Service calendar used to select trips by service date
+            footpaths: CSR arrays (offsets, targets, seconds) by stop position
+            station_children: Stop positions of each parent station's child stops
+        """
+        self.stops = stops
+        self.stop_positions = {record["stop_id"]: i for i, record in enumerate(stops)}
+        self.connections = connections
+        self.trips = trips
+        self.trip_services = np.asarray(trip_services, dtype=np.int32)
+        self.calendar = calendar
+        self.footpath_offsets, self.footpath_targets, self.footpath_secs = footpaths
+        self._footpath_lists = (
+            self.footpath_offsets.tolist(), self.footpath_targets.tolist(), self.footpath_secs.tolist()
+        )
+        self.station_children = station_children
+        self.connections_for = lru_cache(maxsize=8)(self._connections_for)
+
+    def __len__(self) -> int:
+        return len(self.connections)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "ConnectionTimetable":
+        """Build the timetable from ``stop_times``, ``trips``, ``routes`` and the stop spatial index."""
+        spatial_index = get_stop_spatial_index(db)
+        calendar = get_service_calendar(db)
+
+        trip_rows = db.execute("""
+            SELECT
+                t.trip_id,
+                ANY_VALUE(t.route_id),
+                COALESCE(ANY_VALUE(r.route_short_name), ''),
+                ANY_VALUE(t.trip_headsign),
+                ANY_VALUE(t.service_id)
+            FROM trips t
+                     LEFT JOIN routes r ON t.route_id = r.route_id
+            GROUP BY t.trip_id
+            ORDER BY t.trip_id
+        """)
+        trips = [(row[0], row[1], row[2], row[3]) for row in trip_rows]
+        trip_services = calendar.codes_for(row[4] for row in trip_rows)
+
+        events = db.execute_df("""
+            SELECT
+                trip_id,
+                stop_id AS dep_stop_id,
+                COALESCE(departure_secs, arrival_secs) AS dep_secs,
+                LEAD(stop_id) OVER trip_order AS arr_stop_id,
+                LEAD(COALESCE(arrival_secs, departure_secs)) OVER trip_order AS arr_secs
+            FROM stop_times
+            WINDOW trip_order AS (PARTITION BY trip_id ORDER BY stop_sequence)
+        """)
+        events = events.dropna(subset=["arr_stop_id", "dep_secs", "arr_secs"])
+
+        dep_stop = pd.Categorical(events["dep_stop_id"], categories=spatial_index.stop_ids).codes
+        arr_stop = pd.Categorical(events["arr_stop_id"], categories=spatial_index.stop_ids).codes
+        trip_index = pd.Categorical(events["trip_id"], categories=[trip[0] for trip in trips]).codes
+        dep_secs = events["dep_secs"].to_numpy(dtype=np.int64)
+        arr_secs = events["arr_secs"].to_numpy(dtype=np.int64)
+
+        valid = (dep_stop >= 0) & (arr_stop >= 0) & (trip_index >= 0) & (arr_secs >= dep_secs)
+        order = np.lexsort((arr_secs[valid], dep_secs[valid]))
+        connections = Connections(
+            dep_stop[valid][order].astype(np.int32),
+            arr_stop[valid][order].astype(np.int32),
+            dep_secs[valid][order].astype(np.int32),
+            arr_secs[valid][order].astype(np.int32),
+            trip_index[valid][order].astype(np.int32),
+        )
+
+        return cls(
+            spatial_index.records,
+            connections,
+            trips,
+            trip_services,
+            calendar,
+            get_transfer_graph(db).footpaths(),
+            load_station_children(db, spatial_index)
+        )
+
+    def resolve_stop(self, stop_id: str) -> List[int]:
+        """Stop positions for a stop id; a parent station resolves to itself and its child stops."""
+        positions = list(self.station_children.get(stop_id, []))
+        position = self.stop_positions.get(stop_id)
+        if position is not None:
+            positions.insert(0, position)
+        return positions
+
+    def _connections_for(self, service_date: Optional[date]) -> Connections:
+        """
+        Connections running on ``service_date``, in that day's time frame.
+
+        The previous service day's connections arriving after midnight are
+        included with their times moved back one day. Without a date every
+        trip is assumed to run daily.
+        """
+        all_connections = self.connections
+        trip_count = len(self.trips)
+        if service_date is not None and self.calendar is not None:
+            today = self.calendar.active_mask(service_date)[self.trip_services[all_connections.trips]]
+            yesterday = self.calendar.active_mask(service_date - timedelta(days=1))[self.trip_services[all_connections.trips]]
+        else:
+            today = np.ones(len(all_connections), dtype=bool)
+            yesterday = today
+        overnight = yesterday & (all_connections.arr_secs >= SECONDS_PER_DAY)
+
+        dep_secs = np.concatenate([all_connections.dep_secs[today], all_connections.dep_secs[overnight] - SECONDS_PER_DAY])
+        arr_secs = np.concatenate([all_connections.arr_secs[today], all_connections.arr_secs[overnight] - SECONDS_PER_DAY])
+        order = np.lexsort((arr_secs, dep_secs))
+        return Connections(
+            np.concatenate([all_connections.dep_stop[today], all_connections.dep_stop[overnight]])[order],
+            np.concatenate([all_connections.arr_stop[today], all_connections.arr_stop[overnight]])[order],
+            dep_secs[order],
+            arr_secs[order],
+            np.concatenate([all_connections.trips[today], all_connections.trips[overnight] + trip_count])[order],
+        )
+
+    def _target_walks(self, targets: Sequence[int]) -> Dict[int, int]:
+        """Walking seconds from each stop that can reach a target on foot (0 at the targets)."""
+        offsets, footpath_targets, footpath_secs = self._footpath_lists
+        walks = {target: 0 for target in targets}
+        for target in targets:
+            # Footpaths are symmetric, so the paths out of a target are the paths into it
+            for k in range(offsets[target], offsets[target + 1]):
+                stop = footpath_targets[k]
+                if footpath_secs[k] < walks.get(stop, INFINITY):
+                    walks[stop] = footpath_secs[k]
+        return walks
+
+    def earliest_arrival(
+        self,
+        sources: Sequence[int],
+        targets: Sequence[int],
+        departure_secs: int,
+        service_date: Optional[date] = None,
+        max_duration: int = MAX_JOURNEY_SECONDS
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Earliest-arrival journey from any source stop to any target stop.
+
+        Args:
+            sources: Origin stop positions
+            targets: Destination stop positions
+            departure_secs: Earliest departure in seconds since the start of the service day
+            service_date: Calendar date of the service day, None to treat every trip as daily
+            max_duration: Connections departing later than this after ``departure_secs`` are not scanned
+
+        Returns:
+            Journey dict (departure_secs, arrival_secs, legs) or None if no target is reachable
+        """
+        connections = self.connections_for(service_date)
+        offsets, footpath_targets, footpath_secs = self._footpath_lists
+        target_set = set(targets)
+
+        # Walks only start from a ride's arrival (or the origin), since
+        # footpaths do not chain; ``ride`` keeps those arrivals apart from
+        # the best arrival by any means
+        arrival: Dict[int, int] = {}
+        ride: Dict[int, int] = {}
+        via: Dict[int, Tuple] = {}
+        ride_via: Dict[int, Tuple] = {}
+        best = INFINITY
+
+        for source in sources:
+            arrival[source] = departure_secs
+            ride[source] = departure_secs
+        for source in sources:
+            for k in range(offsets[source], offsets[source + 1]):
+                stop, walk_arrival = footpath_targets[k], departure_secs + footpath_secs[k]
+                if walk_arrival < arrival.get(stop, INFINITY):
+                    arrival[stop] = walk_arrival
+                    via[stop] = (WALK, source, footpath_secs[k])
+        for target in target_set:
+            best = min(best, arrival.get(target, INFINITY))
+
+        boarded: Dict[int, int] = {}
+        start = int(np.searchsorted(connections.dep_secs, departure_secs, side="left"))
+        end = int(np.searchsorted(connections.dep_secs, departure_secs + max_duration, side="right"))
+
+        for block_start in range(start, end, _SCAN_BLOCK):
+            if connections.dep_secs[block_start] > best:
+                break
+            dep_stops, arr_stops, dep_times, arr_times, trips = connections.block(block_start, min(block_start + _SCAN_BLOCK, end))
+            for offset, dep_time in enumerate(dep_times):
+                if dep_time > best:
+                    break
+                trip = trips[offset]
+                entered = boarded.get(trip)
+                if entered is None:
+                    if arrival.get(dep_stops[offset], INFINITY) > dep_time:
+                        continue
+                    entered = boarded[trip] = block_start + offset
+
+                arr_stop, arr_time = arr_stops[offset], arr_times[offset]
+                if arr_time >= ride.get(arr_stop, INFINITY) or arr_time >= best:
+                    continue
+                ride[arr_stop] = arr_time
+                ride_via[arr_stop] = (TRANSIT, entered, block_start + offset)
+                if arr_time < arrival.get(arr_stop, INFINITY):
+                    arrival[arr_stop] = arr_time
+                    via[arr_stop] = ride_via[arr_stop]
+                    if arr_stop in target_set:
+                        best = arr_time
+
+                for k in range(offsets[arr_stop], offsets[arr_stop + 1]):
+                    stop, walk_arrival = footpath_targets[k], arr_time + footpath_secs[k]
+                    if walk_arrival < arrival.get(stop, INFINITY):
+                        arrival[stop] = walk_arrival
+                        via[stop] = (WALK, arr_stop, footpath_secs[k])
+                        if stop in target_set and walk_arrival < best:
+                            best = walk_arrival
+
+        if best >= INFINITY:
+            return None
+        target = min(target_set, key=lambda stop: arrival.get(stop, INFINITY))
+        return self._journey(connections, via, ride_via, arrival, target, departure_secs)
+
+    def arrival_times(
+        self,
+        starts: Dict[int, int],
+        service_date: Optional[date] = None,
+        max_duration: int = MAX_JOURNEY_SECONDS
+    ) -> Dict[int, int]:
+        """
+        Earliest arrival at every stop reachable from the starts (a one-to-all query).
+
+        Args:
+            starts: Seconds at which each start stop is reached, e.g. the
+                departure time at an origin stop or the time after walking to a
+                stop near an origin point
+            service_date: Calendar date of the service day, None to treat every trip as daily
+            max_duration: Only stops reached within this many seconds of the
+                earliest start are returned
+
+        Returns:
+            Arrival seconds by stop position
+        """
+        if not starts:
+            return {}
+        connections = self.connections_for(service_date)
+        offsets, footpath_targets, footpath_secs = self._footpath_lists
+        departure_secs = min(starts.values())
+        deadline = departure_secs + max_duration
+
+        arrival = dict(starts)
+        ride = dict(starts)
+        for source, start_secs in starts.items():
+            for k in range(offsets[source], offsets[source + 1]):
+                stop, walk_arrival = footpath_targets[k], start_secs + footpath_secs[k]
+                if walk_arrival < arrival.get(stop, INFINITY):
+                    arrival[stop] = walk_arrival
+
+        boarded = set()
+        start = int(np.searchsorted(connections.dep_secs, departure_secs, side="left"))
+        end = int(np.searchsorted(connections.dep_secs, deadline, side="right"))
+
+        for block_start in range(start, end, _SCAN_BLOCK):
+            dep_stops, arr_stops, dep_times, arr_times, trips = connections.block(block_start, min(block_start + _SCAN_BLOCK, end))
+            for offset, dep_time in enumerate(dep_times):
+                trip = trips[offset]
+                if trip not in boarded:
+                    if arrival.get(dep_stops[offset], INFINITY) > dep_time:
+                        continue
+                    boarded.add(trip)
+
+                arr_stop, arr_time = arr_stops[offset], arr_times[offset]
+                if arr_time > deadline or arr_time >= ride.get(arr_stop, INFINITY):
+                    continue
+                ride[arr_stop] = arr_time
+                if arr_time < arrival.get(arr_stop, INFINITY):
+                    arrival[arr_stop] = arr_time
+
+                for k in range(offsets[arr_stop], offsets[arr_stop + 1]):
+                    stop, walk_arrival = footpath_targets[k], arr_time + footpath_secs[k]
+                    if walk_arrival < arrival.get(stop, INFINITY):
+                        arrival[stop] = walk_arrival
+
+        return {stop: secs for stop, secs in arrival.items() if secs <= deadline}
+
+    def _journey(
+        self,
+        connections: Connections,
+        via: Dict[int, Tuple],
+        ride_via: Dict[int, Tuple],
+        arrival: Dict[int, int],
+        target: int,
+        departure_secs: int
+    ) -> Dict[str, Any]:
+        """Rebuild the journey to ``target``; a walk is preceded by the ride it started from."""
+        legs = []
+        stop = target
+        steps = via
+        while stop in steps and len(legs) <= len(via) + len(ride_via):
+            kind, first, second = steps[stop]
+            if kind == TRANSIT:
+                from_stop = int(connections.dep_stop[first])
+                trip = int(connections.trips[first]) % len(self.trips)
+                legs.append({
+                    "mode": TRANSIT,
+                    "from_stop": from_stop,
+                    "to_stop": stop,
+                    "departure_secs": int(connections.dep_secs[first]),
+                    "arrival_secs": int(connections.arr_secs[second]),
+                    "trip": trip,
+                    "num_stops": int(np.count_nonzero(connections.trips[first:second + 1] == connections.trips[first])),
+                })
+                steps = via
+            else:
+                from_stop = first
+                legs.append({
+                    "mode": WALK,
+                    "from_stop": from_stop,
+                    "to_stop": stop,
+                    "departure_secs": arrival[stop] - second,
+                    "arrival_secs": arrival[stop],
+                })
+                steps = ride_via
+            stop = from_stop
+        legs.reverse()
+
+        return {
+            "departure_secs": legs[0]["departure_secs"] if legs else departure_secs,
+            "arrival_secs": arrival[target],
+            "legs": legs,
+        }
+
+    def profile(
+        self,
+        sources: Sequence[int],
+        targets: Sequence[int],
+        earliest_departure: int,
+        latest_departure: int,
+        service_date: Optional[date] = None,
+        max_duration: int = MAX_JOURNEY_SECONDS
+    ) -> List[Tuple[int, int]]:
+        """
+        Pareto-optimal (departure, arrival) pairs over a departure window.
+
+        Scans connections backwards, keeping for every stop the set of
+        departures that are not beaten by a later departure arriving no later.
+        Boarding at a stop is kept apart from walking elsewhere to board, so
+        walks to a stop's rides are found even when a walk from that stop
+        does better (footpaths do not chain).
+
+        Args:
+            sources: Origin stop positions
+            targets: Destination stop positions
+            earliest_departure: Window start in seconds since the start of the service day
+            latest_departure: Window end in seconds
+            service_date: Calendar date of the service day, None to treat every trip as daily
+            max_duration: Longest journey considered
+
+        Returns:
+            (departure seconds, arrival seconds) pairs ordered by departure
+        """
+        connections = self.connections_for(service_date)
+        offsets, footpath_targets, footpath_secs = self._footpath_lists
+        target_walks = self._target_walks(targets)
+
+        profiles: Dict[int, Tuple[List[int], List[int]]] = {}
+        boardings: Dict[int, Tuple[List[int], List[int]]] = {}
+        trip_arrival: Dict[int, int] = {}
+
+        def evaluate(stop: int, time: int) -> int:
+            entries = profiles.get(stop)
+            if entries is None:
+                return INFINITY
+            i = bisect_left(entries[0], time)
+            return entries[1][i] if i < len(entries[0]) else INFINITY
+
+        def insert(table: Dict[int, Tuple[List[int], List[int]]], stop: int, departure: int, arrival: int) -> bool:
+            deps, arrs = table.setdefault(stop, ([], []))
+            i = bisect_left(deps, departure)
+            if i < len(deps) and arrs[i] <= arrival:
+                return False
+            end = i + 1 if i < len(deps) and deps[i] == departure else i
+            j = bisect_left(arrs, arrival, 0, i)
+            deps[j:end] = [departure]
+            arrs[j:end] = [arrival]
+            return True
+
+        start = int(np.searchsorted(connections.dep_secs, earliest_departure, side="left"))
+        end = int(np.searchsorted(connections.dep_secs, latest_departure + max_duration, side="right"))
+
+        for block_end in range(end, start, -_SCAN_BLOCK):
+            block_start = max(start, block_end - _SCAN_BLOCK)
+            dep_stops, arr_stops, dep_times, arr_times, trips = connections.block(block_start, block_end)
+            for offset in range(block_end - block_start - 1, -1, -1):
+                arr_stop, arr_time, trip = arr_stops[offset], arr_times[offset], trips[offset]
+
+                walk = target_walks.get(arr_stop)
+                arrival = arr_time + walk if walk is not None else INFINITY
+                arrival = min(arrival, trip_arrival.get(trip, INFINITY), evaluate(arr_stop, arr_time))
+                if arrival >= INFINITY:
+                    continue
+                if arrival < trip_arrival.get(trip, INFINITY):
+                    trip_arrival[trip] = arrival
+
+                dep_stop, dep_time = dep_stops[offset], dep_times[offset]
+                if arrival - dep_time > max_duration or not insert(boardings, dep_stop, dep_time, arrival):
+                    continue
+                insert(profiles, dep_stop, dep_time, arrival)
+                for k in range(offsets[dep_stop], offsets[dep_stop + 1]):
+                    insert(profiles, footpath_targets[k], dep_time - footpath_secs[k], arrival)
+
+        # Walking straight to the destination is possible at any time; it is
+        # reported once, at the start of the window, and beats every ride
+        # that takes longer.
+        direct_walk = min((target_walks.get(source, INFINITY) for source in sources), default=INFINITY)
+        options: Dict[int, int] = {}
+        if direct_walk < INFINITY:
+            options[earliest_departure] = earliest_departure + direct_walk
+        for source in sources:
+            deps, arrs = profiles.get(source, ([], []))
+            for departure, arrival in zip(deps, arrs):
+                if (
+                    earliest_departure <= departure <= latest_departure
+                    and arrival - departure < direct_walk
+                    and arrival < options.get(departure, INFINITY)
+                ):
+                    options[departure] = arrival
+
+        pareto: List[Tuple[int, int]] = []
+        for departure in sorted(options, reverse=True):
+            if not pareto or options[departure] < pareto[-1][1]:
+                pareto.append((departure, options[departure]))
+        pareto.reverse()
+        return pareto
+
+
+register_feed_index("connection_timetable", ConnectionTimetable.from_database)
+
+
+def get_connection_timetable(db: DatabaseConnector) -> ConnectionTimetable:
+    """Get the connection timetable, building it from ``db`` on first use."""
+    return get_feed_index("connection_timetable", db)
@@ -0,0 +1,213 @@
+"""
+Departure-board engine backed by time-indexed per-stop arrays.
+At feed load every stop's departures are sorted into one contiguous slice of
+NumPy arrays (CSR layout), so "next N departures after T" is a binary search
+plus a slice instead of a three-way join per request.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from pydantic_models import StopDeparture
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.gtfs_time import SECONDS_PER_DAY, seconds_to_time
+from utils.service_calendar import ServiceCalendar, get_service_calendar
+
+
+class DepartureBoard:
+    """
+    Per-stop sorted departure times with aligned trip indices.
+
+    Departures of the stop at position ``s`` occupy
+    ``departure_secs[offsets[s]:offsets[s + 1]]``, ordered by time and then
+    stop sequence. Times are seconds since the start of the trip's service
+    day and may exceed 24 hours. ``trip_services`` holds each trip's service
+    code in ``calendar``, so queries can be limited to one service date.
+    """
+
+    def __init__(
+        self,
+        stop_ids: List[str],
+        offsets: np.ndarray,
+        departure_secs: np.ndarray,
+        departure_trips: np.ndarray,
+        trips: List[Tuple[str, str, str, str, Optional[str]]],
+        trip_services: Optional[np.ndarray] = None,
+        calendar: Optional[ServiceCalendar] = None
+    ):
+        """
+        Args:
+            stop_ids: Stop identifiers by stop position
+            offsets: CSR offsets per stop position, length ``len(stop_ids) + 1``
+            departure_secs: Departure times in seconds, sorted within each stop
+            departure_trips: Trip position of each departure
+            trips: (trip_id, route_id, route_short_name, route_long_name, headsign) by trip position
+            trip_services: Service code of each trip in ``calendar``
+            calendar: Service calendar used to filter by service date
+        """
+        self.stop_ids = stop_ids
+        self.positions = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.departure_secs = np.asarray(departure_secs, dtype=np.int32)
+        self.departure_trips = np.asarray(departure_trips, dtype=np.int32)
+        self.trips = trips
+        self.trip_services = np.asarray(trip_services if trip_services is not None else np.full(len(trips), -1), dtype=np.int32)
+        self.calendar = calendar
+        self.max_secs = int(self.departure_secs.max()) if len(self.departure_secs) else 0
+
+    def __len__(self) -> int:
+        return len(self.departure_secs)
+
+    def has_stop(self, stop_id: str) -> bool:
+        return stop_id in self.positions
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "DepartureBoard":
+        """Build the board from ``stop_times``, ``trips``, ``routes`` and the service calendar."""
+        trip_rows = db.execute("""
+            SELECT
+                t.trip_id,
+                ANY_VALUE(t.route_id),
+                ANY_VALUE(r.route_short_name),
+                ANY_VALUE(r.route_long_name),
+                ANY_VALUE(t.trip_headsign),
+                ANY_VALUE(t.service_id)
+            FROM trips t
+                     JOIN routes r ON t.route_id = r.route_id
+            GROUP BY t.trip_id
+            ORDER BY t.trip_id
+        """)
+        trips = [
+            (row[0], row[1], row[2] or "", row[3] or "", row[4])
+            for row in trip_rows
+        ]
+        calendar = get_service_calendar(db)
+        trip_services = calendar.codes_for(row[5] for row in trip_rows)
+
+        stop_ids = [row[0] for row in db.execute(
+            "SELECT DISTINCT stop_id FROM stop_times WHERE stop_id IS NOT NULL ORDER BY stop_id"
+        )]
+
+        arrays = db.execute_numpy("""
+            WITH trip_index AS (
+                SELECT trip_id, row_number() OVER (ORDER BY trip_id) - 1 AS trip_idx
+                FROM (
+                    SELECT DISTINCT t.trip_id
+                    FROM trips t
+                             JOIN routes r ON t.route_id = r.route_id
+                )
+            ),
+            stop_index AS (
+                SELECT stop_id, row_number() OVER (ORDER BY stop_id) - 1 AS stop_idx
+                FROM (SELECT DISTINCT stop_id FROM stop_times WHERE stop_id IS NOT NULL)
+            )
+            SELECT
+                si.stop_idx::INTEGER AS stop_idx,
+                COALESCE(st.departure_secs, st.arrival_secs) AS secs,
+                ti.trip_idx::INTEGER AS trip_idx
+            FROM stop_times st
+                     JOIN trip_index ti ON st.trip_id = ti.trip_id
+                     JOIN stop_index si ON st.stop_id = si.stop_id
+            WHERE COALESCE(st.departure_secs, st.arrival_secs) IS NOT NULL
+            ORDER BY si.stop_idx, secs, st.stop_sequence
+        """)
+
+        stop_idx = np.asarray(arrays["stop_idx"], dtype=np.int64)
+        offsets = np.zeros(len(stop_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(stop_idx, minlength=len(stop_ids)))
+
+        return cls(stop_ids, offsets, arrays["secs"], arrays["trip_idx"], trips, trip_services, calendar)
+
+    def departures(
+        self,
+        stop_id: str,
+        start_secs: int,
+        end_secs: int,
+        limit: int,
+        service_date: Optional[date] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Departures from a stop between two times on the query's service day.
+
+        The window is matched against the previous and following service days
+        too: a 25:10:00 departure from yesterday's service is found at 01:10:00
+        today, and a window ending past midnight picks up the next day's early
+        departures as 24:xx:xx. Without a ``service_date`` every trip is assumed
+        to run every day; with one, each service day only contributes trips
+        whose service is active on that date.
+
+        Args:
+            stop_id: Stop identifier
+            start_secs: Window start in seconds since the start of the service day
+            end_secs: Window end (inclusive), may exceed one day
+            limit: Maximum number of departures
+            service_date: Calendar date of the query's service day
+
+        Returns:
+            Tuple of (departure positions, departure seconds in the query's frame),
+            ordered chronologically
+        """
+        position = self.positions.get(stop_id)
+        if position is None or end_secs < start_secs:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        lo, hi = int(self.offsets[position]), int(self.offsets[position + 1])
+        times = self.departure_secs[lo:hi]
+
+        first_day = (start_secs - self.max_secs) // SECONDS_PER_DAY
+        last_day = end_secs // SECONDS_PER_DAY
+
+        found_positions = []
+        found_secs = []
+        for day in range(first_day, last_day + 1):
+            shift = day * SECONDS_PER_DAY
+            left = np.searchsorted(times, start_secs - shift, side="left")
+            right = np.searchsorted(times, end_secs - shift, side="right")
+            day_positions = np.arange(lo + left, lo + right, dtype=np.int64)
+            if service_date is not None and self.calendar is not None:
+                active = self.calendar.active_mask(service_date + timedelta(days=day))
+                day_positions = day_positions[active[self.trip_services[self.departure_trips[day_positions]]]]
+            day_positions = day_positions[:limit]
+            if len(day_positions):
+                found_positions.append(day_positions)
+                found_secs.append(self.departure_secs[day_positions].astype(np.int64) + shift)
+
+        if not found_positions:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        positions = np.concatenate(found_positions)
+        secs = np.concatenate(found_secs)
+        order = np.argsort(secs, kind="stable")[:limit]
+        return positions[order], secs[order]
+
+    def stop_departures(
+        self,
+        stop_id: str,
+        start_secs: int,
+        end_secs: int,
+        limit: int,
+        service_date: Optional[date] = None
+    ) -> List[StopDeparture]:
+        """``departures`` as response models, with times rendered in the query's frame."""
+        positions, secs = self.departures(stop_id, start_secs, end_secs, limit, service_date)
+        results = []
+        for position, departure_secs in zip(positions.tolist(), secs.tolist()):
+            trip_id, route_id, short_name, long_name, headsign = self.trips[self.departure_trips[position]]
+            results.append(StopDeparture(
+                trip_id=trip_id,
+                route_id=route_id,
+                route_short_name=short_name,
+                route_long_name=long_name,
+                headsign=headsign,
+                departure_time=seconds_to_time(departure_secs),
+            ))
+        return results
+
+
+register_feed_index("departure_board", DepartureBoard.from_database)
+
+
+def get_departure_board(db: DatabaseConnector) -> DepartureBoard:
+    """Get the departure board, building it from ``db`` on first use."""
+    return get_feed_index("departure_board", db)
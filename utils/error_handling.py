@@ -312,6 +312,24 @@ def handle_pydantic_validation_error(
         )
 
 
+def create_stop_not_found_exception(stop_id: str, field: str = "stop_id") -> HTTPException:
+    """Create the 404 raised by handlers when a stop given in ``field`` does not exist."""
+    return HTTPException(
+        status_code=404,
+        detail={
+            "error": {
+                "code": ErrorCode.STOP_NOT_FOUND,
+                "message": f"Stop with ID '{stop_id}' not found",
+                "details": {
+                    "field": field,
+                    "value": stop_id,
+                    "constraint": "must be a valid stop identifier"
+                }
+            }
+        }
+    )
+
+
 def create_http_exception(
     error: StandardizedError,
     status_code: int,
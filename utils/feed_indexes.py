@@ -0,0 +1,99 @@
+"""
+Registry of in-memory indexes built from the loaded GTFS feed.
+Indexes are built once per feed, either on first use or when the application
+lifespan warms them, and are dropped when the feed is reloaded.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from database_connector import DatabaseConnector
+
+
+IndexBuilder = Callable[[DatabaseConnector], Any]
+
+
+class FeedIndexRegistry:
+    """
+    Lazily builds and holds named feed indexes.
+
+    Each index is built at most once; concurrent callers asking for an index
+    that is still being built wait for that build instead of starting another.
+    Builders may request other indexes, which are built first.
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, IndexBuilder] = {}
+        self._indexes: Dict[str, Any] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._build_times: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, builder: IndexBuilder) -> None:
+        """Register the function that builds index ``name`` from the database."""
+        with self._lock:
+            self._builders[name] = builder
+            self._build_locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str, db: DatabaseConnector) -> Any:
+        """
+        Get index ``name``, building it with ``db`` if needed.
+
+        Raises:
+            KeyError: If no builder is registered under ``name``
+        """
+        index = self._indexes.get(name)
+        if index is not None:
+            return index
+
+        if name not in self._builders:
+            raise KeyError(f"No feed index registered as '{name}'")
+
+        with self._build_locks[name]:
+            index = self._indexes.get(name)
+            if index is None:
+                started = time.perf_counter()
+                index = self._builders[name](db)
+                self._build_times[name] = time.perf_counter() - started
+                self._indexes[name] = index
+        return index
+
+    def warm(self, db: DatabaseConnector) -> Dict[str, float]:
+        """
+        Build every registered index.
+
+        Returns:
+            Build time in seconds per index
+        """
+        for name in list(self._builders):
+            self.get(name, db)
+        return dict(self._build_times)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop one index, or all of them, so they are rebuilt on next use."""
+        with self._lock:
+            if name is None:
+                self._indexes.clear()
+                self._build_times.clear()
+            else:
+                self._indexes.pop(name, None)
+                self._build_times.pop(name, None)
+
+
+_registry = FeedIndexRegistry()
+
+
+def register_feed_index(name: str, builder: IndexBuilder) -> None:
+    _registry.register(name, builder)
+
+
+def get_feed_index(name: str, db: DatabaseConnector) -> Any:
+    return _registry.get(name, db)
+
+
+def warm_feed_indexes(db: DatabaseConnector) -> Dict[str, float]:
+    return _registry.warm(db)
+
+
+def invalidate_feed_indexes(name: Optional[str] = None) -> None:
+    _registry.invalidate(name)
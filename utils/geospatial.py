@@ -5,6 +5,14 @@ Provides distance calculations, coordinate validation, and spatial query helpers
 
 import math
 from typing import Tuple, List, Optional
+import numpy as np
+
+
+EARTH_RADIUS = {
+    "miles": 3959,
+    "kilometers": 6371,
+    "meters": 6371000
+}
 
 
 def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float, unit: str = "miles") -> float:
@@ -29,16 +37,42 @@ def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float, unit:
     c = 2 * math.asin(math.sqrt(a))
     
     
-    earth_radius = {
-        "miles": 3959,
-        "kilometers": 6371,
-        "meters": 6371000
-    }
+    if unit not in EARTH_RADIUS:
+        raise ValueError(f"Unsupported unit: {unit}. Use 'miles', 'kilometers', or 'meters'")
+    
+    return c * EARTH_RADIUS[unit]
+
+
+def haversine_distances(
+    lat: float,
+    lon: float,
+    lats: np.ndarray,
+    lons: np.ndarray,
+    unit: str = "miles"
+) -> np.ndarray:
+    """
+    Vectorised Haversine distance from one point to many points.
+    
+    The origin may also be given as arrays the same length as ``lats`` and
+    ``lons``, giving the distance of each pair of points.
+    
+    Args:
+        lat, lon: Origin in decimal degrees
+        lats, lons: Arrays of destination coordinates in decimal degrees
+        unit: Distance unit - "miles", "kilometers", or "meters"
     
-    if unit not in earth_radius:
+    Returns:
+        Array of distances in the specified unit
+    """
+    if unit not in EARTH_RADIUS:
         raise ValueError(f"Unsupported unit: {unit}. Use 'miles', 'kilometers', or 'meters'")
     
-    return c * earth_radius[unit]
+    lat1 = np.radians(lat)
+    lat2 = np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - np.radians(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0))) * EARTH_RADIUS[unit]
 
 
 def validate_coordinates(lat: float, lon: float) -> bool:
@@ -140,4 +174,4 @@ def miles_to_degrees(miles: float, latitude: float) -> float:
     Returns:
         Distance in degrees
     """
-    return miles / (69.0 * math.cos(math.radians(latitude)))
\ No newline at end of file
+    return miles / (69.0 * math.cos(math.radians(latitude)))
@@ -0,0 +1,52 @@
+"""
+GTFS time helpers.
+Converts between HH:MM:SS strings and seconds since the start of the service day,
+which is how times are stored in the ``*_secs`` columns. GTFS times may exceed
+24:00:00 for trips that run past midnight.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def time_to_seconds(time_str: str) -> int:
+    """
+    Convert a GTFS HH:MM:SS time to seconds since the start of the service day.
+
+    Args:
+        time_str: Time string, hours may be 24 or greater
+
+    Returns:
+        Number of seconds
+
+    Raises:
+        ValueError: If the string is not in HH:MM:SS format
+    """
+    parts = time_str.strip().split(":")
+    if len(parts) != 3:
+        raise ValueError("Time must be in HH:MM:SS format")
+    hours, minutes, seconds = (int(part) for part in parts)
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def seconds_to_time(seconds: int) -> str:
+    """
+    Convert seconds since the start of the service day to a GTFS HH:MM:SS string.
+
+    Args:
+        seconds: Number of seconds, may exceed one day
+
+    Returns:
+        Zero-padded HH:MM:SS string
+    """
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+def current_service_seconds(now: Optional[datetime] = None) -> int:
+    """Seconds since midnight for the given (or current) local time."""
+    now = now or datetime.now()
+    return now.hour * 3600 + now.minute * 60 + now.second
@@ -0,0 +1,565 @@
+"""
+RAPTOR journey planner.
+Trips are grouped into the route patterns precomputed at import. Each
+pattern's stop times are stored as a stop-major matrix in one contiguous
+array, so a round scans each touched pattern once and finds the earliest
+catchable trip at a stop with a binary search over one matrix row. Rounds
+correspond to the number of trips taken, which gives arrival time x
+transfers Pareto options directly; range mode reruns the rounds for every
+departure in a window, latest first, reusing labels between runs.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from utils.connection_scan import TRANSIT, WALK, load_station_children
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.gtfs_time import SECONDS_PER_DAY
+from utils.service_calendar import ServiceCalendar, get_service_calendar
+from utils.spatial_index import get_stop_spatial_index
+from utils.transfer_graph import get_transfer_graph
+
+
+DEFAULT_MAX_TRANSFERS = 3
+MAX_TRANSFERS = 6
+
+INFINITY = 2 ** 62
+
+# Trips of the query's own service day, and of the day before with their
+# times moved back 24 hours (overnight service running past 24:00:00).
+_DAY_SHIFTS = (0, -SECONDS_PER_DAY)
+
+
+def split_fifo(trip_times: List[np.ndarray]) -> List[List[int]]:
+    """
+    Split trips sharing a stop sequence into groups where no trip overtakes another.
+
+    RAPTOR relies on trips of a pattern never overtaking, so the earliest trip
+    departing a stop is also the earliest to arrive everywhere downstream.
+
+    Args:
+        trip_times: Per trip, departure seconds at each stop of the pattern
+
+    Returns:
+        Trip positions per group, each ordered by departure
+    """
+    order = sorted(range(len(trip_times)), key=lambda i: (trip_times[i][0], trip_times[i].tolist()))
+    groups: List[List[int]] = []
+    for trip in order:
+        for group in groups:
+            if np.all(trip_times[group[-1]] <= trip_times[trip]):
+                group.append(trip)
+                break
+        else:
+            groups.append([trip])
+    return groups
+
+
+class RaptorState:
+    """Round labels kept across the runs of one (range) query."""
+
+    def __init__(self, rounds: int):
+        self.labels: List[Dict[int, int]] = [{} for _ in range(rounds + 1)]
+        self.pointers: List[Dict[int, Optional[Tuple]]] = [{} for _ in range(rounds + 1)]
+        # best[k]: earliest arrival at each stop using at most k trips
+        self.best: List[Dict[int, int]] = [{} for _ in range(rounds + 1)]
+        # Arrivals by a ride rather than on foot, which walks start from
+        self.ride_pointers: List[Dict[int, Tuple]] = [{} for _ in range(rounds + 1)]
+        self.ride_best: List[Dict[int, int]] = [{} for _ in range(rounds + 1)]
+
+
+class RaptorTimetable:
+    """
+    Route patterns with stop-major stop time matrices.
+
+    Pattern ``p`` visits ``pattern_stops[stop_offsets[p]:stop_offsets[p + 1]]``
+    and has ``trip_counts[p]`` trips. Its departure at stop index ``j`` for trip
+    row ``r`` is ``departures[time_offsets[p] + j * trip_counts[p] + r]``
+    (likewise ``arrivals``), so each stop's departures are one sorted slice.
+    ``pattern_trips[trip_offsets[p] + r]`` is the trip position of row ``r``.
+    Stops are numbered by stop spatial index position, as in the connection
+    scan timetable, so both planners share footpaths and stop records.
+    """
+
+    def __init__(
+        self,
+        stops: List[Dict[str, Any]],
+        pattern_ids: List[str],
+        pattern_stop_lists: List[List[int]],
+        pattern_trip_lists: List[List[int]],
+        pattern_arrivals: List[np.ndarray],
+        pattern_departures: List[np.ndarray],
+        trips: List[Tuple[str, str, str, Optional[str]]],
+        trip_services: np.ndarray,
+        calendar: Optional[ServiceCalendar],
+        footpaths: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        station_children: Dict[str, List[int]]
+    ):
+        """
+        Args:
+            stops: Stop records by stop position, as held by the spatial index
+            pattern_ids: Route pattern id of each pattern
+            pattern_stop_lists: Stop positions visited by each pattern
+            pattern_trip_lists: Trip positions of each pattern, ordered by departure
+            pattern_arrivals: Per pattern, a (stops x trips) matrix of arrival seconds
+            pattern_departures: Per pattern, a (stops x trips) matrix of departure seconds
+            trips: (trip_id, route_id, route_short_name, headsign) by trip position
+            trip_services: Service code of each trip in ``calendar``
+            calendar: Service calendar used to select trips by service date
+            footpaths: CSR arrays (offsets, targets, seconds) by stop position
+            station_children: Stop positions of each parent station's child stops
+        """
+        self.stops = stops
+        self.stop_positions = {record["stop_id"]: i for i, record in enumerate(stops)}
+        self.pattern_ids = pattern_ids
+        self.trips = trips
+        self.trip_services = np.asarray(trip_services, dtype=np.int32)
+        self.calendar = calendar
+        self.station_children = station_children
+
+        self.stop_offsets = np.zeros(len(pattern_ids) + 1, dtype=np.int64)
+        self.stop_offsets[1:] = np.cumsum([len(stops_) for stops_ in pattern_stop_lists])
+        self.trip_offsets = np.zeros(len(pattern_ids) + 1, dtype=np.int64)
+        self.trip_offsets[1:] = np.cumsum([len(trips_) for trips_ in pattern_trip_lists])
+        self.trip_counts = np.diff(self.trip_offsets)
+        self.time_offsets = np.zeros(len(pattern_ids) + 1, dtype=np.int64)
+        self.time_offsets[1:] = np.cumsum([matrix.size for matrix in pattern_departures])
+
+        def flatten(arrays: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate([np.ravel(a) for a in arrays]).astype(dtype) if arrays else np.empty(0, dtype=dtype)
+
+        self.pattern_stops = flatten(pattern_stop_lists, np.int32)
+        self.pattern_trips = flatten(pattern_trip_lists, np.int32)
+        self.arrivals = flatten(pattern_arrivals, np.int32)
+        self.departures = flatten(pattern_departures, np.int32)
+
+        # Stop -> (pattern, index of the stop within the pattern)
+        stop_of_entry = self.pattern_stops.astype(np.int64)
+        entry_patterns = np.repeat(np.arange(len(pattern_ids)), np.diff(self.stop_offsets))
+        entry_indexes = np.arange(len(stop_of_entry)) - np.repeat(self.stop_offsets[:-1], np.diff(self.stop_offsets))
+        order = np.lexsort((entry_patterns, stop_of_entry))
+        stop_pattern_offsets = np.zeros(len(stops) + 1, dtype=np.int64)
+        stop_pattern_offsets[1:] = np.cumsum(np.bincount(stop_of_entry, minlength=len(stops)))
+        self.stop_pattern_offsets = stop_pattern_offsets
+
+        self.footpath_offsets, self.footpath_targets, self.footpath_secs = footpaths
+
+        # Python lists for the scan loops
+        self._stop_offsets = self.stop_offsets.tolist()
+        self._pattern_stops = self.pattern_stops.tolist()
+        self._trip_counts = self.trip_counts.tolist()
+        self._time_offsets = self.time_offsets.tolist()
+        self._trip_offsets = self.trip_offsets.tolist()
+        self._stop_patterns = [[] for _ in stops]
+        for pattern, index, stop in zip(entry_patterns[order].tolist(), entry_indexes[order].tolist(), stop_of_entry[order].tolist()):
+            self._stop_patterns[stop].append((pattern, index))
+        self._footpaths = [[] for _ in stops]
+        for stop in range(len(stops)):
+            start, end = int(self.footpath_offsets[stop]), int(self.footpath_offsets[stop + 1])
+            self._footpaths[stop] = list(zip(self.footpath_targets[start:end].tolist(), self.footpath_secs[start:end].tolist()))
+
+    def __len__(self) -> int:
+        return len(self.pattern_ids)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "RaptorTimetable":
+        """Build the timetable from ``route_patterns``, ``trips``, ``stop_times`` and the stop spatial index."""
+        spatial_index = get_stop_spatial_index(db)
+        calendar = get_service_calendar(db)
+
+        trip_rows = db.execute("""
+            SELECT
+                t.trip_id,
+                ANY_VALUE(t.route_id),
+                COALESCE(ANY_VALUE(r.route_short_name), ''),
+                ANY_VALUE(t.trip_headsign),
+                ANY_VALUE(t.service_id)
+            FROM trips t
+                     LEFT JOIN routes r ON t.route_id = r.route_id
+            GROUP BY t.trip_id
+            ORDER BY t.trip_id
+        """)
+        trips = [(row[0], row[1], row[2], row[3]) for row in trip_rows]
+        trip_positions = {row[0]: i for i, row in enumerate(trip_rows)}
+        trip_services = calendar.codes_for(row[4] for row in trip_rows)
+
+        rows = db.execute("""
+            WITH trip_sequences AS (
+                SELECT
+                    trip_id,
+                    list(stop_id ORDER BY stop_sequence) AS stop_ids,
+                    list(COALESCE(arrival_secs, departure_secs) ORDER BY stop_sequence) AS arrivals,
+                    list(COALESCE(departure_secs, arrival_secs) ORDER BY stop_sequence) AS departures
+                FROM stop_times
+                GROUP BY trip_id
+            )
+            SELECT p.pattern_id, t.trip_id, p.stop_ids, ts.arrivals, ts.departures
+            FROM trips t
+                     JOIN trip_sequences ts ON t.trip_id = ts.trip_id
+                     JOIN route_patterns p
+                          ON p.route_id = t.route_id
+                              AND p.direction_id IS NOT DISTINCT FROM t.direction_id
+                              AND p.stop_ids = ts.stop_ids
+            ORDER BY p.pattern_id, t.trip_id
+        """)
+
+        grouped: Dict[str, Tuple[List[int], List[int], List[np.ndarray], List[np.ndarray]]] = {}
+        for pattern_id, trip_id, stop_ids, arrivals, departures in rows:
+            if None in arrivals or None in departures:
+                continue
+            if pattern_id not in grouped:
+                stop_positions = [spatial_index.positions.get(stop_id) for stop_id in stop_ids]
+                if None in stop_positions or len(stop_positions) < 2:
+                    continue
+                grouped[pattern_id] = (stop_positions, [], [], [])
+            _, pattern_trips, pattern_arrivals, pattern_departures = grouped[pattern_id]
+            pattern_trips.append(trip_positions[trip_id])
+            pattern_arrivals.append(np.array(arrivals, dtype=np.int32))
+            pattern_departures.append(np.array(departures, dtype=np.int32))
+
+        pattern_ids, stop_lists, trip_lists, arrival_matrices, departure_matrices = [], [], [], [], []
+        for pattern_id, (stop_positions, pattern_trips, arrivals, departures) in grouped.items():
+            groups = split_fifo(departures)
+            for number, group in enumerate(groups):
+                pattern_ids.append(pattern_id if len(groups) == 1 else f"{pattern_id}#{number + 1}")
+                stop_lists.append(stop_positions)
+                trip_lists.append([pattern_trips[i] for i in group])
+                arrival_matrices.append(np.stack([arrivals[i] for i in group], axis=1))
+                departure_matrices.append(np.stack([departures[i] for i in group], axis=1))
+
+        return cls(
+            spatial_index.records,
+            pattern_ids,
+            stop_lists,
+            trip_lists,
+            arrival_matrices,
+            departure_matrices,
+            trips,
+            trip_services,
+            calendar,
+            get_transfer_graph(db).footpaths(),
+            load_station_children(db, spatial_index)
+        )
+
+    def resolve_stop(self, stop_id: str) -> List[int]:
+        """Stop positions for a stop id; a parent station resolves to itself and its child stops."""
+        positions = list(self.station_children.get(stop_id, []))
+        position = self.stop_positions.get(stop_id)
+        if position is not None:
+            positions.insert(0, position)
+        return positions
+
+    def _day_masks(self, service_date: Optional[date]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Active-trip masks for the query day and the day before, None when every trip runs daily."""
+        if service_date is None or self.calendar is None:
+            return None, None
+        today = self.calendar.active_mask(service_date)[self.trip_services]
+        yesterday = self.calendar.active_mask(service_date - timedelta(days=1))[self.trip_services]
+        return today, yesterday
+
+    def _earliest_trip(self, pattern: int, index: int, time: int, masks: Tuple) -> Optional[Tuple[int, int, int]]:
+        """
+        Earliest trip of ``pattern`` departing stop ``index`` at or after ``time``.
+
+        Returns:
+            (trip row, day shift, departure in the query's frame), or None
+        """
+        count = self._trip_counts[pattern]
+        base = self._time_offsets[pattern] + index * count
+        column = self.departures[base:base + count]
+        trips = self.pattern_trips[self._trip_offsets[pattern]:self._trip_offsets[pattern] + count]
+
+        best = None
+        for shift, mask in zip(_DAY_SHIFTS, masks):
+            row = int(np.searchsorted(column, time - shift, side="left"))
+            if mask is not None:
+                while row < count and not mask[trips[row]]:
+                    row += 1
+            if row < count:
+                departure = int(column[row]) + shift
+                if best is None or departure < best[2]:
+                    best = (row, shift, departure)
+        return best
+
+    def _run(
+        self,
+        state: RaptorState,
+        departure_secs: int,
+        sources: Sequence[int],
+        targets: Set[int],
+        masks: Tuple
+    ) -> None:
+        """
+        One RAPTOR run from ``sources`` at ``departure_secs``, improving ``state`` in place.
+
+        An arrival in round ``k`` is only pruned by arrivals using at most
+        ``k`` trips. Labels left by later departures of a range query then
+        never hide an option with fewer transfers. Footpaths do not chain:
+        walks start only from the origin or from a ride's arrival, which is
+        kept apart from arrivals on foot.
+        """
+        labels, pointers, best = state.labels, state.pointers, state.best
+        ride_pointers, ride_best = state.ride_pointers, state.ride_best
+        rounds = len(labels) - 1
+
+        def improve(table: List[Dict[int, int]], k: int, stop: int, arrival: int) -> None:
+            for j in range(k, rounds + 1):
+                if arrival >= table[j].get(stop, INFINITY):
+                    break
+                table[j][stop] = arrival
+
+        def target_best(k: int) -> int:
+            return min((best[k].get(target, INFINITY) for target in targets), default=INFINITY)
+
+        marked: Set[int] = set()
+        for source in sources:
+            if departure_secs < best[0].get(source, INFINITY):
+                labels[0][source] = departure_secs
+                pointers[0][source] = None
+                improve(best, 0, source, departure_secs)
+                marked.add(source)
+        for source in list(marked):
+            for stop, walk_secs in self._footpaths[source]:
+                arrival = departure_secs + walk_secs
+                if arrival < best[0].get(stop, INFINITY):
+                    labels[0][stop] = arrival
+                    pointers[0][stop] = (WALK, source, walk_secs)
+                    improve(best, 0, stop, arrival)
+                    marked.add(stop)
+
+        for k in range(1, rounds + 1):
+            round_best, round_ride_best = best[k], ride_best[k]
+            bound = target_best(k)
+            queue: Dict[int, int] = {}
+            for stop in marked:
+                for pattern, index in self._stop_patterns[stop]:
+                    if index < queue.get(pattern, INFINITY):
+                        queue[pattern] = index
+            if not queue:
+                break
+
+            previous, current, round_pointers = labels[k - 1], labels[k], pointers[k]
+            marked = set()
+            rides: Dict[int, int] = {}
+            for pattern, first_index in queue.items():
+                stop_start, stop_end = self._stop_offsets[pattern], self._stop_offsets[pattern + 1]
+                count = self._trip_counts[pattern]
+                time_base = self._time_offsets[pattern]
+                trip = None
+                for index in range(first_index, stop_end - stop_start):
+                    stop = self._pattern_stops[stop_start + index]
+                    if trip is not None:
+                        row, shift, board_index = trip
+                        arrival = int(self.arrivals[time_base + index * count + row]) + shift
+                        if arrival < round_ride_best.get(stop, INFINITY) and arrival < bound:
+                            pointer = (TRANSIT, pattern, row, shift, board_index, index)
+                            rides[stop] = arrival
+                            ride_pointers[k][stop] = pointer
+                            improve(ride_best, k, stop, arrival)
+                            if arrival < round_best.get(stop, INFINITY):
+                                current[stop] = arrival
+                                improve(best, k, stop, arrival)
+                                round_pointers[stop] = pointer
+                                marked.add(stop)
+                                if stop in targets:
+                                    bound = arrival
+
+                    reached = previous.get(stop)
+                    if reached is None:
+                        continue
+                    if trip is not None:
+                        row, shift, _ = trip
+                        if reached > int(self.departures[time_base + index * count + row]) + shift:
+                            continue
+                    found = self._earliest_trip(pattern, index, reached, masks)
+                    if found is None:
+                        continue
+                    if trip is not None:
+                        current_departure = int(self.departures[time_base + index * count + trip[0]]) + trip[1]
+                        if found[2] >= current_departure:
+                            continue
+                    trip = (found[0], found[1], index)
+
+            for stop, ride_arrival in rides.items():
+                for other, walk_secs in self._footpaths[stop]:
+                    arrival = ride_arrival + walk_secs
+                    if arrival < round_best.get(other, INFINITY) and arrival < bound:
+                        current[other] = arrival
+                        improve(best, k, other, arrival)
+                        round_pointers[other] = (WALK, stop, walk_secs)
+                        marked.add(other)
+                        if other in targets:
+                            bound = arrival
+            if not marked:
+                break
+
+    def _journey(self, state: RaptorState, target: int, k: int) -> Dict[str, Any]:
+        """Rebuild the journey reaching ``target`` in round ``k``; a walk is preceded by the ride it started from."""
+        legs = []
+        stop = target
+        pointers = state.pointers
+        while True:
+            pointer = pointers[k].get(stop)
+            if pointer is None:
+                break
+            if pointer[0] == WALK:
+                _, from_stop, walk_secs = pointer
+                arrival = state.labels[k][stop]
+                legs.append({
+                    "mode": WALK,
+                    "from_stop": from_stop,
+                    "to_stop": stop,
+                    "departure_secs": arrival - walk_secs,
+                    "arrival_secs": arrival,
+                })
+                stop = from_stop
+                pointers = state.ride_pointers
+                continue
+
+            _, pattern, row, shift, board_index, alight_index = pointer
+            count = self._trip_counts[pattern]
+            time_base = self._time_offsets[pattern]
+            from_stop = self._pattern_stops[self._stop_offsets[pattern] + board_index]
+            legs.append({
+                "mode": TRANSIT,
+                "from_stop": from_stop,
+                "to_stop": stop,
+                "departure_secs": int(self.departures[time_base + board_index * count + row]) + shift,
+                "arrival_secs": int(self.arrivals[time_base + alight_index * count + row]) + shift,
+                "trip": int(self.pattern_trips[self._trip_offsets[pattern] + row]),
+                "num_stops": alight_index - board_index,
+            })
+            stop = from_stop
+            pointers = state.pointers
+            k -= 1
+        legs.reverse()
+
+        return {
+            "departure_secs": legs[0]["departure_secs"],
+            "arrival_secs": legs[-1]["arrival_secs"],
+            "legs": legs,
+        }
+
+    def _round_arrivals(self, state: RaptorState, targets: Set[int]) -> List[Tuple[int, int]]:
+        """(arrival, target) per round, INFINITY where the round reached no target."""
+        results = []
+        for labels in state.labels:
+            arrival, target = min(((labels.get(t, INFINITY), t) for t in targets), default=(INFINITY, -1))
+            results.append((arrival, target))
+        return results
+
+    def _source_departures(self, sources: Sequence[int], earliest: int, latest: int, masks: Tuple) -> List[int]:
+        """Distinct times within ``[earliest, latest]`` at which leaving a source can catch a trip."""
+        times: Set[int] = set()
+        starts = [(source, 0) for source in sources]
+        for source in sources:
+            starts.extend(self._footpaths[source])
+        for stop, walk_secs in starts:
+            for pattern, index in self._stop_patterns[stop]:
+                count = self._trip_counts[pattern]
+                base = self._time_offsets[pattern] + index * count
+                column = self.departures[base:base + count]
+                trips = self.pattern_trips[self._trip_offsets[pattern]:self._trip_offsets[pattern] + count]
+                for shift, mask in zip(_DAY_SHIFTS, masks):
+                    lo = int(np.searchsorted(column, earliest + walk_secs - shift, side="left"))
+                    hi = int(np.searchsorted(column, latest + walk_secs - shift, side="right"))
+                    rows = np.arange(lo, hi)
+                    if mask is not None:
+                        rows = rows[mask[trips[lo:hi]]]
+                    times.update((column[rows].astype(np.int64) + shift - walk_secs).tolist())
+        return sorted(times, reverse=True)
+
+    def query(
+        self,
+        sources: Sequence[int],
+        targets: Sequence[int],
+        departure_secs: int,
+        service_date: Optional[date] = None,
+        max_transfers: int = DEFAULT_MAX_TRANSFERS
+    ) -> List[Dict[str, Any]]:
+        """
+        Arrival time x transfers Pareto journeys departing at ``departure_secs``.
+
+        Returns:
+            Journey dicts with a ``transfers`` count, fewest transfers first;
+            each arrives strictly earlier than the one before it
+        """
+        return self.range_query(sources, targets, departure_secs, departure_secs, service_date, max_transfers, single=True)
+
+    def range_query(
+        self,
+        sources: Sequence[int],
+        targets: Sequence[int],
+        earliest_departure: int,
+        latest_departure: int,
+        service_date: Optional[date] = None,
+        max_transfers: int = DEFAULT_MAX_TRANSFERS,
+        single: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Pareto journeys over a departure window (range RAPTOR).
+
+        Runs once per distinct departure time within the window, latest
+        first, keeping each round's labels between runs: a journey found for
+        a later departure remains valid for an earlier one, so each run only
+        explores what leaving earlier improves for the same number of trips.
+
+        Args:
+            sources: Origin stop positions
+            targets: Destination stop positions
+            earliest_departure: Window start in seconds since the start of the service day
+            latest_departure: Window end in seconds
+            service_date: Calendar date of the service day, None to treat every trip as daily
+            max_transfers: Most changes between trips in a journey
+            single: Run only at ``earliest_departure`` (a plain RAPTOR query)
+
+        Returns:
+            Journey dicts with a ``transfers`` count that are not beaten on
+            departure, arrival and transfers together, ordered by departure
+            and then transfers
+        """
+        target_set = set(targets)
+        masks = self._day_masks(service_date)
+        state = RaptorState(max_transfers + 1)
+
+        if single:
+            departures = [earliest_departure]
+        else:
+            departures = self._source_departures(sources, earliest_departure, latest_departure, masks)
+
+        found: List[Dict[str, Any]] = []
+        recorded = [INFINITY] * (max_transfers + 2)
+        for departure in departures:
+            self._run(state, departure, sources, target_set, masks)
+            for k, (arrival, target) in enumerate(self._round_arrivals(state, target_set)):
+                if arrival < recorded[k]:
+                    recorded[k] = arrival
+                    journey = self._journey(state, target, k)
+                    journey["transfers"] = max(0, sum(1 for leg in journey["legs"] if leg["mode"] == TRANSIT) - 1)
+                    found.append(journey)
+
+        pareto = []
+        for journey in found:
+            dominated = any(
+                other is not journey
+                and other["departure_secs"] >= journey["departure_secs"]
+                and other["arrival_secs"] <= journey["arrival_secs"]
+                and other["transfers"] <= journey["transfers"]
+                and (other["departure_secs"], -other["arrival_secs"], -other["transfers"])
+                != (journey["departure_secs"], -journey["arrival_secs"], -journey["transfers"])
+                for other in found
+            )
+            if not dominated:
+                pareto.append(journey)
+
+        unique = {(j["departure_secs"], j["arrival_secs"], j["transfers"]): j for j in pareto}
+        return sorted(unique.values(), key=lambda j: (j["departure_secs"], j["transfers"]))
+
+
+register_feed_index("raptor_timetable", RaptorTimetable.from_database)
+
+
+def get_raptor_timetable(db: DatabaseConnector) -> RaptorTimetable:
+    """Get the RAPTOR timetable, building it from ``db`` on first use."""
+    return get_feed_index("raptor_timetable", db)
@@ -6,7 +6,6 @@ Implements request rate limiting, export size limits, and resource usage trackin
 import time
 from typing import Dict, Optional, Tuple, Any
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
 import threading
 from dataclasses import dataclass
 from fastapi import Request
@@ -22,20 +21,104 @@ class RateLimit:
     request_size_limit: int = 1024 * 1024  
 
 
-@dataclass
-class UsageRecord:
-    """Usage tracking record."""
-    timestamp: float
-    request_size: int = 0
-    export_size: int = 0
+class SlidingWindowCounter:
+    """
+    Approximate sliding-window request counter with a fixed number of buckets.
+
+    The window is split into ``buckets`` equal slots; a running total is kept
+    and stale slots are cleared lazily as time advances, so both ``add`` and
+    ``count`` are O(1) and memory does not grow with the request rate. Counts
+    may include up to one bucket of requests older than the window.
+    """
+
+    __slots__ = ("bucket_seconds", "counts", "current_slot", "total")
+
+    def __init__(self, window_seconds: int, buckets: int):
+        self.bucket_seconds = window_seconds / buckets
+        self.counts = [0] * buckets
+        self.current_slot = 0
+        self.total = 0
+
+    def _advance(self, now: float) -> None:
+        slot = int(now // self.bucket_seconds)
+        elapsed = slot - self.current_slot
+        if elapsed <= 0:
+            return
+
+        buckets = len(self.counts)
+        if elapsed >= buckets:
+            self.counts = [0] * buckets
+            self.total = 0
+        else:
+            for step in range(1, elapsed + 1):
+                index = (self.current_slot + step) % buckets
+                self.total -= self.counts[index]
+                self.counts[index] = 0
+        self.current_slot = slot
+
+    def add(self, now: float, amount: int = 1) -> None:
+        self._advance(now)
+        self.counts[self.current_slot % len(self.counts)] += amount
+        self.total += amount
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total
+
+
+WINDOWS = {
+    "minute": (60, 12),
+    "hour": (3600, 12),
+    "day": (86400, 24)
+}
+
+
+class ClientUsage:
+    """Constant-size usage state for one client."""
+
+    __slots__ = ("windows", "total_requests", "first_request", "last_request")
+
+    def __init__(self):
+        self.windows = {
+            name: SlidingWindowCounter(window_seconds, buckets)
+            for name, (window_seconds, buckets) in WINDOWS.items()
+        }
+        self.total_requests = 0
+        self.first_request: Optional[float] = None
+        self.last_request: Optional[float] = None
+
+    def record(self, now: float) -> None:
+        for counter in self.windows.values():
+            counter.add(now)
+        self.total_requests += 1
+        if self.first_request is None:
+            self.first_request = now
+        self.last_request = now
+
+    def usage(self, now: float) -> Dict[str, int]:
+        return {name: counter.count(now) for name, counter in self.windows.items()}
+
+    def reset(self) -> None:
+        self.__init__()
 
 
 class RateLimiter:
-    """Thread-safe rate limiter with multiple time windows."""
+    """
+    Thread-safe rate limiter with multiple time windows.
+
+    Each client keeps a fixed-size ``ClientUsage`` of bucketed counters, so a
+    check costs O(1) time and memory regardless of how many requests the
+    client has made. Clients are sharded over striped locks instead of one
+    global lock, and clients idle for longer than a day are pruned.
+    """
+
+    LOCK_STRIPES = 64
+    PRUNE_INTERVAL = 300
     
     def __init__(self):
-        self._usage: Dict[str, deque] = defaultdict(deque)
-        self._lock = threading.Lock()
+        self._usage: Dict[str, ClientUsage] = {}
+        self._locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self._last_prune = time.time()
         
         
         self._limits = {
@@ -97,30 +180,26 @@ class RateLimiter:
         else:
             return "default"
     
-    def _cleanup_old_records(self, records: deque, max_age_seconds: int):
-        """Remove records older than max_age_seconds."""
-        current_time = time.time()
-        while records and current_time - records[0].timestamp > max_age_seconds:
-            records.popleft()
+    def _lock_for(self, client_id: str) -> threading.Lock:
+        return self._locks[hash(client_id) % self.LOCK_STRIPES]
     
-    def _count_requests_in_window(self, records: deque, window_seconds: int) -> int:
-        """Count requests within the specified time window."""
-        current_time = time.time()
-        count = 0
-        for record in reversed(records):
-            if current_time - record.timestamp <= window_seconds:
-                count += 1
-            else:
-                break
-        return count
+    def _get_client_usage(self, client_id: str) -> ClientUsage:
+        usage = self._usage.get(client_id)
+        if usage is None:
+            usage = self._usage.setdefault(client_id, ClientUsage())
+        return usage
     
-    def _get_usage_stats(self, records: deque) -> Dict[str, int]:
-        """Get usage statistics for different time windows."""
-        return {
-            "minute": self._count_requests_in_window(records, 60),
-            "hour": self._count_requests_in_window(records, 3600),
-            "day": self._count_requests_in_window(records, 86400)
-        }
+    def _prune_idle_clients(self, now: float) -> None:
+        """Drop clients with no requests in the last day."""
+        if now - self._last_prune < self.PRUNE_INTERVAL:
+            return
+        self._last_prune = now
+        
+        for client_id, usage in list(self._usage.items()):
+            if usage.last_request is not None and now - usage.last_request > WINDOWS["day"][0]:
+                with self._lock_for(client_id):
+                    if usage.last_request is not None and now - usage.last_request > WINDOWS["day"][0]:
+                        self._usage.pop(client_id, None)
     
     def check_rate_limit(
         self,
@@ -143,14 +222,12 @@ class RateLimiter:
         category = self._get_endpoint_category(request.url.path)
         limits = self._limits[category]
         
-        with self._lock:
-            records = self._usage[client_id]
-            
-            
-            self._cleanup_old_records(records, 25 * 3600)
-            
-            
-            usage = self._get_usage_stats(records)
+        now = time.time()
+        self._prune_idle_clients(now)
+        
+        client_usage = self._get_client_usage(client_id)
+        with self._lock_for(client_id):
+            usage = client_usage.usage(now)
             
             
             rate_limit_info = {
@@ -204,11 +281,7 @@ class RateLimiter:
                 return False, rate_limit_info
             
             
-            records.append(UsageRecord(
-                timestamp=time.time(),
-                request_size=request_size or 0,
-                export_size=export_size or 0
-            ))
+            client_usage.record(now)
             
             return True, rate_limit_info
     
@@ -251,51 +324,53 @@ class RateLimiter:
     
     def update_limits(self, category: str, limits: RateLimit):
         """Update rate limits for a specific category."""
-        with self._lock:
-            self._limits[category] = limits
+        self._limits[category] = limits
     
     def get_usage_summary(self) -> Dict[str, Any]:
         """Get overall usage summary for monitoring."""
-        with self._lock:
-            summary = {
-                "total_clients": len(self._usage),
-                "categories": list(self._limits.keys()),
-                "active_clients": 0,
-                "total_requests_last_hour": 0
-            }
-            
-            current_time = time.time()
-            for client_id, records in self._usage.items():
-                
-                hour_requests = self._count_requests_in_window(records, 3600)
-                if hour_requests > 0:
-                    summary["active_clients"] += 1
-                    summary["total_requests_last_hour"] += hour_requests
-            
-            return summary
+        summary = {
+            "total_clients": len(self._usage),
+            "categories": list(self._limits.keys()),
+            "active_clients": 0,
+            "total_requests_last_hour": 0
+        }
+        
+        current_time = time.time()
+        for client_id, usage in list(self._usage.items()):
+            with self._lock_for(client_id):
+                hour_requests = usage.windows["hour"].count(current_time)
+            if hour_requests > 0:
+                summary["active_clients"] += 1
+                summary["total_requests_last_hour"] += hour_requests
+        
+        return summary
     
     def reset_client_usage(self, client_id: str):
         """Reset usage for a specific client (admin function)."""
-        with self._lock:
-            if client_id in self._usage:
-                self._usage[client_id].clear()
+        usage = self._usage.get(client_id)
+        if usage is not None:
+            with self._lock_for(client_id):
+                usage.reset()
     
     def get_client_usage(self, client_id: str) -> Optional[Dict[str, Any]]:
         """Get usage statistics for a specific client."""
-        with self._lock:
-            if client_id not in self._usage:
-                return None
-            
-            records = self._usage[client_id]
-            usage = self._get_usage_stats(records)
-            
-            return {
-                "client_id": client_id,
-                "usage": usage,
-                "total_requests": len(records),
-                "first_request": datetime.fromtimestamp(records[0].timestamp).isoformat() if records else None,
-                "last_request": datetime.fromtimestamp(records[-1].timestamp).isoformat() if records else None
-            }
+        client_usage = self._usage.get(client_id)
+        if client_usage is None:
+            return None
+        
+        with self._lock_for(client_id):
+            usage = client_usage.usage(time.time())
+            first_request = client_usage.first_request
+            last_request = client_usage.last_request
+            total_requests = client_usage.total_requests
+        
+        return {
+            "client_id": client_id,
+            "usage": usage,
+            "total_requests": total_requests,
+            "first_request": datetime.fromtimestamp(first_request).isoformat() if first_request else None,
+            "last_request": datetime.fromtimestamp(last_request).isoformat() if last_request else None
+        }
 
 
 rate_limiter = RateLimiter()
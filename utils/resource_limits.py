@@ -9,6 +9,7 @@ from fastapi import Request, Query, HTTPException
 from functools import wraps
 import asyncio
 from utils.error_handling import error_handler, ErrorCode, create_rate_limit_error
+from utils.gtfs_time import SECONDS_PER_DAY, time_to_seconds
 
 
 class ResourceLimits:
@@ -32,6 +33,10 @@ class ResourceLimits:
             "route_trips": 500,
             "bulk_export": 5000
         },
+        "stop_times": {
+            "default": 1000,
+            "bulk_export": 50000
+        },
         "system": {
             "alerts": 100,
             "stats": 50
@@ -63,7 +68,12 @@ class ResourceLimits:
 
 def get_endpoint_category(path: str) -> str:
     """Determine resource category based on endpoint path."""
-    if "/stops" in path:
+    if "/stop_times" in path:
+        if "/export" in path or "format=" in path:
+            return "stop_times.bulk_export"
+        else:
+            return "stop_times.default"
+    elif "/stops" in path:
         if "/search" in path:
             return "stops.search"
         elif "/nearby" in path:
@@ -227,6 +237,31 @@ def validate_pagination_params(
     }
 
 
+def time_range_seconds(start_time: str, end_time: str) -> float:
+    """
+    Length of a time range in seconds.
+    
+    Args:
+        start_time: GTFS HH:MM:SS time or ISO datetime
+        end_time: GTFS HH:MM:SS time or ISO datetime; a GTFS end time earlier
+            than the start time wraps past midnight
+    
+    Returns:
+        Number of seconds between the two times
+    
+    Raises:
+        ValueError: If the times are in neither format
+    """
+    try:
+        start_secs, end_secs = time_to_seconds(start_time), time_to_seconds(end_time)
+    except ValueError:
+        return (datetime.fromisoformat(end_time) - datetime.fromisoformat(start_time)).total_seconds()
+    
+    if end_secs < start_secs:
+        end_secs += SECONDS_PER_DAY
+    return end_secs - start_secs
+
+
 def validate_time_window(
     time_window_hours: Optional[int] = None,
     start_time: Optional[str] = None,
@@ -238,8 +273,8 @@ def validate_time_window(
     
     Args:
         time_window_hours: Time window in hours from now
-        start_time: Start time in ISO format
-        end_time: End time in ISO format
+        start_time: Start time in HH:MM:SS or ISO format
+        end_time: End time in HH:MM:SS or ISO format
         request_id: Optional request ID for error tracking
     
     Returns:
@@ -267,32 +302,28 @@ def validate_time_window(
     
     if start_time and end_time:
         try:
-            start_dt = datetime.fromisoformat(start_time)
-            end_dt = datetime.fromisoformat(end_time)
-            
-            if start_dt >= end_dt:
-                error_handler.handle_validation_error(
-                    field="time_range",
-                    value=f"{start_time} to {end_time}",
-                    constraint="start_time must be before end_time",
-                    request_id=request_id
-                )
-            
-            
-            time_diff = end_dt - start_dt
-            if time_diff.total_seconds() > ResourceLimits.TIME_WINDOW_LIMITS["max_hours"] * 3600:
-                error_handler.handle_validation_error(
-                    field="time_range",
-                    value=f"{start_time} to {end_time}",
-                    constraint=f"time range cannot exceed {ResourceLimits.TIME_WINDOW_LIMITS['max_hours']} hours",
-                    request_id=request_id
-                )
-                
-        except ValueError as e:
+            range_seconds = time_range_seconds(start_time, end_time)
+        except ValueError:
             error_handler.handle_validation_error(
                 field="time_format",
                 value=f"start_time={start_time}, end_time={end_time}",
-                constraint="times must be in ISO format (YYYY-MM-DDTHH:MM:SS)",
+                constraint="times must be in HH:MM:SS or ISO format (YYYY-MM-DDTHH:MM:SS)",
+                request_id=request_id
+            )
+
+        if range_seconds <= 0:
+            error_handler.handle_validation_error(
+                field="time_range",
+                value=f"{start_time} to {end_time}",
+                constraint="start_time must be before end_time",
+                request_id=request_id
+            )
+
+        if range_seconds > ResourceLimits.TIME_WINDOW_LIMITS["max_hours"] * 3600:
+            error_handler.handle_validation_error(
+                field="time_range",
+                value=f"{start_time} to {end_time}",
+                constraint=f"time range cannot exceed {ResourceLimits.TIME_WINDOW_LIMITS['max_hours']} hours",
                 request_id=request_id
             )
     
@@ -519,11 +550,11 @@ async def validate_export_request(
     validate_export_size(export_size, endpoint_category, request_id)
     
     
-    if format_type and format_type not in ['json', 'csv', 'geojson']:
+    if format_type and format_type not in ['json', 'ndjson', 'csv', 'geojson', 'arrow', 'parquet']:
         error_handler.handle_validation_error(
             field="format",
             value=format_type,
-            constraint="must be one of: json, csv, geojson",
+            constraint="must be one of: json, ndjson, csv, geojson, arrow, parquet",
             request_id=request_id
         )
     
@@ -0,0 +1,230 @@
+"""
+Response cache for the transit API.
+Stores fully encoded response bodies (and a gzip copy) keyed on path and
+normalised query string, and replays them from an ASGI layer before routing,
+so cache hits skip validation, serialisation and compression entirely.
+"""
+
+import gzip
+import os
+import re
+import time
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.caching import InMemoryCache, get_data_version
+
+
+DEFAULT_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_COMPRESS_MIN_BYTES = 1024
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+COMPRESSIBLE_TYPES = ("application/json", "application/geo+json", "application/vnd.mapbox-vector-tile", "text/")
+
+# Headers that describe a single exchange rather than the resource; they are
+# never stored and are added afresh by outer layers on every response.
+UNCACHED_HEADER_PREFIXES = (
+    "x-ratelimit-", "x-export-size-limit", "x-request-size-limit",
+    "x-cache-", "x-process-time", "x-request-id",
+    "date", "server", "content-length", "set-cookie"
+)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class CachedResponse:
+    """An encoded response body with the headers needed to replay it."""
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, gzip_body: Optional[bytes], max_age: int):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.gzip_body = gzip_body
+        self.max_age = max_age
+        self.stored_at = time.time()
+
+
+def response_ttl(headers: Headers) -> Optional[int]:
+    """
+    Seconds a response may be cached for, taken from its Cache-Control header.
+
+    Returns:
+        The ``max-age`` of public responses, or None if the response must not be cached
+    """
+    cache_control = headers.get("cache-control", "").lower()
+    if not cache_control or "no-store" in cache_control or "private" in cache_control:
+        return None
+    match = _MAX_AGE.search(cache_control)
+    if not match or int(match.group(1)) <= 0:
+        return None
+    return int(match.group(1))
+
+
+def normalize_query_string(query_string: bytes) -> str:
+    """Sort query parameters so equivalent URLs share a cache entry."""
+    if not query_string:
+        return ""
+    pairs = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode(sorted(pairs))
+
+
+def accepts_gzip(headers: Headers) -> bool:
+    for coding in headers.get("accept-encoding", "").lower().split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI middleware caching encoded GET responses.
+
+    Only successful responses that declare a public ``Cache-Control: max-age``
+    are stored, for exactly that many seconds, so cache lifetimes follow the
+    values endpoints pass to ``get_cache_headers``. Keys include the data
+    version, so a new feed import never serves stale bodies. Add this layer
+    before the rate limiting middleware so limits still apply to hits.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: Optional[InMemoryCache] = None,
+        exclude_paths: Optional[Iterable[str]] = None,
+        vary_headers: Iterable[str] = (),
+        compress_min_bytes: int = DEFAULT_COMPRESS_MIN_BYTES
+    ):
+        """
+        Args:
+            app: ASGI application to wrap
+            cache: Cache holding the responses, defaults to the shared response cache
+            exclude_paths: Path prefixes that are never cached
+            vary_headers: Request headers whose values are part of the cache key
+            compress_min_bytes: Smallest body for which a gzip copy is stored
+        """
+        self.app = app
+        self.cache = cache if cache is not None else get_response_cache()
+        self.exclude_paths = tuple(exclude_paths or ("/docs", "/redoc", "/openapi.json", "/health"))
+        self.vary_headers = tuple(header.lower() for header in vary_headers)
+        self.compress_min_bytes = compress_min_bytes
+
+    def _cache_key(self, scope: Scope, headers: Headers) -> str:
+        parts = [scope["path"], normalize_query_string(scope.get("query_string", b""))]
+        parts.extend(f"{name}={headers.get(name, '')}" for name in self.vary_headers)
+        parts.append(get_data_version())
+        return "response:" + "|".join(parts)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in CACHEABLE_METHODS
+            or scope["path"].startswith(self.exclude_paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if "no-cache" in request_headers.get("cache-control", "").lower():
+            await self.app(scope, receive, send)
+            return
+
+        key = self._cache_key(scope, request_headers)
+        cached_response = self.cache.get(key)
+        if cached_response is not None:
+            await self._send_cached(cached_response, scope, request_headers, send)
+            return
+
+        if scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        await self._call_and_store(key, scope, receive, send)
+
+    async def _send_cached(self, cached_response: CachedResponse, scope: Scope, request_headers: Headers, send: Send) -> None:
+        use_gzip = cached_response.gzip_body is not None and accepts_gzip(request_headers)
+        body = cached_response.gzip_body if use_gzip else cached_response.body
+
+        headers = list(cached_response.headers)
+        headers.append((b"content-length", str(len(body)).encode()))
+        headers.append((b"age", str(int(time.time() - cached_response.stored_at)).encode()))
+        headers.append((b"x-response-cache", b"HIT"))
+        vary = ["Accept-Encoding"] if cached_response.gzip_body is not None else []
+        vary.extend(name.title() for name in self.vary_headers)
+        if vary:
+            headers.append((b"vary", ", ".join(vary).encode("latin-1")))
+        if use_gzip:
+            headers.append((b"content-encoding", b"gzip"))
+
+        await send({"type": "http.response.start", "status": cached_response.status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
+
+    async def _call_and_store(self, key: str, scope: Scope, receive: Receive, send: Send) -> None:
+        status = 0
+        stored_headers: List[Tuple[bytes, bytes]] = []
+        max_age: Optional[int] = None
+        chunks: List[bytes] = []
+
+        async def send_and_capture(message: Message) -> None:
+            nonlocal status, stored_headers, max_age
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                cacheable = status == 200 and "content-encoding" not in headers and "set-cookie" not in headers
+                max_age = response_ttl(headers) if cacheable else None
+                if max_age is not None:
+                    stored_headers = [
+                        (name, value) for name, value in message["headers"]
+                        if not name.decode("latin-1").lower().startswith(UNCACHED_HEADER_PREFIXES)
+                    ]
+                    headers["X-Response-Cache"] = "MISS"
+                    if self._may_compress(headers):
+                        headers.add_vary_header("Accept-Encoding")
+                for name in self.vary_headers:
+                    headers.add_vary_header(name.title())
+            elif message["type"] == "http.response.body" and max_age is not None:
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    self._store(key, status, stored_headers, b"".join(chunks), max_age)
+            await send(message)
+
+        await self.app(scope, receive, send_and_capture)
+
+    def _may_compress(self, headers: MutableHeaders) -> bool:
+        """Whether later hits for this response may be served gzipped, so it must vary on Accept-Encoding."""
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        content_length = headers.get("content-length")
+        return content_length is None or not content_length.isdigit() or int(content_length) >= self.compress_min_bytes
+
+    def _store(self, key: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, max_age: int) -> None:
+        content_type = dict(headers).get(b"content-type", b"").decode("latin-1")
+        gzip_body = None
+        if len(body) >= self.compress_min_bytes and content_type.startswith(COMPRESSIBLE_TYPES):
+            gzip_body = gzip.compress(body, compresslevel=6)
+        self.cache.set(key, CachedResponse(status, headers, body, gzip_body, max_age), ttl=max_age)
+
+
+_response_cache = InMemoryCache(
+    default_ttl=None,
+    max_entries=DEFAULT_RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=DEFAULT_RESPONSE_CACHE_MAX_BYTES
+)
+
+
+def get_response_cache() -> InMemoryCache:
+    return _response_cache
+
+
+def add_response_cache_middleware(app, exclude_paths: Optional[list] = None, vary_headers: Iterable[str] = ()):
+    """
+    Add the response cache middleware to a FastAPI application.
+
+    Args:
+        app: FastAPI application instance
+        exclude_paths: Path prefixes that are never cached
+        vary_headers: Request headers whose values are part of the cache key
+    """
+    app.add_middleware(ResponseCacheMiddleware, exclude_paths=exclude_paths, vary_headers=vary_headers)
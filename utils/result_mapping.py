@@ -0,0 +1,75 @@
+"""
+Result mapping utilities for the transit API.
+Converts query results into response models in bulk, replacing per-row
+DataFrame iteration and hand-written field coercion in handlers.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Type, TypeVar
+from pydantic import BaseModel, TypeAdapter
+from database_connector import DatabaseConnector
+
+
+M = TypeVar("M", bound=BaseModel)
+
+_adapters: Dict[type, TypeAdapter] = {}
+_adapters_lock = threading.Lock()
+
+
+def _list_adapter(model: Type[M]) -> TypeAdapter:
+    """Get (and memoise) the validator for ``List[model]``."""
+    adapter = _adapters.get(model)
+    if adapter is None:
+        with _adapters_lock:
+            adapter = _adapters.get(model)
+            if adapter is None:
+                adapter = TypeAdapter(List[model])
+                _adapters[model] = adapter
+    return adapter
+
+
+def map_records(model: Type[M], records: Sequence[Dict[str, Any]]) -> List[M]:
+    """
+    Validate a batch of row dicts into models in a single call.
+
+    Columns are matched to fields by name; extra columns are ignored and
+    missing ones take the field defaults. NULL handling and type coercion
+    belong in the SQL (``COALESCE``, ``CAST``), not in Python.
+
+    Args:
+        model: Pydantic model class
+        records: Row dicts, e.g. from ``DatabaseConnector.execute_records``
+
+    Returns:
+        List of model instances in row order
+    """
+    return _list_adapter(model).validate_python(records)
+
+
+def fetch_models(db: DatabaseConnector, model: Type[M], query: str, params: Optional[list] = None) -> List[M]:
+    """
+    Run a query and map every row to ``model``.
+
+    Args:
+        db: Database connector instance
+        model: Pydantic model class whose fields match the selected column names
+        query: SQL query
+        params: Optional query parameters
+
+    Returns:
+        List of model instances
+    """
+    return map_records(model, db.execute_records(query, params))
+
+
+def fetch_model(db: DatabaseConnector, model: Type[M], query: str, params: Optional[list] = None) -> Optional[M]:
+    """
+    Run a query and map its first row to ``model``.
+
+    Returns:
+        Model instance, or None if the query returned no rows
+    """
+    records = db.execute_records(query, params)
+    if not records:
+        return None
+    return map_records(model, records[:1])[0]
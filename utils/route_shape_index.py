@@ -0,0 +1,252 @@
+"""
+In-memory spatial index over route shapes.
+Every consecutive pair of shape points becomes a segment registered in each
+grid cell its bounding box touches, so "routes within R miles" only measures
+point-to-segment distances for segments near the query point.
+"""
+
+import math
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from pydantic_models import NearbyRoute
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.geospatial import calculate_bounding_box
+
+
+CELL_DEGREES = 0.01
+MILES_PER_DEGREE = 69.0
+_COL_SPAN = 100000
+
+
+def point_segment_distances(
+    lat: float,
+    lon: float,
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray
+) -> np.ndarray:
+    """
+    Distance in miles from a point to each segment.
+
+    Coordinates are projected onto a plane tangent at the query point
+    (equirectangular), which is accurate to well under 1% at search radii.
+
+    Args:
+        lat, lon: Query point in decimal degrees
+        lat1, lon1, lat2, lon2: Segment endpoint arrays in decimal degrees
+
+    Returns:
+        Array of distances in miles
+    """
+    x_scale = MILES_PER_DEGREE * math.cos(math.radians(lat))
+    ax = (lon1 - lon) * x_scale
+    ay = (lat1 - lat) * MILES_PER_DEGREE
+    dx = (lon2 - lon1) * x_scale
+    dy = (lat2 - lat1) * MILES_PER_DEGREE
+
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_sq > 0, -(ax * dx + ay * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(ax + t * dx, ay + t * dy)
+
+
+class RouteShapeIndex:
+    """
+    Grid-hashed index of shape segments with a shape-to-route mapping.
+
+    Segment endpoints are held in NumPy arrays. ``shape_route_offsets`` and
+    ``shape_route_ids`` form a CSR adjacency from shape position to the
+    routes whose trips use that shape.
+    """
+
+    def __init__(
+        self,
+        segments: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+        segment_shapes: np.ndarray,
+        shape_route_offsets: np.ndarray,
+        shape_route_ids: np.ndarray,
+        routes: List[Dict[str, Any]],
+        cell_degrees: float = CELL_DEGREES
+    ):
+        """
+        Args:
+            segments: Arrays (lat1, lon1, lat2, lon2) of segment endpoints
+            segment_shapes: Shape position of each segment
+            shape_route_offsets: CSR offsets into ``shape_route_ids`` per shape
+            shape_route_ids: Route positions referenced by the offsets
+            routes: Route fields (as accepted by ``RouteBasic``) by route position
+            cell_degrees: Grid cell size in degrees
+        """
+        self.lat1, self.lon1, self.lat2, self.lon2 = (np.asarray(a, dtype=np.float64) for a in segments)
+        self.segment_shapes = np.asarray(segment_shapes, dtype=np.int64)
+        self.shape_route_offsets = np.asarray(shape_route_offsets, dtype=np.int64)
+        self.shape_route_ids = np.asarray(shape_route_ids, dtype=np.int64)
+        self.routes = routes
+        self.cell_degrees = cell_degrees
+
+        row_lo = np.floor(np.minimum(self.lat1, self.lat2) / cell_degrees).astype(np.int64)
+        row_hi = np.floor(np.maximum(self.lat1, self.lat2) / cell_degrees).astype(np.int64)
+        col_lo = np.floor(np.minimum(self.lon1, self.lon2) / cell_degrees).astype(np.int64)
+        col_hi = np.floor(np.maximum(self.lon1, self.lon2) / cell_degrees).astype(np.int64)
+
+        n_cols = col_hi - col_lo + 1
+        counts = (row_hi - row_lo + 1) * n_cols
+        segment_ids = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+        local = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        rows = row_lo[segment_ids] + local // n_cols[segment_ids]
+        cols = col_lo[segment_ids] + local % n_cols[segment_ids]
+        keys = rows * _COL_SPAN + cols
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        sorted_segments = segment_ids[order]
+        unique_keys, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], len(sorted_keys))
+
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        for key, start, end in zip(unique_keys.tolist(), starts.tolist(), ends.tolist()):
+            row = int(round(key / _COL_SPAN))
+            self._cells[(row, key - row * _COL_SPAN)] = sorted_segments[start:end]
+
+    def __len__(self) -> int:
+        return len(self.lat1)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "RouteShapeIndex":
+        """Build the index from the ``shapes``, ``trips`` and ``routes`` tables."""
+        route_rows = db.execute("""
+            SELECT
+                route_id,
+                route_short_name,
+                route_long_name,
+                COALESCE(route_color, 'FFFFFF') as route_color,
+                COALESCE(route_text_color, '000000') as route_text_color,
+                COALESCE(route_type, 3) as route_type
+            FROM routes
+            ORDER BY route_id
+        """)
+        routes = [
+            {
+                "route_id": row[0],
+                "route_short_name": row[1] or "",
+                "route_long_name": row[2] or "",
+                "route_color": row[3],
+                "route_text_color": row[4],
+                "route_type": row[5],
+            }
+            for row in route_rows
+        ]
+        route_positions = {route["route_id"]: i for i, route in enumerate(routes)}
+
+        shape_routes = db.execute("""
+            SELECT DISTINCT shape_id, route_id
+            FROM trips
+            WHERE shape_id IS NOT NULL
+            ORDER BY shape_id, route_id
+        """)
+        shape_positions: Dict[str, int] = {}
+        route_lists: List[List[int]] = []
+        for shape_id, route_id in shape_routes:
+            if route_id not in route_positions:
+                continue
+            if shape_id not in shape_positions:
+                shape_positions[shape_id] = len(route_lists)
+                route_lists.append([])
+            route_lists[shape_positions[shape_id]].append(route_positions[route_id])
+
+        shape_route_offsets = np.zeros(len(route_lists) + 1, dtype=np.int64)
+        shape_route_offsets[1:] = np.cumsum([len(ids) for ids in route_lists])
+        shape_route_ids = np.array([i for ids in route_lists for i in ids], dtype=np.int64)
+
+        points = db.execute_df("""
+            SELECT shape_id, shape_pt_lat, shape_pt_lon
+            FROM shapes
+            WHERE shape_pt_lat IS NOT NULL AND shape_pt_lon IS NOT NULL
+            ORDER BY shape_id, shape_pt_sequence
+        """)
+        shape_index = points["shape_id"].map(shape_positions).fillna(-1).to_numpy(dtype=np.int64)
+        lats = points["shape_pt_lat"].to_numpy(dtype=np.float64)
+        lons = points["shape_pt_lon"].to_numpy(dtype=np.float64)
+
+        # A segment joins consecutive points of the same (route-bearing) shape
+        valid = (shape_index[:-1] == shape_index[1:]) & (shape_index[:-1] >= 0)
+        segments = (lats[:-1][valid], lons[:-1][valid], lats[1:][valid], lons[1:][valid])
+
+        return cls(segments, shape_index[:-1][valid], shape_route_offsets, shape_route_ids, routes)
+
+    def _candidate_segments(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        row_lo, row_hi = math.floor(min_lat / self.cell_degrees), math.floor(max_lat / self.cell_degrees)
+        col_lo, col_hi = math.floor(min_lon / self.cell_degrees), math.floor(max_lon / self.cell_degrees)
+
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            found = [
+                segments for (row, col), segments in self._cells.items()
+                if row_lo <= row <= row_hi and col_lo <= col <= col_hi
+            ]
+        else:
+            found = [
+                self._cells[(row, col)]
+                for row in range(row_lo, row_hi + 1)
+                for col in range(col_lo, col_hi + 1)
+                if (row, col) in self._cells
+            ]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def routes_within(self, lat: float, lon: float, radius_miles: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find routes with any shape segment within ``radius_miles`` of a point.
+
+        Returns:
+            Tuple of (route positions, distances in miles), nearest first
+        """
+        candidates = self._candidate_segments(*calculate_bounding_box(lat, lon, radius_miles))
+        if not len(candidates):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        distances = point_segment_distances(
+            lat, lon,
+            self.lat1[candidates], self.lon1[candidates],
+            self.lat2[candidates], self.lon2[candidates]
+        )
+        mask = distances <= radius_miles
+        shapes, distances = self.segment_shapes[candidates[mask]], distances[mask]
+        if not len(shapes):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        shape_ids, inverse = np.unique(shapes, return_inverse=True)
+        shape_distances = np.full(len(shape_ids), np.inf)
+        np.minimum.at(shape_distances, inverse, distances)
+
+        counts = self.shape_route_offsets[shape_ids + 1] - self.shape_route_offsets[shape_ids]
+        starts = np.repeat(self.shape_route_offsets[shape_ids], counts)
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        route_ids = self.shape_route_ids[starts + local]
+        route_distances = np.repeat(shape_distances, counts)
+
+        unique_routes, route_inverse = np.unique(route_ids, return_inverse=True)
+        best = np.full(len(unique_routes), np.inf)
+        np.minimum.at(best, route_inverse, route_distances)
+
+        order = np.argsort(best, kind="stable")
+        return unique_routes[order], best[order]
+
+    def nearby(self, lat: float, lon: float, radius_miles: float, limit: int) -> List[NearbyRoute]:
+        """Routes within ``radius_miles`` of a point, nearest first, at most ``limit``."""
+        positions, distances = self.routes_within(lat, lon, radius_miles)
+        return [
+            NearbyRoute(**self.routes[position], distance_miles=round(distance, 4))
+            for position, distance in zip(positions[:limit].tolist(), distances[:limit].tolist())
+        ]
+
+
+register_feed_index("route_shape_index", RouteShapeIndex.from_database)
+
+
+def get_route_shape_index(db: DatabaseConnector) -> RouteShapeIndex:
+    """Get the route shape index, building it from ``db`` on first use."""
+    return get_feed_index("route_shape_index", db)
@@ -0,0 +1,140 @@
+"""
+GTFS service calendar.
+Expands ``calendar`` weekly patterns and ``calendar_dates`` exceptions once per
+feed into a packed bitset per service_id over the feed's date range, so the
+services running on a date are found by reading one bit column rather than
+evaluating calendar rules per query.
+"""
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List, Optional
+import numpy as np
+from database_connector import DatabaseConnector
+from utils.feed_indexes import register_feed_index, get_feed_index
+
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+SERVICE_ADDED = 1
+SERVICE_REMOVED = 2
+
+
+def parse_service_date(value: str) -> date:
+    """
+    Parse a service date in YYYY-MM-DD format.
+
+    Raises:
+        ValueError: If the date is malformed or does not exist
+    """
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid service date. Expected YYYY-MM-DD, got: {value}")
+
+
+class ServiceCalendar:
+    """
+    Active-service bitsets per service_id.
+
+    Row ``i`` of ``bits`` is the packed day-by-day activity of
+    ``service_ids[i]`` starting at ``first_date``. Service codes from
+    ``codes_for`` index the masks returned by ``active_mask``; unknown
+    services get code -1, which always maps to inactive.
+    """
+
+    def __init__(self, service_ids: List[str], first_date: Optional[date], active_days: np.ndarray):
+        """
+        Args:
+            service_ids: Service identifiers by row
+            first_date: Date of the first column, None for an empty calendar
+            active_days: Boolean matrix (services x days) of active dates
+        """
+        self.service_ids = service_ids
+        self.service_codes = {service_id: i for i, service_id in enumerate(service_ids)}
+        self.first_date = first_date
+        self.num_days = active_days.shape[1] if active_days.ndim == 2 else 0
+        self.bits = np.packbits(active_days.astype(bool), axis=1) if self.num_days else np.zeros((len(service_ids), 0), dtype=np.uint8)
+        self.active_mask = lru_cache(maxsize=64)(self._active_mask)
+
+    def __len__(self) -> int:
+        return len(self.service_ids)
+
+    @property
+    def last_date(self) -> Optional[date]:
+        if self.first_date is None:
+            return None
+        return self.first_date + timedelta(days=self.num_days - 1)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "ServiceCalendar":
+        """Build the calendar from the ``calendar`` and ``calendar_dates`` tables."""
+        weekly = db.execute(f"""
+            SELECT service_id, {", ".join(WEEKDAYS)}, start_date, end_date
+            FROM calendar
+            WHERE service_id IS NOT NULL AND start_date IS NOT NULL AND end_date IS NOT NULL
+            ORDER BY service_id
+        """)
+        exceptions = db.execute("""
+            SELECT service_id, date, exception_type
+            FROM calendar_dates
+            WHERE service_id IS NOT NULL AND date IS NOT NULL
+            ORDER BY service_id, date
+        """)
+
+        service_ids = sorted({row[0] for row in weekly} | {row[0] for row in exceptions})
+        dates = [row[8] for row in weekly] + [row[9] for row in weekly] + [row[1] for row in exceptions]
+        if not dates:
+            return cls(service_ids, None, np.zeros((len(service_ids), 0), dtype=bool))
+
+        first_date = min(dates)
+        num_days = (max(dates) - first_date).days + 1
+        codes = {service_id: i for i, service_id in enumerate(service_ids)}
+        weekdays = (first_date.weekday() + np.arange(num_days)) % 7
+        active_days = np.zeros((len(service_ids), num_days), dtype=bool)
+
+        for row in weekly:
+            service_id, flags, start_date, end_date = row[0], np.array(row[1:8]) == 1, row[8], row[9]
+            start, end = (start_date - first_date).days, (end_date - first_date).days
+            active_days[codes[service_id], start:end + 1] |= flags[weekdays[start:end + 1]]
+
+        for service_id, exception_date, exception_type in exceptions:
+            day = (exception_date - first_date).days
+            if exception_type == SERVICE_ADDED:
+                active_days[codes[service_id], day] = True
+            elif exception_type == SERVICE_REMOVED:
+                active_days[codes[service_id], day] = False
+
+        return cls(service_ids, first_date, active_days)
+
+    def codes_for(self, service_ids: Iterable[str]) -> np.ndarray:
+        """Service codes for ``service_ids``, -1 for services not in the calendar."""
+        return np.array([self.service_codes.get(service_id, -1) for service_id in service_ids], dtype=np.int32)
+
+    def _active_mask(self, service_date: date) -> np.ndarray:
+        """
+        Read-only mask over service codes of the services running on ``service_date``.
+
+        The mask has one extra, always False, entry so that code -1 can index it.
+        """
+        mask = np.zeros(len(self.service_ids) + 1, dtype=bool)
+        day = (service_date - self.first_date).days if self.first_date is not None else -1
+        if 0 <= day < self.num_days:
+            mask[:-1] = (self.bits[:, day >> 3] >> (7 - (day & 7))) & 1
+        mask.flags.writeable = False
+        return mask
+
+    def active_service_ids(self, service_date: date) -> List[str]:
+        """Service ids running on ``service_date``."""
+        return [self.service_ids[i] for i in np.nonzero(self.active_mask(service_date)[:-1])[0].tolist()]
+
+    def is_active(self, service_id: str, service_date: date) -> bool:
+        return bool(self.active_mask(service_date)[self.service_codes.get(service_id, -1)])
+
+
+register_feed_index("service_calendar", ServiceCalendar.from_database)
+
+
+def get_service_calendar(db: DatabaseConnector) -> ServiceCalendar:
+    """Get the service calendar, building it from ``db`` on first use."""
+    return get_feed_index("service_calendar", db)
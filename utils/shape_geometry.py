@@ -0,0 +1,221 @@
+"""
+Shape simplification tiers.
+Each shape is simplified with Douglas-Peucker once at import: every point is
+given the largest tolerance at which it survives, so every tier is a filter
+on that significance rather than another simplification pass. Shapes that
+lie entirely along another shape of the same route are detected here too,
+and each tier is encoded for the compact output formats.
+"""
+
+import math
+import struct
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from utils.geospatial import EARTH_RADIUS
+
+
+# Tier i keeps the points of a shape that matter at SHAPE_TOLERANCES_METERS[i];
+# tier 0 is the full-resolution shape
+SHAPE_TOLERANCES_METERS = (0.0, 2.0, 10.0, 50.0, 250.0)
+
+# A shape is folded into another when none of its points is further than
+# this from the other shape
+SUBSET_TOLERANCE_METERS = 15.0
+
+SHAPE_FORMATS = ("geojson", "polyline", "binary")
+POLYLINE_PRECISION = 5
+BINARY_MEDIA_TYPE = "application/octet-stream"
+
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS["meters"] / 180
+
+# Ground resolution of a 256 pixel Web Mercator tile at zoom 0 on the equator
+EQUATOR_METERS_PER_PIXEL = 2 * math.pi * EARTH_RADIUS["meters"] / 256
+
+
+def project(lats: np.ndarray, lons: np.ndarray, reference_lat: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Equirectangular projection to meters around ``reference_lat``.
+
+    Accurate to well under 1% over the extent of a route.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if reference_lat is None:
+        reference_lat = float(lats.mean()) if len(lats) else 0.0
+    return lons * METERS_PER_DEGREE * math.cos(math.radians(reference_lat)), lats * METERS_PER_DEGREE
+
+
+def segment_distances(px: np.ndarray, py: np.ndarray, ax, ay, bx, by) -> np.ndarray:
+    """Planar distance from points to segments (a, b); arguments broadcast."""
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(length_sq > 0, ((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def douglas_peucker_significance(xs: np.ndarray, ys: np.ndarray, min_tolerance: float) -> np.ndarray:
+    """
+    Largest Douglas-Peucker tolerance at which each point is kept.
+
+    Simplifying with tolerance ``t`` keeps exactly the points whose
+    significance is greater than ``t``. Endpoints are always kept; points
+    that only matter below ``min_tolerance`` get significance 0, which stops
+    the recursion early.
+
+    Args:
+        xs, ys: Projected coordinates in meters
+        min_tolerance: Smallest tolerance that will be asked for
+
+    Returns:
+        Significance in meters per point
+    """
+    n = len(xs)
+    significance = np.zeros(n, dtype=np.float64)
+    if n == 0:
+        return significance
+    significance[0] = significance[-1] = np.inf
+    # (start, end, significance of the split that created the span)
+    stack = [(0, n - 1, np.inf)]
+    while stack:
+        start, end, parent = stack.pop()
+        if end - start < 2:
+            continue
+        distances = segment_distances(xs[start + 1:end], ys[start + 1:end], xs[start], ys[start], xs[end], ys[end])
+        i = int(np.argmax(distances))
+        distance = float(distances[i])
+        if distance <= min_tolerance:
+            continue
+        # A point survives a tolerance only if the split that exposed it did
+        split = start + 1 + i
+        significance[split] = min(distance, parent)
+        stack.append((start, split, significance[split]))
+        stack.append((split, end, significance[split]))
+    return significance
+
+
+def simplify_tiers(lats: np.ndarray, lons: np.ndarray, tolerances=SHAPE_TOLERANCES_METERS) -> List[np.ndarray]:
+    """
+    Point positions kept by each tolerance tier.
+
+    Consecutive duplicate points are dropped from every tier, including the
+    full-resolution tier 0.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    distinct = np.ones(len(lats), dtype=bool)
+    distinct[1:] = (np.diff(lats) != 0) | (np.diff(lons) != 0)
+    positions = np.nonzero(distinct)[0]
+
+    xs, ys = project(lats[positions], lons[positions])
+    positive = [tolerance for tolerance in tolerances if tolerance > 0]
+    significance = douglas_peucker_significance(xs, ys, min(positive) if positive else 0.0)
+    return [positions if tolerance <= 0 else positions[significance > tolerance] for tolerance in tolerances]
+
+
+def polyline_covers(
+        outer: Tuple[np.ndarray, np.ndarray],
+        inner: Tuple[np.ndarray, np.ndarray],
+        tolerance: float,
+        block: int = 256
+) -> bool:
+    """
+    Whether every point of ``inner`` lies within ``tolerance`` of the ``outer`` polyline.
+
+    Args:
+        outer: Projected (xs, ys) of the covering polyline
+        inner: Projected (xs, ys) of the polyline that may be covered
+        tolerance: Largest allowed distance in meters
+        block: Inner points compared against all outer segments at a time
+    """
+    ox, oy = outer
+    ix, iy = inner
+    if len(ix) == 0:
+        return True
+    if len(ox) == 0:
+        return False
+    if (ix.min() < ox.min() - tolerance or ix.max() > ox.max() + tolerance
+            or iy.min() < oy.min() - tolerance or iy.max() > oy.max() + tolerance):
+        return False
+    if len(ox) == 1:
+        return bool(np.all(np.hypot(ix - ox[0], iy - oy[0]) <= tolerance))
+
+    ax, ay, bx, by = ox[:-1], oy[:-1], ox[1:], oy[1:]
+    for start in range(0, len(ix), block):
+        px = ix[start:start + block, None]
+        py = iy[start:start + block, None]
+        if np.any(segment_distances(px, py, ax, ay, bx, by).min(axis=1) > tolerance):
+            return False
+    return True
+
+
+def zoom_tolerance(zoom: int, latitude: float) -> float:
+    """Meters covered by one pixel of a Web Mercator map at ``zoom`` and ``latitude``."""
+    return EQUATOR_METERS_PER_PIXEL * math.cos(math.radians(latitude)) / (2 ** zoom)
+
+
+def select_tier(tolerance_meters: float) -> int:
+    """Index of the coarsest tier whose tolerance does not exceed ``tolerance_meters``."""
+    tier = 0
+    for i, tolerance in enumerate(SHAPE_TOLERANCES_METERS):
+        if tolerance <= tolerance_meters:
+            tier = i
+    return tier
+
+
+def encode_polyline(lats: np.ndarray, lons: np.ndarray, precision: int = POLYLINE_PRECISION) -> str:
+    """
+    Encode coordinates in the Google encoded polyline format.
+
+    Args:
+        lats, lons: Coordinates in decimal degrees
+        precision: Decimal places kept (5 is the standard format)
+
+    Returns:
+        Encoded polyline string
+    """
+    scale = 10 ** precision
+    points = np.empty((len(lats), 2), dtype=np.int64)
+    points[:, 0] = np.round(np.asarray(lats, dtype=np.float64) * scale)
+    points[:, 1] = np.round(np.asarray(lons, dtype=np.float64) * scale)
+    deltas = np.diff(points, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1).tolist()
+
+    chars = []
+    for value in values:
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def encode_float32(lats: np.ndarray, lons: np.ndarray) -> bytes:
+    """Coordinates as little-endian float32 (lon, lat) pairs, in GeoJSON order."""
+    pairs = np.empty((len(lats), 2), dtype="<f4")
+    pairs[:, 0] = lons
+    pairs[:, 1] = lats
+    return pairs.tobytes()
+
+
+def pack_binary_shapes(shapes: Sequence[Tuple[str, int, bytes]]) -> bytes:
+    """
+    Frame precomputed float32 shapes into one binary response body.
+
+    Layout (little-endian): uint32 shape count, then per shape a uint32
+    point count, a uint32 id length, the UTF-8 shape id zero-padded to a
+    multiple of 4 bytes, and the ``encode_float32`` coordinates. Every
+    coordinate block starts 4-byte aligned, so clients can view it as a
+    Float32Array without copying.
+
+    Args:
+        shapes: (shape_id, point count, float32 coordinates) per shape
+    """
+    parts = [struct.pack("<I", len(shapes))]
+    for shape_id, point_count, coordinates in shapes:
+        encoded_id = shape_id.encode("utf-8")
+        parts.append(struct.pack("<II", point_count, len(encoded_id)))
+        parts.append(encoded_id + b"\0" * (-len(encoded_id) % 4))
+        parts.append(coordinates)
+    return b"".join(parts)
@@ -0,0 +1,223 @@
+"""
+In-memory spatial index over transit stops.
+Stops are bucketed into a uniform latitude/longitude grid so radius and
+k-nearest queries only compute Haversine distances for nearby cells.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from pydantic_models import Stop, StopWithDistance
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.geospatial import haversine_distances, calculate_bounding_box
+
+
+CELL_DEGREES = 0.01
+MILES_PER_DEGREE = 69.0
+_COL_SPAN = 100000
+
+
+class StopSpatialIndex:
+    """
+    Grid-hashed index of stop coordinates.
+
+    Coordinates are held in NumPy arrays; each occupied grid cell maps to the
+    array positions of its stops. Stop attributes are kept alongside so
+    queries return ``Stop``/``StopWithDistance`` objects without touching
+    the database.
+    """
+
+    def __init__(
+        self,
+        lats: np.ndarray,
+        lons: np.ndarray,
+        records: List[Dict[str, Any]],
+        cell_degrees: float = CELL_DEGREES
+    ):
+        """
+        Args:
+            lats: Stop latitudes in decimal degrees
+            lons: Stop longitudes in decimal degrees
+            records: Stop fields (as accepted by ``Stop``) aligned with the arrays
+            cell_degrees: Grid cell size in degrees
+        """
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.records = records
+        self.cell_degrees = cell_degrees
+        self.stop_ids = [record["stop_id"] for record in records]
+        self.positions = {stop_id: i for i, stop_id in enumerate(self.stop_ids)}
+
+        rows = np.floor(self.lats / cell_degrees).astype(np.int64)
+        cols = np.floor(self.lons / cell_degrees).astype(np.int64)
+        keys = rows * _COL_SPAN + cols
+
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        unique_keys, starts = np.unique(sorted_keys, return_index=True)
+        ends = np.append(starts[1:], len(sorted_keys))
+
+        self._cells: Dict[Tuple[int, int], np.ndarray] = {}
+        for key, start, end in zip(unique_keys.tolist(), starts.tolist(), ends.tolist()):
+            row = int(round(key / _COL_SPAN))
+            self._cells[(row, key - row * _COL_SPAN)] = order[start:end]
+
+        if len(records):
+            self._row_range = (int(rows.min()), int(rows.max()))
+            self._col_range = (int(cols.min()), int(cols.max()))
+        else:
+            self._row_range = self._col_range = (0, -1)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "StopSpatialIndex":
+        """Build the index from the ``stops`` table."""
+        rows = db.execute("""
+            SELECT
+                stop_id,
+                stop_name,
+                stop_lat,
+                stop_lon,
+                COALESCE(location_type, 0) as location_type,
+                COALESCE(wheelchair_boarding, 0) as wheelchair_boarding,
+                platform_code,
+                stop_desc,
+                zone_id
+            FROM stops
+            WHERE stop_lat IS NOT NULL AND stop_lon IS NOT NULL
+            ORDER BY stop_id
+        """)
+
+        records = [
+            {
+                "stop_id": row[0],
+                "stop_name": row[1] or "",
+                "stop_lat": row[2],
+                "stop_lon": row[3],
+                "location_type": row[4],
+                "wheelchair_boarding": row[5],
+                "platform_code": row[6],
+                "stop_desc": row[7],
+                "zone_id": row[8],
+            }
+            for row in rows
+        ]
+        lats = np.array([record["stop_lat"] for record in records], dtype=np.float64)
+        lons = np.array([record["stop_lon"] for record in records], dtype=np.float64)
+        return cls(lats, lons, records)
+
+    def _cell_of(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def _candidates_in_box(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        row_lo, col_lo = self._cell_of(min_lat, min_lon)
+        row_hi, col_hi = self._cell_of(max_lat, max_lon)
+        row_lo, row_hi = max(row_lo, self._row_range[0]), min(row_hi, self._row_range[1])
+        col_lo, col_hi = max(col_lo, self._col_range[0]), min(col_hi, self._col_range[1])
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.empty(0, dtype=np.int64)
+
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            mask = (
+                (self.lats >= min_lat) & (self.lats <= max_lat) &
+                (self.lons >= min_lon) & (self.lons <= max_lon)
+            )
+            return np.nonzero(mask)[0]
+
+        found = [
+            self._cells[(row, col)]
+            for row in range(row_lo, row_hi + 1)
+            for col in range(col_lo, col_hi + 1)
+            if (row, col) in self._cells
+        ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def within_radius(self, lat: float, lon: float, radius_miles: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find stops within ``radius_miles`` of a point.
+
+        Returns:
+            Tuple of (stop positions, distances in miles), nearest first
+        """
+        candidates = self._candidates_in_box(*calculate_bounding_box(lat, lon, radius_miles))
+        if not len(candidates):
+            return candidates, np.empty(0, dtype=np.float64)
+
+        distances = haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+        mask = distances <= radius_miles
+        candidates, distances = candidates[mask], distances[mask]
+        order = np.argsort(distances, kind="stable")
+        return candidates[order], distances[order]
+
+    def nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the ``k`` stops closest to a point.
+
+        Grid rings are searched outward until the k-th distance found is
+        within the radius the searched rings are guaranteed to cover.
+
+        Returns:
+            Tuple of (stop positions, distances in miles), nearest first
+        """
+        if k <= 0 or not len(self.records):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+        row0, col0 = self._cell_of(lat, lon)
+        max_ring = max(
+            abs(row0 - self._row_range[0]), abs(row0 - self._row_range[1]),
+            abs(col0 - self._col_range[0]), abs(col0 - self._col_range[1])
+        )
+        miles_per_ring = self.cell_degrees * MILES_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+
+        found: List[np.ndarray] = []
+        count = 0
+        for ring in range(max_ring + 1):
+            for row in range(row0 - ring, row0 + ring + 1):
+                step = 1 if abs(row - row0) == ring else 2 * ring
+                for col in range(col0 - ring, col0 + ring + 1, max(step, 1)):
+                    cell = self._cells.get((row, col))
+                    if cell is not None:
+                        found.append(cell)
+                        count += len(cell)
+
+            if count >= k:
+                candidates = np.concatenate(found)
+                distances = haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+                kth = np.partition(distances, k - 1)[k - 1]
+                if kth <= ring * miles_per_ring:
+                    break
+        else:
+            candidates = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+            distances = haversine_distances(lat, lon, self.lats[candidates], self.lons[candidates])
+
+        order = np.argsort(distances, kind="stable")[:k]
+        return candidates[order], distances[order]
+
+    def get_stop(self, stop_id: str) -> Optional[Stop]:
+        position = self.positions.get(stop_id)
+        if position is None:
+            return None
+        return Stop(**self.records[position])
+
+    def to_stops_with_distance(self, positions: np.ndarray, distances: np.ndarray) -> List[StopWithDistance]:
+        """Build response models for query results in one pass."""
+        return [
+            StopWithDistance(**self.records[position], distance_miles=round(distance, 4))
+            for position, distance in zip(positions.tolist(), distances.tolist())
+        ]
+
+    def nearby(self, lat: float, lon: float, radius_miles: float, limit: int) -> List[StopWithDistance]:
+        """Stops within ``radius_miles`` of a point, nearest first, at most ``limit``."""
+        positions, distances = self.within_radius(lat, lon, radius_miles)
+        return self.to_stops_with_distance(positions[:limit], distances[:limit])
+
+
+register_feed_index("stop_spatial_index", StopSpatialIndex.from_database)
+
+
+def get_stop_spatial_index(db: DatabaseConnector) -> StopSpatialIndex:
+    """Get the stop spatial index, building it from ``db`` on first use."""
+    return get_feed_index("stop_spatial_index", db)
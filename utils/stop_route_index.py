@@ -0,0 +1,92 @@
+"""
+In-memory stop-to-routes adjacency.
+Built once per feed from the materialised ``route_stops`` table, so listing the
+routes that serve a stop (and checking that the stop exists) is a dictionary
+lookup and an array slice rather than a join over ``stop_times``.
+"""
+
+from typing import Dict, List
+import numpy as np
+from database_connector import DatabaseConnector
+from pydantic_models import RouteBasic
+from utils.feed_indexes import register_feed_index, get_feed_index
+
+
+class StopRouteIndex:
+    """
+    CSR adjacency from stop to the routes that serve it.
+
+    ``offsets[i]:offsets[i + 1]`` slices ``route_positions`` for the stop at
+    position ``i``. Route positions follow the display order of the routes
+    (short name, then long name), so each slice is already sorted.
+    """
+
+    def __init__(self, stop_ids: List[str], offsets: np.ndarray, route_positions: np.ndarray, routes: List[RouteBasic]):
+        """
+        Args:
+            stop_ids: Every stop in the feed, including stops no route serves
+            offsets: CSR offsets into ``route_positions``, one more than ``stop_ids``
+            route_positions: Positions into ``routes`` referenced by the offsets
+            routes: Routes in display order
+        """
+        self.stop_ids = stop_ids
+        self.positions: Dict[str, int] = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.route_positions = np.asarray(route_positions, dtype=np.int64)
+        self.routes = routes
+
+    def __len__(self) -> int:
+        return len(self.stop_ids)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "StopRouteIndex":
+        """Build the index from the ``stops``, ``routes`` and ``route_stops`` tables."""
+        routes = [RouteBasic(**record) for record in db.execute_records("""
+            SELECT
+                route_id,
+                COALESCE(route_short_name, '') as route_short_name,
+                COALESCE(route_long_name, '') as route_long_name,
+                COALESCE(route_color, 'FFFFFF') as route_color,
+                COALESCE(route_text_color, '000000') as route_text_color,
+                COALESCE(route_type, 3) as route_type
+            FROM routes
+            ORDER BY routes.route_short_name, routes.route_long_name, route_id
+        """)]
+        route_lookup = {route.route_id: i for i, route in enumerate(routes)}
+
+        stop_ids = [row[0] for row in db.execute("SELECT stop_id FROM stops ORDER BY stop_id")]
+        stop_lookup = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+
+        pairs = db.execute("SELECT DISTINCT stop_id, route_id FROM route_stops")
+        stop_index = np.array([stop_lookup.get(stop_id, -1) for stop_id, _ in pairs], dtype=np.int64)
+        route_index = np.array([route_lookup.get(route_id, -1) for _, route_id in pairs], dtype=np.int64)
+        valid = (stop_index >= 0) & (route_index >= 0)
+        stop_index, route_index = stop_index[valid], route_index[valid]
+
+        order = np.lexsort((route_index, stop_index))
+        offsets = np.zeros(len(stop_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(stop_index, minlength=len(stop_ids)))
+
+        return cls(stop_ids, offsets, route_index[order], routes)
+
+    def has_stop(self, stop_id: str) -> bool:
+        return stop_id in self.positions
+
+    def routes_for_stop(self, stop_id: str) -> List[RouteBasic]:
+        """
+        Routes serving ``stop_id`` in display order.
+
+        Raises:
+            KeyError: If the stop is not in the feed
+        """
+        position = self.positions[stop_id]
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return [self.routes[i] for i in self.route_positions[start:end].tolist()]
+
+
+register_feed_index("stop_route_index", StopRouteIndex.from_database)
+
+
+def get_stop_route_index(db: DatabaseConnector) -> StopRouteIndex:
+    """Get the stop-to-routes index, building it from ``db`` on first use."""
+    return get_feed_index("stop_route_index", db)
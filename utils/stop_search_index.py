@@ -0,0 +1,209 @@
+"""
+In-memory search index over stop names.
+Names are normalised once at feed load into a sorted word-suffix array (for
+prefix and word-prefix lookups by binary search) and trigram postings (for
+substring and typo-tolerant matches), so searches never scan the stops table.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Any, Dict, List, Set, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from pydantic_models import Stop
+from utils.feed_indexes import register_feed_index, get_feed_index
+
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.3
+
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, SIMILAR = range(5)
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    ascii_name = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+    return _NON_ALNUM.sub(" ", ascii_name).strip()
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """
+    Word trigrams in the style of PostgreSQL's pg_trgm.
+
+    Each word is padded with two leading spaces and one trailing space, so
+    word starts weigh more than word ends.
+    """
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class StopSearchIndex:
+    """
+    Ranked stop name search.
+
+    Platform-level stops that share their parent station's name are folded
+    into the station, so a search returns each station once. Results are
+    ranked exact match, name prefix, word prefix, substring, then trigram
+    similarity; ties are ordered by name.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]], similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        """
+        Args:
+            records: Stop fields (as accepted by ``Stop``) plus ``parent_station``
+            similarity_threshold: Minimum trigram similarity for typo-tolerant matches
+        """
+        self.similarity_threshold = similarity_threshold
+        self.records = self._deduplicate(records)
+        self.names = [normalize_name(record["stop_name"]) for record in self.records]
+
+        self._exact: Dict[str, List[int]] = {}
+        suffixes: List[Tuple[str, int, int]] = []
+        postings: Dict[str, List[int]] = {}
+        trigram_counts = np.zeros(len(self.names), dtype=np.int32)
+
+        for doc, name in enumerate(self.names):
+            self._exact.setdefault(name, []).append(doc)
+            for word_index, match in enumerate(re.finditer(r"\S+", name)):
+                suffixes.append((name[match.start():], word_index, doc))
+            grams = trigrams(name)
+            trigram_counts[doc] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(doc)
+
+        suffixes.sort()
+        self._suffix_keys = [suffix for suffix, _, _ in suffixes]
+        self._suffix_docs = [(word_index, doc) for _, word_index, doc in suffixes]
+        self._postings = {gram: np.array(docs, dtype=np.int32) for gram, docs in postings.items()}
+        self._trigram_counts = trigram_counts
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @staticmethod
+    def _deduplicate(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold child stops into their parent station when the names match."""
+        by_id = {record["stop_id"]: record for record in records}
+        kept = []
+        seen_groups = set()
+        for record in records:
+            parent_id = record.get("parent_station")
+            name = normalize_name(record["stop_name"])
+            if parent_id:
+                parent = by_id.get(parent_id)
+                if parent is not None and normalize_name(parent["stop_name"]) == name:
+                    continue
+                group = (parent_id, name)
+                if parent is None and group in seen_groups:
+                    continue
+                seen_groups.add(group)
+            kept.append({key: value for key, value in record.items() if key != "parent_station"})
+        return kept
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "StopSearchIndex":
+        """Build the index from the ``stops`` table."""
+        records = db.execute_records("""
+            SELECT
+                stop_id,
+                stop_name,
+                stop_lat,
+                stop_lon,
+                COALESCE(location_type, 0) as location_type,
+                COALESCE(wheelchair_boarding, 0) as wheelchair_boarding,
+                platform_code,
+                stop_desc,
+                zone_id,
+                parent_station
+            FROM stops
+            WHERE stop_name IS NOT NULL
+              AND stop_lat IS NOT NULL
+              AND stop_lon IS NOT NULL
+            ORDER BY COALESCE(location_type, 0) DESC, stop_id
+        """)
+        return cls(records)
+
+    def _shared_trigram_counts(self, grams: Set[str]) -> np.ndarray:
+        hits = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not hits:
+            return np.zeros(len(self.names), dtype=np.int64)
+        return np.bincount(np.concatenate(hits), minlength=len(self.names))
+
+    def _substring_candidates(self, query: str, grams: Set[str]) -> np.ndarray:
+        interior = {gram for gram in grams if " " not in gram}
+        if not interior:
+            return np.arange(len(self.names))
+        if not all(gram in self._postings for gram in interior):
+            return np.empty(0, dtype=np.int64)
+        counts = self._shared_trigram_counts(interior)
+        return np.nonzero(counts == len(interior))[0]
+
+    def search_ranked(self, query: str, limit: int) -> List[Tuple[int, int, float]]:
+        """
+        Rank stops matching ``query``.
+
+        Returns:
+            Up to ``limit`` (match tier, record position, similarity) tuples, best first
+        """
+        normalized = normalize_name(query)
+        if not normalized or limit <= 0:
+            return []
+
+        tiers: Dict[int, Tuple[int, float]] = {}
+
+        def add(doc: int, tier: int, similarity: float = 1.0) -> None:
+            if doc not in tiers or tier < tiers[doc][0]:
+                tiers[doc] = (tier, similarity)
+
+        for doc in self._exact.get(normalized, []):
+            add(doc, EXACT)
+
+        # Suffixes sort by name, so once ``limit`` whole-name prefixes are
+        # found nothing later in the scan can outrank them.
+        name_matches = set(tiers)
+        start = bisect_left(self._suffix_keys, normalized)
+        for position in range(start, len(self._suffix_keys)):
+            if len(name_matches) >= limit or not self._suffix_keys[position].startswith(normalized):
+                break
+            word_index, doc = self._suffix_docs[position]
+            add(doc, PREFIX if word_index == 0 else WORD_PREFIX)
+            if word_index == 0:
+                name_matches.add(doc)
+
+        grams = trigrams(normalized)
+        if len(tiers) < limit:
+            for doc in self._substring_candidates(normalized, grams).tolist():
+                if normalized in self.names[doc]:
+                    add(doc, SUBSTRING)
+
+        if len(tiers) < limit and grams:
+            shared = self._shared_trigram_counts(grams)
+            candidates = np.nonzero(shared)[0]
+            similarity = shared[candidates] / (len(grams) + self._trigram_counts[candidates] - shared[candidates])
+            for doc, score in zip(candidates.tolist(), similarity.tolist()):
+                if score >= self.similarity_threshold:
+                    add(doc, SIMILAR, score)
+
+        ranked = sorted(
+            tiers.items(),
+            key=lambda item: (item[1][0], -item[1][1], self.names[item[0]], self.records[item[0]]["stop_id"])
+        )
+        return [(tier, doc, similarity) for doc, (tier, similarity) in ranked[:limit]]
+
+    def search(self, query: str, limit: int) -> List[Stop]:
+        """Stops matching ``query``, best first, at most ``limit``."""
+        return [Stop(**self.records[doc]) for _, doc, _ in self.search_ranked(query, limit)]
+
+
+register_feed_index("stop_search_index", StopSearchIndex.from_database)
+
+
+def get_stop_search_index(db: DatabaseConnector) -> StopSearchIndex:
+    """Get the stop search index, building it from ``db`` on first use."""
+    return get_feed_index("stop_search_index", db)
@@ -0,0 +1,194 @@
+"""
+Streaming exports of GTFS tables.
+Rows are read from DuckDB as Arrow record batches and each batch is encoded
+and sent as soon as it arrives, so memory use depends on the batch size
+rather than on the number of rows exported.
+"""
+
+import io
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+from database_connector import get_connection_manager
+from utils.columnar_formats import COLUMNAR_MEDIA_TYPES, iter_arrow_stream, iter_parquet
+
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "10000"))
+
+EXPORT_FORMATS = ("json", "ndjson", "csv", "geojson", "arrow", "parquet")
+
+EXPORT_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "geojson": "application/geo+json",
+    **COLUMNAR_MEDIA_TYPES,
+}
+
+# Exportable tables: the sort key that keeps offsets stable, and the SQL
+# condition for each filter the table accepts
+EXPORT_TABLES: Dict[str, Dict[str, Any]] = {
+    "stops": {
+        "order_by": "stop_id",
+        "filters": {
+            "parent_station": "parent_station = ?",
+        },
+        "geometry": ("stop_lon", "stop_lat"),
+    },
+    "routes": {
+        "order_by": "route_id",
+        "filters": {
+            "route_type": "route_type = ?",
+        },
+    },
+    "trips": {
+        "order_by": "trip_id",
+        "filters": {
+            "route_id": "route_id = ?",
+            "service_id": "service_id = ?",
+        },
+    },
+    "stop_times": {
+        "order_by": "trip_id, stop_sequence",
+        "filters": {
+            "trip_id": "trip_id = ?",
+            "stop_id": "stop_id = ?",
+            "route_id": "trip_id IN (SELECT trip_id FROM trips WHERE route_id = ?)",
+        },
+    },
+}
+
+
+def export_query(table: str, filters: Dict[str, Any], limit: int, offset: int = 0) -> Tuple[str, List[Any]]:
+    """
+    SQL and parameters selecting one page of an export.
+
+    Args:
+        table: Key of EXPORT_TABLES
+        filters: Filter name to value; None values are ignored
+        limit: Maximum number of rows
+        offset: Rows to skip in sort key order
+
+    Returns:
+        Tuple of (query, params)
+
+    Raises:
+        ValueError: If a filter is not supported by ``table``
+    """
+    spec = EXPORT_TABLES[table]
+    conditions = []
+    params: List[Any] = []
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name not in spec["filters"]:
+            raise ValueError(f"Filter '{name}' is not supported for {table} exports")
+        conditions.append(spec["filters"][name])
+        params.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT * FROM {table} {where} ORDER BY {spec['order_by']} LIMIT ? OFFSET ?"
+    return query, params + [limit, offset]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def encode_ndjson(reader: pa.RecordBatchReader, table: str) -> Iterator[bytes]:
+    for batch in reader:
+        if batch.num_rows:
+            yield "".join(_dumps(row) + "\n" for row in batch.to_pylist()).encode("utf-8")
+
+
+def encode_json(reader: pa.RecordBatchReader, table: str) -> Iterator[bytes]:
+    yield b"["
+    separator = ""
+    for batch in reader:
+        if batch.num_rows:
+            yield (separator + ",".join(_dumps(row) for row in batch.to_pylist())).encode("utf-8")
+            separator = ","
+    yield b"]"
+
+
+def encode_csv(reader: pa.RecordBatchReader, table: str) -> Iterator[bytes]:
+    sink = io.BytesIO()
+    pa_csv.write_csv(reader.schema.empty_table(), sink)
+    yield sink.getvalue()
+    options = pa_csv.WriteOptions(include_header=False)
+    for batch in reader:
+        if batch.num_rows:
+            sink = io.BytesIO()
+            pa_csv.write_csv(batch, sink, options)
+            yield sink.getvalue()
+
+
+def encode_geojson(reader: pa.RecordBatchReader, table: str) -> Iterator[bytes]:
+    lon_column, lat_column = EXPORT_TABLES[table]["geometry"]
+    yield b'{"type":"FeatureCollection","features":['
+    separator = ""
+    for batch in reader:
+        features = []
+        for row in batch.to_pylist():
+            lon, lat = row.pop(lon_column), row.pop(lat_column)
+            geometry = {"type": "Point", "coordinates": [lon, lat]} if lon is not None and lat is not None else None
+            features.append(_dumps({"type": "Feature", "geometry": geometry, "properties": row}))
+        if features:
+            yield (separator + ",".join(features)).encode("utf-8")
+            separator = ","
+    yield b"]}"
+
+
+def encode_arrow(reader: pa.RecordBatchReader, table: str) -> Iterator[bytes]:
+    return iter_arrow_stream(reader)
+
+
+def encode_parquet(reader: pa.RecordBatchReader, table: str) -> Iterator[bytes]:
+    return iter_parquet(reader)
+
+
+EXPORT_ENCODERS = {
+    "json": encode_json,
+    "ndjson": encode_ndjson,
+    "csv": encode_csv,
+    "geojson": encode_geojson,
+    "arrow": encode_arrow,
+    "parquet": encode_parquet,
+}
+
+
+def stream_export(table: str, format: str, filters: Dict[str, Any], limit: int, offset: int = 0,
+                  batch_rows: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Stream an export of ``table`` encoded as ``format``.
+
+    The query is built (and filters validated) before this returns. A pooled
+    connection is borrowed when iteration starts and returned when the stream
+    ends or the client disconnects, so the stream does not depend on the
+    request's own connection.
+
+    Args:
+        table: Key of EXPORT_TABLES
+        format: Key of EXPORT_ENCODERS
+        filters: Filter name to value, as accepted by ``export_query``
+        limit: Maximum number of rows
+        offset: Rows to skip in sort key order
+        batch_rows: Rows fetched and encoded at a time
+
+    Returns:
+        Iterator over encoded chunks of the response body
+
+    Raises:
+        ValueError: If a filter is not supported by ``table``
+    """
+    query, params = export_query(table, filters, limit, offset)
+    encoder = EXPORT_ENCODERS[format]
+
+    def chunks() -> Iterator[bytes]:
+        with get_connection_manager().connection() as db:
+            reader = db.execute_arrow_batches(query, params, batch_rows or EXPORT_BATCH_ROWS)
+            yield from encoder(reader, table)
+
+    return chunks()
@@ -0,0 +1,297 @@
+"""
+Walking transfer graph between nearby stops.
+Stop-to-stop walking links are computed once at import with vectorised
+Haversine distances over a grid of stop cells, adjusted by ``transfers.txt``
+and stored in the ``stop_transfers`` table. At startup the table is read into
+CSR arrays keyed by stop spatial index position, which the journey planners
+use as their footpaths.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from database_connector import DatabaseConnector
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.geospatial import haversine_distances
+from utils.spatial_index import MILES_PER_DEGREE, get_stop_spatial_index
+
+
+METERS_PER_MILE = 1609.344
+WALK_SPEED_MPS = 1.3
+DEFAULT_FOOTPATH_MILES = 0.25
+
+# transfers.txt transfer_type of a transfer that cannot be made
+TRANSFER_NOT_POSSIBLE = 3
+
+DISTANCE_SOURCE = "distance"
+TRANSFERS_SOURCE = "transfers"
+
+TRANSFER_COLUMNS = ["from_stop_id", "to_stop_id", "distance_miles", "walk_secs", "source"]
+
+
+def walk_seconds(miles: np.ndarray) -> np.ndarray:
+    """Whole seconds needed to walk ``miles``, rounded up."""
+    return np.ceil(np.asarray(miles, dtype=np.float64) * METERS_PER_MILE / WALK_SPEED_MPS).astype(np.int32)
+
+
+def nearby_pairs(lats: np.ndarray, lons: np.ndarray, radius_miles: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Ordered pairs of distinct points within ``radius_miles`` of each other.
+
+    Points are bucketed into cells at least ``radius_miles`` wide, so only
+    points in the same or adjacent cells are compared; each comparison is one
+    vectorised Haversine call per cell offset.
+
+    Returns:
+        Tuple of (from positions, to positions, distances in miles)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if len(lats) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    lat_cell = radius_miles / MILES_PER_DEGREE
+    lon_cell = radius_miles / (MILES_PER_DEGREE * max(math.cos(math.radians(float(np.abs(lats).max()))), 1e-6))
+    cells = pd.DataFrame({
+        "row": np.floor(lats / lat_cell).astype(np.int64),
+        "col": np.floor(lons / lon_cell).astype(np.int64),
+        "stop": np.arange(len(lats)),
+    })
+
+    sources: List[np.ndarray] = []
+    targets: List[np.ndarray] = []
+    distances: List[np.ndarray] = []
+    for row_offset in (-1, 0, 1):
+        for col_offset in (-1, 0, 1):
+            shifted = cells.assign(row=cells["row"] + row_offset, col=cells["col"] + col_offset)
+            pairs = shifted.merge(cells, on=["row", "col"], suffixes=("_from", "_to"))
+            from_stops = pairs["stop_from"].to_numpy()
+            to_stops = pairs["stop_to"].to_numpy()
+            miles = haversine_distances(lats[from_stops], lons[from_stops], lats[to_stops], lons[to_stops])
+            keep = (from_stops != to_stops) & (miles <= radius_miles)
+            sources.append(from_stops[keep])
+            targets.append(to_stops[keep])
+            distances.append(miles[keep])
+
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(distances)
+
+
+def _pair_keys(links: pd.DataFrame) -> List[np.ndarray]:
+    """Group keys that are equal for both directions of a stop pair."""
+    from_ids = links["from_stop_id"].to_numpy(dtype=object)
+    to_ids = links["to_stop_id"].to_numpy(dtype=object)
+    swap = from_ids > to_ids
+    return [np.where(swap, to_ids, from_ids), np.where(swap, from_ids, to_ids)]
+
+
+def expand_transfer_rules(
+        transfers: pd.DataFrame,
+        stop_ids: List[str],
+        parent_stations: Optional[Sequence[Optional[str]]] = None
+) -> pd.DataFrame:
+    """
+    Stop pairs that ``transfers.txt`` rules apply to.
+
+    A rule naming a parent station applies to each of its child stops, and a
+    rule from a station to itself applies between every two of its children.
+    Where rules overlap, the one naming the stops most directly wins. Rules
+    for stops not in ``stop_ids`` are dropped.
+
+    Args:
+        transfers: Frame with from_stop_id, to_stop_id, transfer_type and
+            min_transfer_time columns
+        stop_ids: Stop identifiers of the points
+        parent_stations: Parent station of each stop, if any
+
+    Returns:
+        Frame with from_stop_id, to_stop_id, transfer_type, min_transfer_time
+        and same_station columns, one row per rule and stop pair
+    """
+    known = set(stop_ids)
+    children: Dict[str, List[str]] = {}
+    if parent_stations is not None:
+        for stop_id, parent_station in zip(stop_ids, parent_stations):
+            if pd.notna(parent_station) and parent_station != stop_id:
+                children.setdefault(parent_station, []).append(stop_id)
+
+    rows = []
+    for from_id, to_id, transfer_type, minimum in zip(
+        transfers["from_stop_id"], transfers["to_stop_id"], transfers["transfer_type"], transfers["min_transfer_time"]
+    ):
+        from_stops = children.get(from_id) or ([from_id] if from_id in known else [])
+        to_stops = children.get(to_id) or ([to_id] if to_id in known else [])
+        expanded = (from_id in children) + (to_id in children)
+        for from_stop in from_stops:
+            for to_stop in to_stops:
+                if from_stop != to_stop:
+                    rows.append((from_stop, to_stop, transfer_type, minimum, from_id == to_id, expanded))
+
+    rules = pd.DataFrame(rows, columns=[
+        "from_stop_id", "to_stop_id", "transfer_type", "min_transfer_time", "same_station", "expanded"
+    ])
+    most_direct = rules.groupby(_pair_keys(rules))["expanded"].transform("min") if len(rules) else rules["expanded"]
+    return rules[rules["expanded"] == most_direct].drop(columns="expanded").reset_index(drop=True)
+
+
+def compute_transfers(
+        stop_ids: List[str],
+        lats: np.ndarray,
+        lons: np.ndarray,
+        transfers: Optional[pd.DataFrame] = None,
+        radius_miles: float = DEFAULT_FOOTPATH_MILES,
+        parent_stations: Optional[Sequence[Optional[str]]] = None
+) -> pd.DataFrame:
+    """
+    Walking transfers between stops, adjusted by ``transfers.txt``.
+
+    Stops within ``radius_miles`` are linked with the time needed to walk the
+    Haversine distance. ``transfers.txt`` rules then apply to the pair in both
+    directions, keeping the graph symmetric: transfer_type 3 removes the link,
+    and any other type adds it (stations further apart than the radius) with
+    ``min_transfer_time`` as its time when given. Rules naming parent stations
+    apply to their child stops (see ``expand_transfer_rules``); a rule from a
+    station to itself sets the least time between two of its stops, so it only
+    slows down quicker walks.
+
+    Args:
+        stop_ids: Stop identifiers of the points
+        lats, lons: Stop coordinates in decimal degrees
+        transfers: Optional frame with from_stop_id, to_stop_id, transfer_type
+            and min_transfer_time columns
+        radius_miles: Longest walk between stops
+        parent_stations: Parent station of each stop, if any, used to apply
+            station rules to the station's stops
+
+    Returns:
+        DataFrame with TRANSFER_COLUMNS, ordered by from_stop_id and walk_secs
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    ids = np.asarray(stop_ids, dtype=object)
+    from_stops, to_stops, miles = nearby_pairs(lats, lons, radius_miles)
+    links = pd.DataFrame({
+        "from_stop_id": ids[from_stops],
+        "to_stop_id": ids[to_stops],
+        "distance_miles": miles,
+        "walk_secs": walk_seconds(miles),
+        "source": DISTANCE_SOURCE,
+    })
+
+    if transfers is not None and len(transfers):
+        positions = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+        rules = expand_transfer_rules(transfers, stop_ids, parent_stations)
+        rules = pd.concat([
+            rules,
+            rules.rename(columns={"from_stop_id": "to_stop_id", "to_stop_id": "from_stop_id"}),
+        ], ignore_index=True)
+
+        rule_pairs = list(zip(rules["from_stop_id"], rules["to_stop_id"]))
+        blocked_pairs = {
+            pair for pair, transfer_type in zip(rule_pairs, rules["transfer_type"]) if transfer_type == TRANSFER_NOT_POSSIBLE
+        }
+        timed = rules[[pair not in blocked_pairs for pair in rule_pairs]]
+
+        rule_links = pd.DataFrame(columns=TRANSFER_COLUMNS)
+        if len(timed):
+            from_positions = timed["from_stop_id"].map(positions).to_numpy(dtype=np.int64)
+            to_positions = timed["to_stop_id"].map(positions).to_numpy(dtype=np.int64)
+            rule_miles = haversine_distances(lats[from_positions], lons[from_positions], lats[to_positions], lons[to_positions])
+            minimum = pd.to_numeric(timed["min_transfer_time"], errors="coerce").to_numpy(dtype=np.float64)
+            walk = walk_seconds(rule_miles)
+            rule_secs = np.where(timed["same_station"].to_numpy(dtype=bool), np.maximum(walk, minimum), minimum)
+            rule_links = pd.DataFrame({
+                "from_stop_id": timed["from_stop_id"].to_numpy(),
+                "to_stop_id": timed["to_stop_id"].to_numpy(),
+                "distance_miles": rule_miles,
+                "walk_secs": np.where(np.isnan(minimum), walk, rule_secs).astype(np.int32),
+                "source": TRANSFERS_SOURCE,
+            })
+            # Both directions of a pair take the slowest rule given for either
+            rule_links["walk_secs"] = rule_links.groupby(_pair_keys(rule_links))["walk_secs"].transform("max")
+            rule_links = rule_links.drop_duplicates(["from_stop_id", "to_stop_id"])
+
+        replaced = blocked_pairs | set(zip(rule_links["from_stop_id"], rule_links["to_stop_id"]))
+        links = links[[pair not in replaced for pair in zip(links["from_stop_id"], links["to_stop_id"])]]
+        links = pd.concat([links, rule_links], ignore_index=True) if len(rule_links) else links
+
+    return links.sort_values(["from_stop_id", "walk_secs", "to_stop_id"], kind="stable").reset_index(drop=True)[TRANSFER_COLUMNS]
+
+
+class TransferGraph:
+    """
+    CSR walking transfer graph keyed by stop spatial index position.
+
+    ``offsets[i]:offsets[i + 1]`` slices ``targets``, ``walk_secs`` and
+    ``distances`` for the transfers out of the stop at position ``i``,
+    quickest first. Links are symmetric and a stop never links to itself.
+    """
+
+    def __init__(self, stop_ids: List[str], offsets: np.ndarray, targets: np.ndarray, walk_secs: np.ndarray, distances: np.ndarray):
+        """
+        Args:
+            stop_ids: Stop identifiers by spatial index position
+            offsets: CSR offsets into the link arrays, one more than ``stop_ids``
+            targets: Destination stop position of each link
+            walk_secs: Walking time of each link in seconds
+            distances: Haversine length of each link in miles
+        """
+        self.stop_ids = stop_ids
+        self.positions: Dict[str, int] = {stop_id: i for i, stop_id in enumerate(stop_ids)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.walk_secs = np.asarray(walk_secs, dtype=np.int32)
+        self.distances = np.asarray(distances, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    @classmethod
+    def from_frame(cls, stop_ids: List[str], links: pd.DataFrame) -> "TransferGraph":
+        """Build the CSR arrays from rows with TRANSFER_COLUMNS."""
+        from_positions = pd.Categorical(links["from_stop_id"], categories=stop_ids).codes.astype(np.int64)
+        to_positions = pd.Categorical(links["to_stop_id"], categories=stop_ids).codes.astype(np.int64)
+        walk_secs = links["walk_secs"].to_numpy(dtype=np.int64)
+        valid = (from_positions >= 0) & (to_positions >= 0)
+        from_positions, to_positions, walk_secs = from_positions[valid], to_positions[valid], walk_secs[valid]
+        distances = links["distance_miles"].to_numpy(dtype=np.float64)[valid]
+
+        order = np.lexsort((to_positions, walk_secs, from_positions))
+        offsets = np.zeros(len(stop_ids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(from_positions, minlength=len(stop_ids)))
+        return cls(stop_ids, offsets, to_positions[order], walk_secs[order], distances[order])
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "TransferGraph":
+        """Load the graph from ``stop_transfers``, computing it if the feed was imported without one."""
+        spatial_index = get_stop_spatial_index(db)
+        persisted = db.execute("SELECT count(*) FROM information_schema.tables WHERE table_name = 'stop_transfers'")[0][0]
+        if persisted:
+            links = db.execute_df(f"SELECT {', '.join(TRANSFER_COLUMNS)} FROM stop_transfers")
+        else:
+            print("stop_transfers table not found; computing walking transfers (re-run load_all_data.py to persist them)")
+            links = compute_transfers(spatial_index.stop_ids, spatial_index.lats, spatial_index.lons)
+        return cls.from_frame(spatial_index.stop_ids, links)
+
+    def footpaths(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR arrays (offsets, target stop positions, walking seconds) for the journey planners."""
+        return self.offsets, self.targets, self.walk_secs
+
+    def transfers_from(self, stop_id: str) -> List[Tuple[str, int, float]]:
+        """(to_stop_id, walk seconds, distance in miles) of the links out of a stop, quickest first."""
+        position = self.positions.get(stop_id)
+        if position is None:
+            return []
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        return [
+            (self.stop_ids[target], walk, miles)
+            for target, walk, miles in zip(self.targets[start:end].tolist(), self.walk_secs[start:end].tolist(), self.distances[start:end].tolist())
+        ]
+
+
+register_feed_index("transfer_graph", TransferGraph.from_database)
+
+
+def get_transfer_graph(db: DatabaseConnector) -> TransferGraph:
+    """Get the walking transfer graph, building it from ``db`` on first use."""
+    return get_feed_index("transfer_graph", db)
@@ -0,0 +1,194 @@
+"""
+Interval index over trip service spans.
+Every trip's first departure and last arrival (from the ``trip_spans`` table
+built at import) are held in arrays sorted by start time, so "trips running at
+T" and "trips operating within [a, b]" are binary searches plus a bounded scan,
+including overnight trips whose times run past 24:00:00.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from pydantic_models import Trip
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.gtfs_time import SECONDS_PER_DAY
+from utils.result_mapping import map_records
+from utils.service_calendar import ServiceCalendar, get_service_calendar
+
+
+class TripSpanIndex:
+    """
+    Trip spans sorted by start time.
+
+    A trip at position ``i`` operates from ``start_secs[i]`` to
+    ``end_secs[i]``, in seconds since the start of its service day. Because no
+    trip is longer than ``max_duration``, every trip running at time T starts
+    in ``[T - max_duration, T]``, which bounds each query to one slice.
+
+    Clock times are matched against each service day that can reach them: a
+    query at 01:00 also matches trips of the previous service day scheduled
+    at 25:00. Given a service date, each service day only matches trips whose
+    service is active on that day's date.
+    """
+
+    def __init__(
+        self,
+        start_secs: np.ndarray,
+        end_secs: np.ndarray,
+        route_ids: List[str],
+        trips: List[Dict[str, Any]],
+        trip_services: Optional[np.ndarray] = None,
+        calendar: Optional[ServiceCalendar] = None
+    ):
+        """
+        Args:
+            start_secs: First departure of each trip, sorted ascending
+            end_secs: Last arrival of each trip
+            route_ids: Route of each trip
+            trips: Trip fields (as accepted by ``Trip``) by trip position
+            trip_services: Service code of each trip in ``calendar``
+            calendar: Service calendar used to filter by service date
+        """
+        self.start_secs = np.asarray(start_secs, dtype=np.int64)
+        self.end_secs = np.asarray(end_secs, dtype=np.int64)
+        self.trips = trips
+        self.trip_services = np.asarray(trip_services if trip_services is not None else np.full(len(trips), -1), dtype=np.int32)
+        self.calendar = calendar
+
+        self.route_codes: Dict[str, int] = {}
+        self.trip_routes = np.array(
+            [self.route_codes.setdefault(route_id, len(self.route_codes)) for route_id in route_ids],
+            dtype=np.int32
+        )
+
+        if len(self.start_secs):
+            self.max_duration = int((self.end_secs - self.start_secs).max())
+            self.min_secs = int(self.start_secs.min())
+            self.max_secs = int(self.end_secs.max())
+        else:
+            self.max_duration = self.min_secs = self.max_secs = 0
+
+    def __len__(self) -> int:
+        return len(self.start_secs)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "TripSpanIndex":
+        """Build the index from the ``trip_spans`` and ``trips`` tables and the service calendar."""
+        records = db.execute_records("""
+            SELECT
+                s.start_secs,
+                s.end_secs,
+                t.trip_id,
+                t.route_id,
+                t.service_id,
+                t.trip_headsign,
+                t.direction_id,
+                t.shape_id
+            FROM trip_spans s
+                     JOIN trips t ON s.trip_id = t.trip_id
+            ORDER BY s.start_secs, t.trip_id
+        """)
+        start_secs = np.array([record.pop("start_secs") for record in records], dtype=np.int64)
+        end_secs = np.array([record.pop("end_secs") for record in records], dtype=np.int64)
+        calendar = get_service_calendar(db)
+        trip_services = calendar.codes_for(record["service_id"] for record in records)
+        return cls(start_secs, end_secs, [record["route_id"] for record in records], records, trip_services, calendar)
+
+    def _service_day_shifts(self, start: int, end: int) -> range:
+        """Day offsets ``k`` for which ``[start + k*day, end + k*day]`` can overlap a trip."""
+        first = -((end - self.min_secs) // SECONDS_PER_DAY)
+        last = (self.max_secs - start) // SECONDS_PER_DAY
+        return range(first, last + 1)
+
+    def _matching(
+        self,
+        start: int,
+        end: int,
+        route_id: Optional[str],
+        service_date: Optional[date]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Trips operating within ``[start, end]`` on any service day.
+
+        Returns:
+            Tuple of (trip positions, trip start relative to ``start`` on the
+            matching service day); a trip matching two service days appears twice
+        """
+        empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        route_code = None
+        if route_id is not None:
+            route_code = self.route_codes.get(route_id)
+            if route_code is None:
+                return empty
+
+        found_positions = []
+        found_starts = []
+        for shift in self._service_day_shifts(start, end):
+            window_start = start + shift * SECONDS_PER_DAY
+            window_end = end + shift * SECONDS_PER_DAY
+            lo = np.searchsorted(self.start_secs, window_start - self.max_duration, side="left")
+            hi = np.searchsorted(self.start_secs, window_end, side="right")
+            mask = self.end_secs[lo:hi] >= window_start
+            if route_code is not None:
+                mask &= self.trip_routes[lo:hi] == route_code
+            if service_date is not None and self.calendar is not None:
+                active = self.calendar.active_mask(service_date - timedelta(days=shift))
+                mask &= active[self.trip_services[lo:hi]]
+            positions = np.arange(lo, hi)[mask]
+            found_positions.append(positions)
+            found_starts.append(self.start_secs[positions] - window_start)
+
+        if not found_positions:
+            return empty
+        return np.concatenate(found_positions), np.concatenate(found_starts)
+
+    @staticmethod
+    def _first_by(positions: np.ndarray, keys: np.ndarray) -> np.ndarray:
+        """Order positions by ``keys``, keeping each position's first occurrence."""
+        order = np.lexsort((positions, keys))
+        positions = positions[order]
+        _, first = np.unique(positions, return_index=True)
+        first.sort()
+        return positions[first]
+
+    def overlapping(
+        self,
+        start: int,
+        end: int,
+        route_id: Optional[str] = None,
+        service_date: Optional[date] = None
+    ) -> np.ndarray:
+        """
+        Trips operating at any moment within ``[start, end]``.
+
+        Args:
+            start: Window start in seconds since midnight
+            end: Window end in seconds; an end before the start wraps past midnight
+            route_id: Only return trips of this route
+            service_date: Calendar date the window falls on; None matches every service
+
+        Returns:
+            Trip positions, ordered by when each trip is first in the window
+        """
+        if end < start:
+            end += SECONDS_PER_DAY
+        positions, relative_starts = self._matching(start, end, route_id, service_date)
+        return self._first_by(positions, np.maximum(relative_starts, 0))
+
+    def running_at(self, secs: int, route_id: Optional[str] = None, service_date: Optional[date] = None) -> np.ndarray:
+        """Positions of trips in service at ``secs`` on ``service_date``, earliest started first."""
+        positions, relative_starts = self._matching(secs, secs, route_id, service_date)
+        return self._first_by(positions, relative_starts)
+
+    def to_trips(self, positions: np.ndarray, limit: int) -> List[Trip]:
+        """Map the first ``limit`` trip positions to ``Trip`` models."""
+        return map_records(Trip, [self.trips[i] for i in positions[:limit].tolist()])
+
+
+register_feed_index("trip_span_index", TripSpanIndex.from_database)
+
+
+def get_trip_span_index(db: DatabaseConnector) -> TripSpanIndex:
+    """Get the trip span index, building it from ``db`` on first use."""
+    return get_feed_index("trip_span_index", db)
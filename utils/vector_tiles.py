@@ -0,0 +1,355 @@
+"""
+Mapbox Vector Tiles for stops and route shapes.
+Stops and the simplified route shape tiers are projected to Web Mercator once
+per feed. A tile request selects the features overlapping the tile with NumPy
+bounding box tests, clips route lines to the tile, and writes the Mapbox
+Vector Tile protobuf directly; encoded tiles are kept in an LRU.
+"""
+
+import math
+import os
+import struct
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from database_connector import DatabaseConnector
+from utils.feed_indexes import register_feed_index, get_feed_index
+from utils.shape_geometry import SHAPE_TOLERANCES_METERS, select_tier, zoom_tolerance
+from utils.spatial_index import get_stop_spatial_index
+
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+EXTENT = 4096
+BUFFER = 64
+MAX_TILE_ZOOM = 22
+
+# Stops are left out of tiles below this zoom, where they would be
+# unreadable and make up most of the tile size
+STOP_MIN_ZOOM = 12
+
+TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", "2048"))
+
+ROUTES_LAYER = "routes"
+STOPS_LAYER = "stops"
+
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.0511287798
+
+_POINT = 1
+_LINESTRING = 2
+_MOVE_TO = 1
+_LINE_TO = 2
+
+
+def mercator(lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Web Mercator coordinates normalised to [0, 1], y increasing southwards."""
+    lats = np.radians(np.clip(np.asarray(lats, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    xs = (np.asarray(lons, dtype=np.float64) + 180.0) / 360.0
+    ys = (1.0 - np.log(np.tan(lats) + 1.0 / np.cos(lats)) / math.pi) / 2.0
+    return xs, ys
+
+
+def tile_latitude(z: int, y: int) -> float:
+    """Latitude of the middle of tile row ``y`` at zoom ``z``."""
+    n = math.pi * (1 - 2 * (y + 0.5) / (2 ** z))
+    return math.degrees(math.atan(math.sinh(n)))
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _field_varint(field: int, value: int) -> bytes:
+    return _varint(field << 3) + _varint(value)
+
+
+def _field_bytes(field: int, payload: bytes) -> bytes:
+    return _varint((field << 3) | 2) + _varint(len(payload)) + payload
+
+
+def _field_packed(field: int, values: Sequence[int]) -> bytes:
+    return _field_bytes(field, b"".join(_varint(value) for value in values))
+
+
+def _value(value: Any) -> bytes:
+    """Encode a feature property value as a Layer.Value message."""
+    if isinstance(value, bool):
+        return _field_varint(7, int(value))
+    if isinstance(value, int):
+        return _field_varint(5, value) if value >= 0 else _field_varint(6, _zigzag(value))
+    if isinstance(value, float):
+        return _varint((3 << 3) | 1) + struct.pack("<d", value)
+    return _field_bytes(1, str(value).encode("utf-8"))
+
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+
+def encode_points(xs: Sequence[int], ys: Sequence[int]) -> List[int]:
+    """Geometry commands for a point feature (one MoveTo per point)."""
+    geometry = [_command(_MOVE_TO, len(xs))]
+    cx = cy = 0
+    for x, y in zip(xs, ys):
+        geometry.extend((_zigzag(x - cx), _zigzag(y - cy)))
+        cx, cy = x, y
+    return geometry
+
+
+def encode_lines(lines: Sequence[Tuple[Sequence[int], Sequence[int]]]) -> List[int]:
+    """Geometry commands for a (multi) line feature; the cursor carries across parts."""
+    geometry: List[int] = []
+    cx = cy = 0
+    for xs, ys in lines:
+        geometry.extend((_command(_MOVE_TO, 1), _zigzag(xs[0] - cx), _zigzag(ys[0] - cy)))
+        cx, cy = xs[0], ys[0]
+        geometry.append(_command(_LINE_TO, len(xs) - 1))
+        for x, y in zip(xs[1:], ys[1:]):
+            geometry.extend((_zigzag(x - cx), _zigzag(y - cy)))
+            cx, cy = x, y
+    return geometry
+
+
+class LayerEncoder:
+    """Builds one MVT layer, interning property keys and values."""
+
+    def __init__(self, name: str, extent: int = EXTENT):
+        self.name = name
+        self.extent = extent
+        self.keys: Dict[str, int] = {}
+        self.values: Dict[Tuple[type, Any], int] = {}
+        self.features: List[bytes] = []
+
+    def _tags(self, properties: Dict[str, Any]) -> List[int]:
+        tags = []
+        for key, value in properties.items():
+            if value is None:
+                continue
+            key_index = self.keys.setdefault(key, len(self.keys))
+            value_index = self.values.setdefault((type(value), value), len(self.values))
+            tags.extend((key_index, value_index))
+        return tags
+
+    def add(self, feature_id: Optional[int], geometry_type: int, geometry: List[int], properties: Dict[str, Any]) -> None:
+        feature = b""
+        if feature_id is not None:
+            feature += _field_varint(1, feature_id)
+        feature += _field_packed(2, self._tags(properties))
+        feature += _field_varint(3, geometry_type)
+        feature += _field_packed(4, geometry)
+        self.features.append(feature)
+
+    def encode(self) -> bytes:
+        if not self.features:
+            return b""
+        layer = _field_varint(15, 2) + _field_bytes(1, self.name.encode("utf-8"))
+        layer += b"".join(_field_bytes(2, feature) for feature in self.features)
+        layer += b"".join(_field_bytes(3, key.encode("utf-8")) for key in self.keys)
+        layer += b"".join(_field_bytes(4, _value(value)) for _, value in self.values)
+        layer += _field_varint(5, self.extent)
+        return _field_bytes(3, layer)
+
+
+def clip_line(xs: np.ndarray, ys: np.ndarray, low: float, high: float) -> List[Tuple[List[int], List[int]]]:
+    """
+    Clip a polyline to the square ``[low, high]`` and round to integer tile coordinates.
+
+    Segment intersections are computed for all segments at once (Liang-Barsky);
+    only the visible segments are walked to stitch the pieces together.
+
+    Returns:
+        Visible pieces as (xs, ys) lists of at least two distinct points
+    """
+    if len(xs) < 2:
+        return []
+    x0, y0, dx, dy = xs[:-1], ys[:-1], np.diff(xs), np.diff(ys)
+    t0 = np.zeros(len(dx))
+    t1 = np.ones(len(dx))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-dx, x0 - low), (dx, high - x0), (-dy, y0 - low), (dy, high - y0)):
+            ratio = q / p
+            parallel_outside = (p == 0) & (q < 0)
+            t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+            t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+            t1 = np.where(parallel_outside, -1.0, t1)
+
+    pieces: List[Tuple[List[int], List[int]]] = []
+    current_x: List[int] = []
+    current_y: List[int] = []
+    previous = -2
+    for i in np.nonzero(t0 <= t1)[0].tolist():
+        start = (int(round(x0[i] + t0[i] * dx[i])), int(round(y0[i] + t0[i] * dy[i])))
+        end = (int(round(x0[i] + t1[i] * dx[i])), int(round(y0[i] + t1[i] * dy[i])))
+        if i != previous + 1 or t0[i] > 0 or not current_x:
+            if len(current_x) >= 2:
+                pieces.append((current_x, current_y))
+            current_x, current_y = [start[0]], [start[1]]
+        for x, y in (start, end):
+            if (x, y) != (current_x[-1], current_y[-1]):
+                current_x.append(x)
+                current_y.append(y)
+        if t1[i] < 1:
+            if len(current_x) >= 2:
+                pieces.append((current_x, current_y))
+            current_x, current_y = [], []
+        previous = i
+    if len(current_x) >= 2:
+        pieces.append((current_x, current_y))
+    return pieces
+
+
+class VectorTileSource:
+    """
+    Stops and simplified route lines in Web Mercator, ready to cut into tiles.
+
+    Route lines are kept for every simplification tier above full resolution;
+    a tile uses the coarsest tier that stays within one pixel at its zoom.
+    """
+
+    def __init__(
+        self,
+        stop_records: List[Dict[str, Any]],
+        stop_xy: Tuple[np.ndarray, np.ndarray],
+        routes: List[Dict[str, Any]],
+        line_routes: List[int],
+        line_shapes: List[str],
+        tier_lines: Dict[int, List[Tuple[np.ndarray, np.ndarray]]]
+    ):
+        """
+        Args:
+            stop_records: Stop records as held by the stop spatial index
+            stop_xy: Normalised Mercator (xs, ys) of the stops
+            routes: Route properties by route position
+            line_routes: Route position of each line
+            line_shapes: Shape id of each line
+            tier_lines: Per tier, normalised Mercator (xs, ys) of each line
+        """
+        self.stop_records = stop_records
+        self.stop_xs, self.stop_ys = stop_xy
+        self.routes = routes
+        self.line_routes = line_routes
+        self.line_shapes = line_shapes
+        self.tier_lines = tier_lines
+        self.tier_bounds = {
+            tier: np.array([
+                (xs.min(), ys.min(), xs.max(), ys.max()) if len(xs) else (np.inf, np.inf, -np.inf, -np.inf)
+                for xs, ys in lines
+            ]).reshape(-1, 4)
+            for tier, lines in tier_lines.items()
+        }
+        self.tile = lru_cache(maxsize=TILE_CACHE_SIZE)(self._tile)
+
+    @classmethod
+    def from_database(cls, db: DatabaseConnector) -> "VectorTileSource":
+        """Build from the stop spatial index and the ``route_shapes``/``shape_tiers`` tables."""
+        spatial_index = get_stop_spatial_index(db)
+        stop_xy = mercator(spatial_index.lats, spatial_index.lons)
+
+        route_rows = db.execute_records("""
+            SELECT
+                r.route_id,
+                r.route_short_name,
+                r.route_long_name,
+                r.route_type,
+                COALESCE(r.route_color, 'FFFFFF') AS route_color,
+                rs.shape_id
+            FROM route_shapes rs
+                     JOIN routes r ON r.route_id = rs.route_id
+            WHERE rs.covered_by IS NULL
+            ORDER BY r.route_id, rs.trip_count DESC, rs.shape_id
+        """)
+        routes: List[Dict[str, Any]] = []
+        route_positions: Dict[str, int] = {}
+        line_routes: List[int] = []
+        line_shapes: List[str] = []
+        for row in route_rows:
+            if row["route_id"] not in route_positions:
+                route_positions[row["route_id"]] = len(routes)
+                routes.append({
+                    "route_id": row["route_id"],
+                    "route_short_name": row["route_short_name"],
+                    "route_long_name": row["route_long_name"],
+                    "route_type": row["route_type"],
+                    "route_color": f"#{row['route_color']}",
+                })
+            line_routes.append(route_positions[row["route_id"]])
+            line_shapes.append(row["shape_id"])
+
+        # Routes sharing a shape each get their own line over the same geometry
+        shape_lines: Dict[str, List[int]] = {}
+        for i, shape_id in enumerate(line_shapes):
+            shape_lines.setdefault(shape_id, []).append(i)
+        tier_lines: Dict[int, List[Tuple[np.ndarray, np.ndarray]]] = {
+            tier: [(np.empty(0), np.empty(0))] * len(line_shapes) for tier in range(1, len(SHAPE_TOLERANCES_METERS))
+        }
+        tiers = db.execute("""
+            SELECT shape_id, tier, lats, lons
+            FROM shape_tiers
+            WHERE tier > 0 AND shape_id IN (SELECT shape_id FROM route_shapes WHERE covered_by IS NULL)
+        """)
+        for shape_id, tier, lats, lons in tiers:
+            geometry = mercator(np.array(lats), np.array(lons))
+            for line in shape_lines.get(shape_id, ()):
+                tier_lines[tier][line] = geometry
+
+        return cls(spatial_index.records, stop_xy, routes, line_routes, line_shapes, tier_lines)
+
+    def _tile(self, z: int, x: int, y: int) -> bytes:
+        """Encoded tile ``z/x/y``; empty when no feature touches it."""
+        scale = 2 ** z
+        margin = BUFFER / EXTENT
+        min_x, min_y = x / scale - margin / scale, y / scale - margin / scale
+        max_x, max_y = (x + 1) / scale + margin / scale, (y + 1) / scale + margin / scale
+
+        def to_tile(xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            return (xs * scale - x) * EXTENT, (ys * scale - y) * EXTENT
+
+        routes = LayerEncoder(ROUTES_LAYER)
+        tier = max(1, select_tier(zoom_tolerance(z, tile_latitude(z, y))))
+        bounds = self.tier_bounds.get(tier)
+        if bounds is not None and len(bounds):
+            candidates = np.nonzero(
+                (bounds[:, 0] <= max_x) & (bounds[:, 2] >= min_x) & (bounds[:, 1] <= max_y) & (bounds[:, 3] >= min_y)
+            )[0]
+            for line in candidates.tolist():
+                pieces = clip_line(*to_tile(*self.tier_lines[tier][line]), -BUFFER, EXTENT + BUFFER)
+                if pieces:
+                    routes.add(line + 1, _LINESTRING, encode_lines(pieces), {
+                        **self.routes[self.line_routes[line]],
+                        "shape_id": self.line_shapes[line],
+                    })
+
+        stops = LayerEncoder(STOPS_LAYER)
+        if z >= STOP_MIN_ZOOM:
+            inside = np.nonzero(
+                (self.stop_xs >= min_x) & (self.stop_xs < max_x) & (self.stop_ys >= min_y) & (self.stop_ys < max_y)
+            )[0]
+            tile_xs, tile_ys = to_tile(self.stop_xs[inside], self.stop_ys[inside])
+            for position, px, py in zip(inside.tolist(), np.round(tile_xs).astype(int).tolist(), np.round(tile_ys).astype(int).tolist()):
+                record = self.stop_records[position]
+                stops.add(position + 1, _POINT, encode_points([px], [py]), {
+                    "stop_id": record["stop_id"],
+                    "stop_name": record["stop_name"],
+                    "location_type": record["location_type"],
+                    "wheelchair_boarding": record["wheelchair_boarding"],
+                })
+
+        return routes.encode() + stops.encode()
+
+
+register_feed_index("vector_tiles", VectorTileSource.from_database)
+
+
+def get_vector_tile_source(db: DatabaseConnector) -> VectorTileSource:
+    """Get the vector tile source, building it from ``db`` on first use."""
+    return get_feed_index("vector_tiles", db)